@@ -0,0 +1,12 @@
+-- ============================================
+-- HISTORY PAGINATION
+-- ============================================
+--
+-- RUN THIS IN SUPABASE SQL EDITOR
+-- Keyset pagination for /api/insights/reports/{user_id}: pages are fetched with
+-- (created_at, id) < cursor, so the index includes id as the tie-break
+-- /api/reflections/past/{user_id} already uses UNIQUE(user_id, reflection_date)
+-- ============================================
+
+CREATE INDEX IF NOT EXISTS idx_insights_reports_user_created_id
+    ON insights_reports(user_id, created_at DESC, id DESC);
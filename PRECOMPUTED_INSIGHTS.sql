@@ -0,0 +1,21 @@
+-- ============================================
+-- PRECOMPUTED INSIGHTS REPORTS
+-- ============================================
+--
+-- RUN THIS IN SUPABASE SQL EDITOR
+-- Supports the nightly insights pipeline (backend/insights_pipeline.py)
+-- Precomputed reports are stored in insights_reports with report_type = 'precomputed'
+-- ============================================
+
+-- One precomputed report per user per run date - makes re-runs idempotent
+CREATE UNIQUE INDEX IF NOT EXISTS idx_insights_reports_precomputed_unique
+    ON insights_reports(user_id, period_end)
+    WHERE report_type = 'precomputed';
+
+-- Latest precomputed report lookup for /api/ai/insights
+CREATE INDEX IF NOT EXISTS idx_insights_reports_user_type_created
+    ON insights_reports(user_id, report_type, created_at DESC);
+
+-- Active user scan for the pipeline
+CREATE INDEX IF NOT EXISTS idx_conversation_history_created_sender
+    ON conversation_history(created_at, sender);
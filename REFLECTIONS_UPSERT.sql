@@ -0,0 +1,30 @@
+-- ============================================
+-- DAILY REFLECTIONS UPSERT
+-- ============================================
+--
+-- RUN THIS IN SUPABASE SQL EDITOR
+-- /api/reflections/save is a single upsert ON CONFLICT (user_id, reflection_date),
+-- which needs a unique constraint on those columns. SUPABASE_MIGRATION.sql creates it,
+-- but tables created before that migration may be missing it.
+-- ============================================
+
+-- 1. Remove duplicate days left by the old select-then-insert race (keep the latest edit)
+DELETE FROM daily_reflections d
+USING daily_reflections newer
+WHERE d.user_id = newer.user_id
+  AND d.reflection_date = newer.reflection_date
+  AND (coalesce(d.updated_at, d.created_at, '-infinity'), d.id)
+    < (coalesce(newer.updated_at, newer.created_at, '-infinity'), newer.id);
+
+-- 2. Add the constraint if it isn't there yet
+DO $$
+BEGIN
+  IF NOT EXISTS (
+    SELECT 1 FROM pg_constraint
+    WHERE conrelid = 'public.daily_reflections'::regclass
+      AND conname = 'daily_reflections_user_id_reflection_date_key'
+  ) THEN
+    ALTER TABLE public.daily_reflections
+      ADD CONSTRAINT daily_reflections_user_id_reflection_date_key UNIQUE (user_id, reflection_date);
+  END IF;
+END $$;
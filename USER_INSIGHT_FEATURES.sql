@@ -0,0 +1,128 @@
+-- ============================================
+-- USER INSIGHT FEATURES
+-- ============================================
+--
+-- RUN THIS IN SUPABASE SQL EDITOR
+-- One compact row per user, updated incrementally as messages and reflections
+-- are written (backend/feature_store.py), so insights never rescan history
+-- ============================================
+
+CREATE TABLE IF NOT EXISTS public.user_insight_features (
+  user_id uuid PRIMARY KEY REFERENCES auth.users(id) ON DELETE CASCADE,
+  message_count integer NOT NULL DEFAULT 0,
+  topic_counts jsonb NOT NULL DEFAULT '{}'::jsonb,     -- topic -> messages mentioning it (lifetime)
+  mood_counts jsonb NOT NULL DEFAULT '{}'::jsonb,      -- mood -> messages showing it (lifetime)
+  activity_by_day jsonb NOT NULL DEFAULT '{}'::jsonb,  -- 'YYYY-MM-DD' -> messages (last 90 days)
+  topics_by_day jsonb NOT NULL DEFAULT '{}'::jsonb,    -- 'YYYY-MM-DD' -> {topic: messages} (last 90 days)
+  moods_by_day jsonb NOT NULL DEFAULT '{}'::jsonb,     -- 'YYYY-MM-DD' -> {mood: messages} (last 90 days)
+  reflections jsonb NOT NULL DEFAULT '{}'::jsonb,      -- 'YYYY-MM-DD' -> {rating, themes, moods, coaches} (last 90 days)
+  backfilled_at timestamp with time zone,              -- set once the row has been rebuilt from history
+  updated_at timestamp with time zone DEFAULT now()
+);
+
+-- Tables created before the per-day topic/mood counts and backfill marker
+ALTER TABLE public.user_insight_features
+  ADD COLUMN IF NOT EXISTS topics_by_day jsonb NOT NULL DEFAULT '{}'::jsonb,
+  ADD COLUMN IF NOT EXISTS moods_by_day jsonb NOT NULL DEFAULT '{}'::jsonb,
+  ADD COLUMN IF NOT EXISTS backfilled_at timestamp with time zone;
+
+ALTER TABLE public.user_insight_features ENABLE ROW LEVEL SECURITY;
+
+-- Backend (service role) only
+GRANT ALL ON public.user_insight_features TO service_role;
+
+-- Sum two {key: count} objects
+CREATE OR REPLACE FUNCTION public.jsonb_add_counts(a jsonb, b jsonb)
+RETURNS jsonb
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT coalesce(jsonb_object_agg(key, total), '{}'::jsonb)
+  FROM (
+    SELECT key, sum(value::numeric)::integer AS total
+    FROM (
+      SELECT * FROM jsonb_each_text(coalesce(a, '{}'::jsonb))
+      UNION ALL
+      SELECT * FROM jsonb_each_text(coalesce(b, '{}'::jsonb))
+    ) counts
+    GROUP BY key
+  ) totals;
+$$;
+
+-- Keep only date keys newer than the window
+CREATE OR REPLACE FUNCTION public.jsonb_trim_days(obj jsonb, newest date, days integer)
+RETURNS jsonb
+LANGUAGE sql
+IMMUTABLE
+AS $$
+  SELECT coalesce(jsonb_object_agg(key, value), '{}'::jsonb)
+  FROM jsonb_each(coalesce(obj, '{}'::jsonb))
+  WHERE key::date > newest - days;
+$$;
+
+-- One user message: atomic increment, safe under concurrent requests
+CREATE OR REPLACE FUNCTION public.record_message_features(
+  p_user_id uuid,
+  p_day date,
+  p_topics jsonb,
+  p_moods jsonb
+)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  INSERT INTO user_insight_features AS f (
+    user_id, message_count, topic_counts, mood_counts, activity_by_day, topics_by_day, moods_by_day
+  )
+  VALUES (
+    p_user_id, 1, p_topics, p_moods, jsonb_build_object(p_day::text, 1),
+    jsonb_build_object(p_day::text, p_topics), jsonb_build_object(p_day::text, p_moods)
+  )
+  ON CONFLICT (user_id) DO UPDATE SET
+    message_count = f.message_count + 1,
+    topic_counts = jsonb_add_counts(f.topic_counts, p_topics),
+    mood_counts = jsonb_add_counts(f.mood_counts, p_moods),
+    activity_by_day = jsonb_trim_days(
+      jsonb_add_counts(f.activity_by_day, jsonb_build_object(p_day::text, 1)), p_day, 90
+    ),
+    topics_by_day = jsonb_trim_days(
+      f.topics_by_day || jsonb_build_object(p_day::text, jsonb_add_counts(f.topics_by_day -> p_day::text, p_topics)),
+      p_day, 90
+    ),
+    moods_by_day = jsonb_trim_days(
+      f.moods_by_day || jsonb_build_object(p_day::text, jsonb_add_counts(f.moods_by_day -> p_day::text, p_moods)),
+      p_day, 90
+    ),
+    updated_at = now();
+END;
+$$;
+
+-- One daily reflection: stored under its date so re-saving the same day overwrites
+CREATE OR REPLACE FUNCTION public.record_reflection_features(
+  p_user_id uuid,
+  p_day date,
+  p_reflection jsonb
+)
+RETURNS void
+LANGUAGE plpgsql
+SECURITY DEFINER
+SET search_path = public
+AS $$
+BEGIN
+  INSERT INTO user_insight_features AS f (user_id, reflections)
+  VALUES (p_user_id, jsonb_build_object(p_day::text, p_reflection))
+  ON CONFLICT (user_id) DO UPDATE SET
+    reflections = jsonb_trim_days(f.reflections || jsonb_build_object(p_day::text, p_reflection), p_day, 90),
+    updated_at = now();
+END;
+$$;
+
+GRANT EXECUTE ON FUNCTION public.record_message_features(uuid, date, jsonb, jsonb) TO service_role;
+GRANT EXECUTE ON FUNCTION public.record_reflection_features(uuid, date, jsonb) TO service_role;
+
+-- Ranked topics from the nightly TF-IDF pass (backend/topic_extractor.py)
+ALTER TABLE public.user_insight_features
+  ADD COLUMN IF NOT EXISTS ranked_topics jsonb NOT NULL DEFAULT '[]'::jsonb,  -- [[topic, score], ...] best first
+  ADD COLUMN IF NOT EXISTS ranked_topics_at timestamp with time zone;
@@ -1,17 +1,32 @@
 """
 AI Service for HeartLift - Powers all AI features
-Uses Emergent Universal LLM Key with OpenAI GPT-4o-mini
+Uses Emergent Universal LLM Key with OpenAI GPT-4o-mini, through providers.py
+(AI_PROVIDER=fake swaps in local stand-ins for benchmarks and offline runs)
 """
 import os
 import json
+import time
+import asyncio
+import copy
 import base64
-from typing import List, Dict, Optional
+import hashlib
+from typing import List, Dict, Optional, AsyncIterator, Tuple
 from datetime import datetime, date
-from emergentintegrations.llm.chat import LlmChat, UserMessage
-from emergentintegrations.llm.openai.image_generation import OpenAIImageGeneration
 import logging
 from dotenv import load_dotenv
 from pathlib import Path
+from cache import LRUCache
+import question_bank
+import progress_scoring
+import media_store
+import tts_cache
+import tts_chunking
+import metrics
+import tracing
+import providers
+from providers import UserMessage
+from heart_vision_cache import heart_vision_cache, cache_key as heart_vision_cache_key
+from question_bank import THEME_FOCUSES
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
@@ -29,10 +44,221 @@ if not EMERGENT_LLM_KEY:
 else:
     logger.info(f"EMERGENT_LLM_KEY loaded successfully: {EMERGENT_LLM_KEY[:15]}...")
 
+# OpenAI speech endpoint - overridable so tests and benchmarks can point at a local fake
+OPENAI_TTS_URL = os.getenv("OPENAI_TTS_URL", "https://api.openai.com/v1/audio/speech")
+TTS_TIMEOUT_SECONDS = 20.0
+# Long scripts are rendered sentence by sentence, this many at once per script
+TTS_CHUNKING = os.getenv("TTS_CHUNKING", "true").lower() == "true"
+TTS_CHUNK_CONCURRENCY = int(os.getenv("TTS_CHUNK_CONCURRENCY", "4"))
+# LLM calls that fall back to canned content when they take longer than this
+QUIZ_TIMEOUT_SECONDS = 20.0
+INSIGHTS_TIMEOUT_SECONDS = 15.0
+
+async def _send_llm(chat, message: UserMessage, model: str, operation: str):
+    """chat.send_message in an llm.send_message span, with latency and outcome recorded per model and operation"""
+    with tracing.span("llm.send_message", model=model, operation=operation, prompt_chars=len(message.text)):
+        return await metrics.observe_call(
+            chat.send_message(message), metrics.LLM_REQUEST_SECONDS, metrics.LLM_REQUESTS, model, operation
+        )
+
 # Simple in-memory cache for daily quiz questions
 _quiz_cache: Dict[str, List[Dict]] = {}
 _quiz_cache_date: Optional[date] = None
 
+# Fast-path quiz analyses waiting for (or holding) their LLM narrative
+# analysis_id -> {"status": "pending" | "complete" | "failed", "result": Dict, "created_at": float, "task": Task}
+_quiz_enrichments: Dict[str, Dict] = {}
+QUIZ_ENRICHMENT_TTL_SECONDS = 3600
+
+# Completed LLM quiz analyses keyed by answer fingerprint (date, question set, chosen options).
+# Everyone gets the same daily questions, so identical answer sets are common.
+_quiz_analysis_cache = LRUCache(
+    max_size=int(os.getenv("QUIZ_ANALYSIS_CACHE_SIZE", "5000")),
+    name="quiz_analysis"
+)
+_quiz_analysis_uncacheable = 0  # analyses whose answers didn't match a known question set
+
+
+# Keyword patterns used to score quiz answers against each attachment style
+ATTACHMENT_PATTERNS = {
+    'secure': [
+        'comfortable', 'trust', 'open', 'balanced', 'healthy', 'confident',
+        'communicate', 'direct', 'express', 'share', 'mutual', 'respect',
+        'independent', 'interdependent', 'secure', 'safe', 'calm'
+    ],
+    'anxious': [
+        'worry', 'fear', 'need', 'reassurance', 'abandon', 'anxious', 'insecure',
+        'clingy', 'overthink', 'doubt', 'jealous', 'constant', 'validation',
+        'afraid', 'lose', 'alone', 'rejection', 'approval', 'attention'
+    ],
+    'avoidant': [
+        'space', 'distance', 'independent', 'self-reliant', 'alone', 'withdraw',
+        'uncomfortable', 'intimacy', 'closeness', 'avoid', 'detach', 'distant',
+        'freedom', 'trapped', 'suffocated', 'private', 'self-sufficient'
+    ],
+    'fearful-avoidant': [
+        'push', 'pull', 'conflicted', 'both', 'struggle', 'want but', 'fear but',
+        'scared', 'hurt', 'protect', 'walls', 'difficult', 'trust issues',
+        'ambivalent', 'mixed', 'confused', 'contradictory'
+    ]
+}
+
+ATTACHMENT_STYLES = list(ATTACHMENT_PATTERNS.keys())
+
+# Style weight vectors for every quiz option we've served, computed once when the
+# questions are generated:
+# question text -> option text -> {"weights", "matched_patterns", "position", "question_set_id"}
+_option_style_index: Dict[str, Dict[str, Dict]] = {}
+
+# Curated insight library for instant (no LLM) quiz results.
+# "patterns" lines are picked when the matching keyword shows up in the user's answers,
+# the style defaults fill whatever is left so every list has 3 entries.
+QUIZ_INSIGHT_LIBRARY = {
+    'secure': {
+        "patterns": {
+            'trust': ("strengths", "You extend trust to people who show they're reliable"),
+            'communicate': ("strengths", "You talk things through instead of letting them build up"),
+            'express': ("strengths", "You're able to put your feelings into words"),
+            'calm': ("strengths", "You stay steady when situations get tense"),
+            'open': ("relationshipPatterns", "You keep the door open for honest conversations"),
+            'independent': ("relationshipPatterns", "You balance time together with time for yourself"),
+        },
+        "strengths": [
+            "You feel comfortable with both closeness and independence",
+            "You handle disagreements without losing sight of the relationship",
+            "You're able to ask for support when you need it",
+        ],
+        "challenges": [
+            "You may expect others to communicate as openly as you do",
+            "You can underestimate how unsettling conflict feels for others",
+            "Stress can still pull you toward old, less secure habits",
+        ],
+        "relationshipPatterns": [
+            "You tend to build relationships on mutual respect",
+            "You give people space without feeling threatened",
+            "You repair quickly after a falling out",
+        ],
+        "healingPath": "Keep nurturing the habits that make you feel safe with others - honest check-ins, clear boundaries and giving people the benefit of the doubt. Notice the moments stress pulls you away from them and gently come back.",
+        "triggers": [
+            "Inconsistent behaviour from people you're close to",
+            "Feeling that your honesty isn't returned",
+            "Big changes that unsettle your routine",
+        ],
+    },
+    'anxious': {
+        "patterns": {
+            'worry': ("challenges", "Worry can take over when you don't hear back from people"),
+            'overthink': ("challenges", "You tend to overthink small changes in how others act"),
+            'reassurance': ("challenges", "You often look to others for reassurance that things are okay"),
+            'need': ("relationshipPatterns", "You notice and name your needs in relationships"),
+            'share': ("strengths", "You're generous about sharing how you feel"),
+            'fear': ("triggers", "Fear of being left out or left behind"),
+        },
+        "strengths": [
+            "You care deeply about the people in your life",
+            "You're highly tuned in to other people's moods",
+            "You invest real energy in keeping relationships strong",
+        ],
+        "challenges": [
+            "Silence or distance can feel like rejection",
+            "You may put others' needs ahead of your own",
+            "It can be hard to self-soothe when you feel unsure",
+        ],
+        "relationshipPatterns": [
+            "You reach out more when you sense distance",
+            "You look for signs that you're valued",
+            "You feel closest when contact is frequent",
+        ],
+        "healingPath": "Practise calming your nervous system before reaching out - a few slow breaths, a walk, or writing down what you're feeling. Building trust in your own ability to handle uncertainty makes it easier to trust others.",
+        "triggers": [
+            "Delayed replies to messages",
+            "Plans changing at the last minute",
+            "Feeling left out of group activities",
+        ],
+    },
+    'avoidant': {
+        "patterns": {
+            'space': ("relationshipPatterns", "You look for space when things feel intense"),
+            'alone': ("relationshipPatterns", "You recharge best with time on your own"),
+            'withdraw': ("challenges", "You may withdraw before talking about what's bothering you"),
+            'independent': ("strengths", "You're independent and resourceful"),
+            'uncomfortable': ("challenges", "Emotional conversations can feel uncomfortable"),
+            'private': ("triggers", "Feeling pressured to share more than you're ready to"),
+        },
+        "strengths": [
+            "You're self-reliant and handle problems calmly",
+            "You respect other people's need for space",
+            "You stay level-headed when others are emotional",
+        ],
+        "challenges": [
+            "Asking for help can feel like a weakness",
+            "You may downplay your own feelings",
+            "Closeness can start to feel overwhelming",
+        ],
+        "relationshipPatterns": [
+            "You prefer to process feelings privately first",
+            "You value freedom within your relationships",
+            "You show care through actions more than words",
+        ],
+        "healingPath": "Try sharing one small feeling at a time with someone you trust, and notice that closeness doesn't have to cost you your independence. Naming what you need, even briefly, helps others meet you halfway.",
+        "triggers": [
+            "Feeling crowded or pressured",
+            "Others expecting constant contact",
+            "Conversations that feel emotionally intense",
+        ],
+    },
+    'fearful-avoidant': {
+        "patterns": {
+            'mixed': ("relationshipPatterns", "You have mixed feelings about getting close"),
+            'push': ("challenges", "You may push people away right after letting them in"),
+            'scared': ("challenges", "Part of you wants closeness while part of you feels scared of it"),
+            'hurt': ("triggers", "Situations that remind you of being hurt before"),
+            'protect': ("strengths", "You're protective of yourself and the people you love"),
+            'difficult': ("strengths", "You keep going even when relationships feel difficult"),
+        },
+        "strengths": [
+            "You're deeply empathetic towards others' struggles",
+            "You're self-aware about your own mixed feelings",
+            "You've built resilience through hard experiences",
+        ],
+        "challenges": [
+            "Wanting closeness and distance at the same time",
+            "Trusting people consistently",
+            "Reacting strongly when you feel unsafe",
+        ],
+        "relationshipPatterns": [
+            "You move between reaching out and pulling back",
+            "You test whether people will stay",
+            "Your comfort with closeness changes with your mood",
+        ],
+        "healingPath": "Go slowly and build safety in small steps. Noticing when you want to pull back - and pausing before you do - gives you room to choose how you respond rather than reacting on autopilot.",
+        "triggers": [
+            "Sudden changes in how close someone feels",
+            "Conflict that feels unpredictable",
+            "Moments of vulnerability",
+        ],
+    },
+}
+
+QUIZ_COPING_TECHNIQUES = {
+    'secure': [
+        {"technique": "Weekly Check-ins", "description": "Keeps communication open before issues build up", "example": "Ask a friend or family member how they're really doing this week"},
+        {"technique": "Values Reflection", "description": "Reinforces what healthy connection means to you", "example": "Write down three things that make you feel safe with someone"},
+    ],
+    'anxious': [
+        {"technique": "Pause Before Reaching Out", "description": "Gives your nervous system time to settle", "example": "Wait ten minutes and take slow breaths before sending a follow-up message"},
+        {"technique": "Self-Reassurance Journal", "description": "Builds trust in your own worth without needing others to confirm it", "example": "List evidence that the people you care about value you"},
+    ],
+    'avoidant': [
+        {"technique": "Small Shares", "description": "Practises closeness in manageable steps", "example": "Tell someone one thing that made you feel something today"},
+        {"technique": "Name the Need", "description": "Helps others understand your need for space", "example": "Say 'I need an hour to myself, then I'd love to talk'"},
+    ],
+    'fearful-avoidant': [
+        {"technique": "Grounding Exercises", "description": "Helps you stay present when you feel pulled in two directions", "example": "Use the 5-4-3-2-1 senses technique when you feel overwhelmed"},
+        {"technique": "Safe Person Plan", "description": "Builds consistent trust with one reliable person", "example": "Agree a regular time to catch up with someone you trust"},
+    ],
+}
+
 
 # Coach personality prompts - MUST match frontend coach IDs exactly!
 
@@ -313,8 +539,9 @@ Remember: You help them pause, reconnect, and nurture connection with presence.
 }
 
 
+@tracing.trace_methods("ai_service")
 class AIService:
-    """Service for handling all AI interactions"""
+    """Service for handling all AI interactions (each async method runs in an ai_service.<method> span)"""
     
     def __init__(self):
         # Reload env vars in case subprocess doesn't have them
@@ -324,6 +551,7 @@ class AIService:
         
         self.api_key = os.getenv("EMERGENT_LLM_KEY") or EMERGENT_LLM_KEY
         self._yesterday_summary = None  # Store yesterday's conversation summary
+        self._tts_client = None  # Shared OpenAI speech connection pool, created on first use
         
         if not self.api_key:
             logger.error("EMERGENT_LLM_KEY not found in environment!")
@@ -363,10 +591,11 @@ class AIService:
             # Get coach personality
             coach = COACH_PERSONALITIES.get(coach_id)
             if not coach:
-                logger.error(f"Unknown coach ID: {coach_id}")
+                logger.error("Unknown coach ID: %s", coach_id)
                 coach = COACH_PERSONALITIES["therapist"]  # Fallback to Dr. Sage
             
             # Build system message with context
+            prompt_span = tracing.start_span("coach.build_prompt", coach_id=coach_id)
             system_message = coach["system_message"]
             
             # Only add name instruction if this is the first message (no conversation history)
@@ -409,7 +638,7 @@ User: "Hey, how are you?"
 Coach: "Hey! I'm good, how are you feeling today?"
 """
                 system_message += reflection_context
-                logger.info("Added reflection context for first conversation of the day")
+                logger.debug("Added reflection context for first conversation of the day")
             
             # Add yesterday's conversation memory for continuity (ONLY if this is first message of today)
             if not conversation_history and hasattr(self, '_yesterday_summary'):
@@ -451,10 +680,10 @@ Coach: "Hey! I'm good, how are you feeling today?"
                     greeting_style = random.choice(greeting_styles) if greeting_styles else "Ask naturally about yesterday"
                     
                     system_message += f"\n\n**YESTERDAY'S CONVERSATION SUMMARY:**\n{yesterday_context}\n\n**IMPORTANT GREETING VARIATION:** {greeting_style}. Reference yesterday ONLY ONCE at the start. After your first message, NEVER mention yesterday again unless the user brings it up. MIX UP your greeting style every day - don't repeat the same opening!"
-                    logger.info("Added yesterday's conversation summary with greeting variety")
+                    logger.debug("Added yesterday's conversation summary with greeting variety")
             
             # Create chat instance
-            chat = LlmChat(
+            chat = providers.provider.chat(
                 api_key=self.api_key,
                 session_id=session_id,
                 system_message=system_message
@@ -474,14 +703,18 @@ Coach: "Hey! I'm good, how are you feeling today?"
             else:
                 full_message = user_message
             
+            prompt_span.set_attribute("prompt_chars", len(system_message) + len(full_message))
+            prompt_span.end()
+            
             # Send message and get response
             user_msg = UserMessage(text=full_message)
-            response = await chat.send_message(user_msg)
+            response = await _send_llm(chat, user_msg, "gpt-4o-mini", "coach_chat")
             
             return response
             
         except Exception as e:
-            logger.error(f"Error in chat_with_coach: {e}", exc_info=True)
+            logger.error("Error in chat_with_coach: %s", e, exc_info=True)
+            metrics.AI_FALLBACKS.inc("coach_chat")
             return "I apologize, but I'm having trouble connecting right now. Please try again in a moment."
     
     async def generate_daily_quiz_questions(
@@ -501,6 +734,7 @@ Coach: "Hey! I'm good, how are you feeling today?"
         
         Returns:
             List of quiz questions in frontend format: {id, question, options: [string]}
+            (option style weights stay server-side, in _option_style_index)
         """
         global _quiz_cache, _quiz_cache_date
         
@@ -513,28 +747,67 @@ Coach: "Hey! I'm good, how are you feeling today?"
                 logger.info(f"Using cached quiz questions for {today}")
                 return _quiz_cache[cache_key]
             
+            if _quiz_cache_date != today:
+                # Yesterday's option weights are no longer served
+                _option_style_index.clear()
+            
             # Generate new questions
             logger.info(f"Generating new quiz questions for {today}")
             
             # Use day of year to create variety in themes
             day_of_year = today.timetuple().tm_yday
-            theme_rotation = day_of_year % 7
+            theme_rotation = day_of_year % len(THEME_FOCUSES)
+            today_theme = THEME_FOCUSES[theme_rotation]
             
-            theme_focuses = [
-                "family dynamics, parent-child relationships, and sibling bonds",
-                "friendships, social groups, and peer connections", 
-                "emotional awareness, self-reflection, and inner feelings",
-                "communication styles, expressing needs, and listening to others",
-                "trust, vulnerability, and opening up to people",
-                "independence, personal space, and alone time preferences",
-                "conflict resolution, disagreements, and making peace"
-            ]
+            # Serve from the offline, pre-validated question bank when it has today's theme
+            questions = question_bank.sample_daily_questions(today, num_questions)
+            if questions:
+                logger.info(f"Serving {len(questions)} quiz questions from question bank v{question_bank.bank_version()}")
+            else:
+                questions = await self._request_quiz_questions(
+                    theme=today_theme,
+                    num_questions=num_questions,
+                    session_id=f"quiz-{today.strftime('%Y%m%d')}-v2",
+                    timeout=QUIZ_TIMEOUT_SECONDS
+                )
+                if not questions:
+                    return self._get_fallback_questions()
+            
+            # Add IDs to questions
+            for i, question in enumerate(questions):
+                question['id'] = i + 1
             
-            today_theme = theme_focuses[theme_rotation]
+            # Precompute per-option style weights once for everyone answering today's quiz
+            self._index_option_weights(questions)
             
-            system_message = f"""You are a creative psychologist designing an engaging daily attachment style quiz for ages 13+.
+            # Cache the questions for today
+            _quiz_cache[cache_key] = questions
+            _quiz_cache_date = today
+            
+            logger.info(f"Cached {len(questions)} quiz questions for {today}")
+            return questions
+                
+        except Exception as e:
+            logger.error(f"Error generating quiz questions: {e}", exc_info=True)
+            return self._get_fallback_questions()
+    
+    async def _request_quiz_questions(
+        self,
+        theme: str,
+        num_questions: int,
+        session_id: str,
+        timeout: float = 20.0
+    ) -> Optional[List[Dict]]:
+        """
+        Ask GPT-4o for a batch of quiz questions focused on one theme
+        Used for the live daily quiz and for offline question bank generation
+        
+        Returns:
+            List of {question, options, styles}, or None if the call timed out or returned invalid JSON
+        """
+        system_message = f"""You are a creative psychologist designing an engaging daily attachment style quiz for ages 13+.
 
-TODAY'S SPECIAL THEME: {today_theme}
+TODAY'S SPECIAL THEME: {theme}
 Focus 60% of questions on this theme, 40% on other life areas for variety.
 
 **VARIETY IS KEY - AVOID REPETITION:**
@@ -568,6 +841,9 @@ Focus 60% of questions on this theme, 40% on other life areas for variety.
 3. Options describe actual behaviors/feelings (NOT attachment labels)
 4. Make options feel natural and conversational
 5. Each question should feel fresh and different from the others
+6. Add a "styles" array giving the attachment style each option reflects, in the same order as "options" - each one of "secure", "anxious", "avoidant", "fearful-avoidant" (this is never shown to users)
+
+Example shape: {{"question":"...","options":["a","b","c","d"],"styles":["secure","avoidant","anxious","fearful-avoidant"]}}
 
 **GOOD Examples:**
 [
@@ -582,70 +858,56 @@ Focus 60% of questions on this theme, 40% on other life areas for variety.
 ]
 
 Generate {num_questions} HIGHLY VARIED, CREATIVE questions. Make each one feel unique and engaging!"""
-            
-            chat = LlmChat(
-                api_key=self.api_key,
-                session_id=f"quiz-{today.strftime('%Y%m%d')}-v2",
-                system_message=system_message
-            ).with_model("openai", "gpt-4o")  # Upgraded to GPT-4o for better variety
-            
-            prompt = f"""Generate {num_questions} FRESH, CREATIVE quiz questions.
+        
+        chat = providers.provider.chat(
+            api_key=self.api_key,
+            session_id=session_id,
+            system_message=system_message
+        ).with_model("openai", "gpt-4o")  # Upgraded to GPT-4o for better variety
+        
+        prompt = f"""Generate {num_questions} FRESH, CREATIVE quiz questions.
 
 Remember:
-- Today's theme focus: {today_theme}
+- Today's theme focus: {theme}
 - Use different question formats and scenarios
 - Each question should feel unique
 - 4 distinct answer options per question
 - Return ONLY the JSON array"""
+        
+        user_msg = UserMessage(text=prompt)
+        
+        # Increased timeout to 20 seconds for GPT-4o
+        import asyncio
+        try:
+            response = await asyncio.wait_for(
+                _send_llm(chat, user_msg, "gpt-4o", "quiz_questions"),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            logger.warning(f"Quiz generation timed out after {timeout:.0f}s, using fallback")
+            return None
+        
+        # Parse JSON response
+        try:
+            clean_response = response.strip()
+            if clean_response.startswith("```json"):
+                clean_response = clean_response[7:]
+            if clean_response.startswith("```"):
+                clean_response = clean_response[3:]
+            if clean_response.endswith("```"):
+                clean_response = clean_response[:-3]
+            clean_response = clean_response.strip()
             
-            user_msg = UserMessage(text=prompt)
-            
-            # Increased timeout to 20 seconds for GPT-4o
-            import asyncio
-            try:
-                response = await asyncio.wait_for(
-                    chat.send_message(user_msg),
-                    timeout=20.0
-                )
-            except asyncio.TimeoutError:
-                logger.warning("Quiz generation timed out after 20s, using fallback")
-                return self._get_fallback_questions()
-            
-            # Parse JSON response
-            try:
-                clean_response = response.strip()
-                if clean_response.startswith("```json"):
-                    clean_response = clean_response[7:]
-                if clean_response.startswith("```"):
-                    clean_response = clean_response[3:]
-                if clean_response.endswith("```"):
-                    clean_response = clean_response[:-3]
-                clean_response = clean_response.strip()
-                
-                questions = json.loads(clean_response)
-                
-                # Add IDs to questions
-                for i, question in enumerate(questions):
-                    question['id'] = i + 1
-                
-                # Cache the questions for today
-                _quiz_cache[cache_key] = questions
-                _quiz_cache_date = today
-                
-                logger.info(f"Cached {len(questions)} quiz questions for {today}")
-                return questions
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse quiz questions JSON: {e}")
-                return self._get_fallback_questions()
-                
-        except Exception as e:
-            logger.error(f"Error generating quiz questions: {e}", exc_info=True)
-            return self._get_fallback_questions()
+            return json.loads(clean_response)
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse quiz questions JSON: {e}")
+            return None
     
     async def analyze_attachment_quiz(
         self,
         questions_and_answers: List[Dict],
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        fast: bool = False
     ) -> Dict:
         """
         Analyze attachment style quiz results with AI - OPTIMIZED FOR SPEED
@@ -653,10 +915,14 @@ Remember:
         Args:
             questions_and_answers: List of {question: str, answer: str}
             user_id: Optional user ID for personalization
+            fast: Return the locally computed result immediately and write the
+                LLM narrative in the background (poll get_quiz_enrichment with analysisId)
         
         Returns:
             Analysis with attachment style and detailed insights
         """
+        global _quiz_analysis_uncacheable
+        
         try:
             # First, analyze answer patterns to determine attachment style
             answer_patterns = self._analyze_answer_patterns(questions_and_answers)
@@ -665,7 +931,79 @@ Remember:
             logger.info(f"Detected attachment style from patterns: {attachment_style}")
             logger.info(f"Answer pattern scores: {answer_patterns['scores']}")
             
-            system_message = f"""Expert psychologist. Analyze quiz responses with DEEPLY PERSONALIZED insights.
+            # Identical answers to the same daily questions reuse an earlier analysis
+            fingerprint = self._quiz_fingerprint(questions_and_answers)
+            cached = _quiz_analysis_cache.get(fingerprint) if fingerprint else None
+            if not fingerprint:
+                _quiz_analysis_uncacheable += 1
+            if cached:
+                logger.info("Using cached quiz analysis for identical answers")
+            
+            if fast:
+                import asyncio
+                import time
+                import uuid
+
+                # Drop enrichments nobody came back for
+                cutoff = time.time() - QUIZ_ENRICHMENT_TTL_SECONDS
+                for expired_id in [k for k, v in _quiz_enrichments.items() if v["created_at"] < cutoff]:
+                    del _quiz_enrichments[expired_id]
+
+                analysis_id = str(uuid.uuid4())
+                if cached:
+                    _quiz_enrichments[analysis_id] = {
+                        "status": "complete",
+                        "result": copy.deepcopy(cached),
+                        "created_at": time.time()
+                    }
+                    return {**copy.deepcopy(cached), "analysisId": analysis_id, "enrichmentStatus": "complete"}
+
+                local_result = self._build_local_quiz_analysis(answer_patterns)
+                _quiz_enrichments[analysis_id] = {
+                    "status": "pending",
+                    "result": local_result,
+                    "created_at": time.time()
+                }
+                # Keep a reference so the task isn't garbage collected mid-flight
+                _quiz_enrichments[analysis_id]["task"] = asyncio.create_task(
+                    self._enrich_quiz_analysis(
+                        analysis_id, questions_and_answers, answer_patterns, user_id, fingerprint
+                    )
+                )
+
+                logger.info(f"Returning local quiz analysis {analysis_id}, LLM enrichment pending")
+                return {**local_result, "analysisId": analysis_id, "enrichmentStatus": "pending"}
+            
+            if cached:
+                return copy.deepcopy(cached)
+            
+            result = await self._generate_quiz_narrative(questions_and_answers, answer_patterns, user_id)
+            if not result:
+                return self._get_fallback_analysis()
+            
+            if fingerprint:
+                _quiz_analysis_cache.set(fingerprint, copy.deepcopy(result))
+            return result
+                
+        except Exception as e:
+            logger.error(f"Error analyzing quiz: {e}", exc_info=True)
+            return self._get_fallback_analysis()
+    
+    async def _generate_quiz_narrative(
+        self,
+        questions_and_answers: List[Dict],
+        answer_patterns: Dict,
+        user_id: Optional[str] = None
+    ) -> Optional[Dict]:
+        """
+        Ask the LLM for the personalised quiz narrative
+        
+        Returns:
+            Parsed analysis, or None if the call timed out or returned invalid JSON
+        """
+        attachment_style = answer_patterns['dominant_style']
+        
+        system_message = f"""Expert psychologist. Analyze quiz responses with DEEPLY PERSONALIZED insights.
 
 DETECTED ATTACHMENT STYLE: {attachment_style}
 
@@ -695,60 +1033,57 @@ Return ONLY JSON (NO markdown, NO explanations):
 }}
 
 REMEMBER: Quote their answers! Make it personal!"""
+        
+        chat = providers.provider.chat(
+            api_key=self.api_key,
+            session_id=f"quiz-{user_id or 'anon'}-{datetime.now().timestamp()}-{hash(str(questions_and_answers))}",
+            system_message=system_message
+        ).with_model("openai", "gpt-4o-mini")
+        
+        # Build detailed prompt with ALL answers for accurate analysis
+        prompt = f"Analyze this person's UNIQUE responses ({len(questions_and_answers)} questions):\n\n"
+        for i, qa in enumerate(questions_and_answers, 1):
+            prompt += f"Q{i}: {qa['question']}\n"
+            prompt += f"Their answer: \"{qa['answer']}\"\n\n"
+        
+        prompt += f"\nBased on these SPECIFIC words and responses, provide a deeply personalized {attachment_style} analysis. Quote their actual answers to prove you read them carefully."
+        
+        user_msg = UserMessage(text=prompt)
+        
+        # 20 second timeout - need more time for detailed analysis
+        import asyncio
+        try:
+            response = await asyncio.wait_for(
+                _send_llm(chat, user_msg, "gpt-4o-mini", "quiz_analysis"),
+                timeout=20.0
+            )
+        except asyncio.TimeoutError:
+            logger.warning("Analysis timed out after 20s, using fallback")
+            return None
+        
+        # Parse JSON response
+        try:
+            clean_response = response.strip()
+            if clean_response.startswith("```json"):
+                clean_response = clean_response[7:]
+            if clean_response.startswith("```"):
+                clean_response = clean_response[3:]
+            if clean_response.endswith("```"):
+                clean_response = clean_response[:-3]
+            clean_response = clean_response.strip()
             
-            chat = LlmChat(
-                api_key=self.api_key,
-                session_id=f"quiz-{user_id or 'anon'}-{datetime.now().timestamp()}-{hash(str(questions_and_answers))}",
-                system_message=system_message
-            ).with_model("openai", "gpt-4o-mini")
-            
-            # Build detailed prompt with ALL answers for accurate analysis
-            prompt = f"Analyze this person's UNIQUE responses ({len(questions_and_answers)} questions):\n\n"
-            for i, qa in enumerate(questions_and_answers, 1):
-                prompt += f"Q{i}: {qa['question']}\n"
-                prompt += f"Their answer: \"{qa['answer']}\"\n\n"
-            
-            prompt += f"\nBased on these SPECIFIC words and responses, provide a deeply personalized {attachment_style} analysis. Quote their actual answers to prove you read them carefully."
-            
-            user_msg = UserMessage(text=prompt)
-            
-            # 20 second timeout - need more time for detailed analysis
-            import asyncio
-            try:
-                response = await asyncio.wait_for(
-                    chat.send_message(user_msg),
-                    timeout=20.0
-                )
-            except asyncio.TimeoutError:
-                logger.warning("Analysis timed out after 20s, using fallback")
-                return self._get_fallback_analysis()
-            
-            # Parse JSON response
-            try:
-                clean_response = response.strip()
-                if clean_response.startswith("```json"):
-                    clean_response = clean_response[7:]
-                if clean_response.startswith("```"):
-                    clean_response = clean_response[3:]
-                if clean_response.endswith("```"):
-                    clean_response = clean_response[:-3]
-                clean_response = clean_response.strip()
-                
-                result = json.loads(clean_response)
-                logger.info(f"Analyzed attachment style: {result.get('attachmentStyle')}")
-                return result
-            except json.JSONDecodeError as e:
-                logger.error(f"Failed to parse analysis JSON: {e}")
-                return self._get_fallback_analysis()
-                
-        except Exception as e:
-            logger.error(f"Error analyzing quiz: {e}", exc_info=True)
-            return self._get_fallback_analysis()
+            result = json.loads(clean_response)
+            logger.info(f"Analyzed attachment style: {result.get('attachmentStyle')}")
+            return result
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse analysis JSON: {e}")
+            return None
     
     def _analyze_answer_patterns(self, questions_and_answers: List[Dict]) -> Dict:
         """
         Analyze answer patterns to determine attachment style
-        Uses keyword matching and patterns
+        Sums the option weight vectors precomputed for the served questions,
+        falling back to keyword matching for answers we don't have weights for
         """
         scores = {
             'secure': 0,
@@ -756,40 +1091,29 @@ REMEMBER: Quote their answers! Make it personal!"""
             'avoidant': 0,
             'fearful-avoidant': 0
         }
-        
-        # Keywords associated with each style
-        patterns = {
-            'secure': [
-                'comfortable', 'trust', 'open', 'balanced', 'healthy', 'confident',
-                'communicate', 'direct', 'express', 'share', 'mutual', 'respect',
-                'independent', 'interdependent', 'secure', 'safe', 'calm'
-            ],
-            'anxious': [
-                'worry', 'fear', 'need', 'reassurance', 'abandon', 'anxious', 'insecure',
-                'clingy', 'overthink', 'doubt', 'jealous', 'constant', 'validation',
-                'afraid', 'lose', 'alone', 'rejection', 'approval', 'attention'
-            ],
-            'avoidant': [
-                'space', 'distance', 'independent', 'self-reliant', 'alone', 'withdraw',
-                'uncomfortable', 'intimacy', 'closeness', 'avoid', 'detach', 'distant',
-                'freedom', 'trapped', 'suffocated', 'private', 'self-sufficient'
-            ],
-            'fearful-avoidant': [
-                'push', 'pull', 'conflicted', 'both', 'struggle', 'want but', 'fear but',
-                'scared', 'hurt', 'protect', 'walls', 'difficult', 'trust issues',
-                'ambivalent', 'mixed', 'confused', 'contradictory'
-            ]
-        }
-        
+        # Keywords that actually matched, per style (used by the local insight library)
+        matched_patterns = {style: [] for style in scores}
+
         # Analyze each answer
         for qa in questions_and_answers:
-            answer = qa.get('answer', '').lower()
-            
-            for style, keywords in patterns.items():
-                # Count keyword matches
-                for keyword in keywords:
-                    if keyword in answer:
-                        scores[style] += 1
+            answer = qa.get('answer', '')
+            option = _option_style_index.get(qa.get('question', ''), {}).get(answer)
+
+            if option:
+                # Weights precomputed at generation time - just add the vector
+                for style, weight in zip(ATTACHMENT_STYLES, option['weights']):
+                    scores[style] += weight
+                option_matches = option['matched_patterns']
+            else:
+                # Unknown question (e.g. answered yesterday's quiz) - scan the answer text
+                option_matches = self._match_style_keywords(answer)
+                for style, keywords in option_matches.items():
+                    scores[style] += len(keywords)
+
+            for style, keywords in option_matches.items():
+                matched_patterns[style].extend(keywords)
+
+        scores = {style: round(score, 2) for style, score in scores.items()}
         
         # Determine dominant style
         if max(scores.values()) == 0:
@@ -800,11 +1124,185 @@ REMEMBER: Quote their answers! Make it personal!"""
         
         return {
             'dominant_style': dominant_style,
-            'scores': scores
+            'scores': scores,
+            'matched_patterns': matched_patterns
         }
+
+    def _match_style_keywords(self, text: str) -> Dict[str, List[str]]:
+        """Find which attachment style keywords appear in a piece of answer text"""
+        text = text.lower()
+        return {
+            style: [keyword for keyword in keywords if keyword in text]
+            for style, keywords in ATTACHMENT_PATTERNS.items()
+        }
+    
+    def _index_option_weights(
+        self,
+        questions: List[Dict],
+        option_styles: Optional[List[str]] = None
+    ) -> List[Dict]:
+        """
+        Compute a style weight vector for every option and index it for analysis
+        
+        The weights are the scoring key, so they're kept server-side and never
+        returned with the questions
+        
+        Args:
+            questions: Quiz questions ({question, options}, optionally "styles" from the LLM)
+            option_styles: Style of each option by position, for question sets with a fixed order
+        
+        Returns:
+            The same questions, with any "styles" labels removed
+        """
+        # Identifies this exact set of questions/options for analysis fingerprints
+        question_set_id = hashlib.sha256(json.dumps(
+            [[q.get('question', ''), q.get('options', [])] for q in questions]
+        ).encode()).hexdigest()[:16]
+        
+        for question in questions:
+            options = question.get('options', [])
+            styles = question.pop('styles', None) or option_styles
+            if not styles or len(styles) != len(options):
+                styles = [None] * len(options)
+            
+            index = _option_style_index.setdefault(question.get('question', ''), {})
+            for position, (option, style) in enumerate(zip(options, styles)):
+                matched = self._match_style_keywords(option)
+                style = (style or '').lower().strip()
+                if style == 'fearful':
+                    style = 'fearful-avoidant'
+                
+                if style in ATTACHMENT_PATTERNS:
+                    vector = [1.0 if s == style else 0.0 for s in ATTACHMENT_STYLES]
+                else:
+                    # No label - fall back to keyword counts, normalised to sum to 1
+                    counts = [len(matched[s]) for s in ATTACHMENT_STYLES]
+                    total = sum(counts)
+                    vector = [round(c / total, 3) if total else 0.0 for c in counts]
+                
+                index[option] = {
+                    "weights": vector,
+                    "matched_patterns": matched,
+                    "position": position,
+                    "question_set_id": question_set_id
+                }
+        
+        return questions
     
+    def _quiz_fingerprint(self, questions_and_answers: List[Dict]) -> Optional[str]:
+        """
+        Canonical fingerprint of a completed quiz: (date, question set id, chosen option indexes)
+        
+        Returns:
+            Fingerprint string, or None if any answer isn't an option of one known question set
+        """
+        question_set_id = None
+        chosen = []
+        for qa in questions_and_answers:
+            option = _option_style_index.get(qa.get('question', ''), {}).get(qa.get('answer', ''))
+            if not option:
+                return None
+            if question_set_id is None:
+                question_set_id = option['question_set_id']
+            elif option['question_set_id'] != question_set_id:
+                return None
+            chosen.append(str(option['position']))
+        
+        if question_set_id is None:
+            return None
+        return f"{date.today().isoformat()}:{question_set_id}:{','.join(chosen)}"
+    
+    def get_heart_vision_cache_stats(self) -> Dict:
+        """HeartVision prompt cache counters, including generation time saved by hits"""
+        return heart_vision_cache.stats()
+    
+    def get_quiz_cache_stats(self) -> Dict:
+        """Hit/miss counters for the quiz analysis cache"""
+        return _quiz_analysis_cache.stats(extra={"uncacheable": _quiz_analysis_uncacheable})
+    
+    def _build_local_quiz_analysis(self, answer_patterns: Dict) -> Dict:
+        """
+        Build a complete quiz result from the curated insight library - no LLM call
+        Lines keyed by keywords the user actually matched come first, style defaults fill the rest
+        """
+        style = answer_patterns['dominant_style']
+        library = QUIZ_INSIGHT_LIBRARY[style]
+
+        sections = {"strengths": [], "challenges": [], "relationshipPatterns": [], "triggers": []}
+
+        # Most frequently matched keywords first
+        matched = answer_patterns['matched_patterns'].get(style, [])
+        for keyword in sorted(set(matched), key=lambda k: (-matched.count(k), k)):
+            template = library["patterns"].get(keyword)
+            if template:
+                section, text = template
+                if len(sections[section]) < 3:
+                    sections[section].append(text)
+
+        for section, lines in sections.items():
+            for line in library[section]:
+                if len(lines) >= 3:
+                    break
+                if line not in lines:
+                    lines.append(line)
+
+        return {
+            "attachmentStyle": style,
+            "scores": answer_patterns['scores'],
+            "analysis": {
+                "detailedBreakdown": {
+                    "strengths": sections["strengths"],
+                    "challenges": sections["challenges"],
+                    "relationshipPatterns": sections["relationshipPatterns"]
+                },
+                "healingPath": library["healingPath"],
+                "triggers": sections["triggers"],
+                "copingTechniques": QUIZ_COPING_TECHNIQUES[style]
+            }
+        }
+
+    def get_quiz_enrichment(self, analysis_id: str) -> Optional[Dict]:
+        """
+        Get the enrichment state of a fast-path quiz analysis
+
+        Returns:
+            {status, result} or None if the analysis id is unknown or expired
+        """
+        entry = _quiz_enrichments.get(analysis_id)
+        if not entry:
+            return None
+        return {"status": entry["status"], "result": entry["result"]}
+
+    async def _enrich_quiz_analysis(
+        self,
+        analysis_id: str,
+        questions_and_answers: List[Dict],
+        answer_patterns: Dict,
+        user_id: Optional[str],
+        fingerprint: Optional[str] = None
+    ):
+        """Background task: replace a local quiz result with the LLM narrative once it's ready"""
+        entry = _quiz_enrichments[analysis_id]
+        try:
+            result = await self._generate_quiz_narrative(questions_and_answers, answer_patterns, user_id)
+        except Exception as e:
+            logger.error(f"Error enriching quiz analysis {analysis_id}: {e}", exc_info=True)
+            result = None
+
+        if result:
+            result["scores"] = answer_patterns['scores']
+            entry["result"] = result
+            entry["status"] = "complete"
+            if fingerprint:
+                _quiz_analysis_cache.set(fingerprint, copy.deepcopy(result))
+            logger.info(f"Quiz analysis {analysis_id} enriched with LLM narrative")
+        else:
+            # Keep the local result - it's still a complete answer
+            entry["status"] = "failed"
+
     def _get_fallback_analysis(self) -> Dict:
         """Fallback analysis if AI fails"""
+        metrics.AI_FALLBACKS.inc("quiz_analysis")
         return {
             "attachmentStyle": "secure",
             "analysis": {
@@ -890,7 +1388,7 @@ Analyze the conversation and return ONLY this JSON structure:
 
 Be specific, reference actual quotes, provide actionable advice. Return ONLY valid JSON."""
             
-            chat = LlmChat(
+            chat = providers.provider.chat(
                 api_key=self.api_key,
                 session_id=f"analysis-{datetime.now().timestamp()}",
                 system_message=system_message
@@ -902,7 +1400,7 @@ Be specific, reference actual quotes, provide actionable advice. Return ONLY val
             import asyncio
             try:
                 response = await asyncio.wait_for(
-                    chat.send_message(user_msg),
+                    _send_llm(chat, user_msg, "gpt-4o-mini", "conversation_analysis"),
                     timeout=12.0
                 )
             except asyncio.TimeoutError:
@@ -932,6 +1430,7 @@ Be specific, reference actual quotes, provide actionable advice. Return ONLY val
     
     def _get_fallback_conversation_analysis(self) -> Dict:
         """Fallback conversation analysis if AI fails"""
+        metrics.AI_FALLBACKS.inc("conversation_analysis")
         return {
             "emotionalTone": {
                 "user": "Engaged and seeking connection",
@@ -987,7 +1486,7 @@ Return ONLY a JSON array of strings:
 
 No other text or explanation."""
             
-            chat = LlmChat(
+            chat = providers.provider.chat(
                 api_key=self.api_key,
                 session_id=f"textsuggest-{datetime.now().timestamp()}",
                 system_message=system_message
@@ -995,7 +1494,7 @@ No other text or explanation."""
             
             prompt = f"Context: {context}\nSituation: {situation}\n\nGenerate text message suggestions."
             user_msg = UserMessage(text=prompt)
-            response = await chat.send_message(user_msg)
+            response = await _send_llm(chat, user_msg, "gpt-4o-mini", "text_suggestions")
             
             # Parse JSON response
             try:
@@ -1017,6 +1516,7 @@ No other text or explanation."""
                 
         except Exception as e:
             logger.error(f"Error generating text suggestions: {e}", exc_info=True)
+            metrics.AI_FALLBACKS.inc("text_suggestions")
             return [
                 "I need some time to think about this. Can we talk later?",
                 "I appreciate you sharing that with me. I'd like to respond thoughtfully.",
@@ -1029,7 +1529,8 @@ No other text or explanation."""
         conversation_count: int = 0,
         mood_entries_count: int = 0,
         recent_conversations: List[str] = [],
-        recent_moods: List[str] = []
+        recent_moods: List[str] = [],
+        progress: Optional[Dict] = None
     ) -> Dict:
         """
         Generate personalized insights report for a user
@@ -1040,9 +1541,11 @@ No other text or explanation."""
             mood_entries_count: Number of mood entries analyzed
             recent_conversations: Sample of recent conversation topics
             recent_moods: Sample of recent mood entries
+            progress: Computed scores from progress_scoring.compute_healing_progress -
+                healingProgressScore and attachmentStyle come from here, never the LLM
         
         Returns:
-            Comprehensive insights report
+            Comprehensive insights report (with isFallback set if the LLM call failed)
         """
         try:
             system_message = """You are an expert relationship psychologist creating personalized insights reports.
@@ -1052,7 +1555,6 @@ Based on the user's activity, create a comprehensive analysis in this EXACT JSON
   "emotionalPatterns": ["pattern 1", "pattern 2", "pattern 3"],
   "communicationStyle": "Description of their communication style",
   "relationshipGoals": ["goal 1", "goal 2", "goal 3"],
-  "healingProgressScore": 75,
   "keyInsights": {
     "strengths": ["strength 1", "strength 2", "strength 3"],
     "areasForGrowth": ["area 1", "area 2", "area 3"],
@@ -1085,7 +1587,7 @@ Based on the user's activity, create a comprehensive analysis in this EXACT JSON
 
 Make insights specific, actionable, and supportive. Return ONLY valid JSON."""
             
-            chat = LlmChat(
+            chat = providers.provider.chat(
                 api_key=self.api_key,
                 session_id=f"insights-{user_id}-{datetime.now().timestamp()}",
                 system_message=system_message
@@ -1101,7 +1603,7 @@ Activity Summary:
 Recent conversation topics: {', '.join(recent_conversations) if recent_conversations else 'Getting started with healing journey'}
 
 Recent mood patterns: {', '.join(recent_moods) if recent_moods else 'Building emotional awareness'}
-
+{self._format_progress_context(progress)}
 Create a comprehensive, personalized insights report that:
 1. Identifies emotional patterns and growth
 2. Assesses communication style
@@ -1111,16 +1613,15 @@ Create a comprehensive, personalized insights report that:
             
             user_msg = UserMessage(text=context)
             
-            # 15 second timeout
             import asyncio
             try:
                 response = await asyncio.wait_for(
-                    chat.send_message(user_msg),
-                    timeout=15.0
+                    _send_llm(chat, user_msg, "gpt-4o-mini", "insights"),
+                    timeout=INSIGHTS_TIMEOUT_SECONDS
                 )
             except asyncio.TimeoutError:
                 logger.warning("Insights generation timed out")
-                return self._get_fallback_insights()
+                return self._apply_progress(self._get_fallback_insights(), progress)
             
             # Parse JSON response
             try:
@@ -1139,28 +1640,56 @@ Create a comprehensive, personalized insights report that:
                 insights['conversationCount'] = conversation_count
                 insights['moodEntriesAnalyzed'] = mood_entries_count
                 
-                # Determine attachment style based on conversation count and emotional patterns
-                # This is a simple heuristic - in a real app, you'd use quiz results
-                if conversation_count >= 10:
-                    insights['attachmentStyle'] = 'secure'
-                elif conversation_count >= 5:
-                    insights['attachmentStyle'] = 'anxious-preoccupied'
-                else:
-                    insights['attachmentStyle'] = 'exploring'
-                
                 logger.info("Successfully generated personalized insights")
-                return insights
+                return self._apply_progress(insights, progress)
             except json.JSONDecodeError as e:
                 logger.error(f"Failed to parse insights JSON: {e}")
-                return self._get_fallback_insights()
+                return self._apply_progress(self._get_fallback_insights(), progress)
                 
         except Exception as e:
             logger.error(f"Error generating insights: {e}", exc_info=True)
-            return self._get_fallback_insights()
+            return self._apply_progress(self._get_fallback_insights(), progress)
+    
+    def _format_progress_context(self, progress: Optional[Dict]) -> str:
+        """Computed progress facts for the prompt, so the narrative matches the numbers shown"""
+        if not progress:
+            return ""
+        month = (progress.get('windows') or {}).get('30') or {}
+        trend = progress.get('ratingTrend')
+        lines = [
+            "",
+            "Measured progress (already computed - describe it, don't score it):",
+            f"- Healing progress score: {progress['healingProgressScore']}/100",
+            f"- Attachment style from quiz results: {progress['attachmentStyle']}",
+            f"- Active on {month.get('active_days', 0)} of the last 30 days",
+        ]
+        if month.get('average_rating') is not None:
+            lines.append(f"- Average reflection rating: {month['average_rating']}/5")
+        if trend is not None:
+            lines.append(f"- Reflection ratings are {'improving' if trend > 0 else 'dipping' if trend < 0 else 'steady'}")
+        return "\n".join(lines) + "\n"
+    
+    def _apply_progress(self, insights: Dict, progress: Optional[Dict]) -> Dict:
+        """Set the scored fields from the deterministic values (neutral scores when there's no data)"""
+        progress = progress or progress_scoring.compute_healing_progress({})
+        insights['healingProgressScore'] = progress['healingProgressScore']
+        insights['attachmentStyle'] = progress['attachmentStyle']
+        insights['progressMetrics'] = {
+            "components": progress.get('components'),
+            "windows": progress.get('windows'),
+            "ratingTrend": progress.get('ratingTrend'),
+        }
+        return insights
     
     def _get_fallback_insights(self) -> Dict:
-        """Fallback insights if AI generation fails"""
+        """
+        Fallback insights if AI generation fails
+        
+        Marked isFallback, so canned text is never stored as a precomputed report
+        """
+        metrics.AI_FALLBACKS.inc("insights")
         return {
+            "isFallback": True,
             "emotionalPatterns": [
                 "You're building awareness of your emotional responses",
                 "You're learning to recognize patterns in relationships",
@@ -1227,7 +1756,11 @@ Create a comprehensive, personalized insights report that:
     async def generate_heart_vision(
         self,
         prompt: str,
-        user_name: Optional[str] = None
+        user_name: Optional[str] = None,
+        include_base64: bool = False,
+        user_id: Optional[str] = None,
+        reuse: bool = True,
+        variation: Optional[int] = None
     ) -> Dict:
         """
         Generate a professional, photorealistic image for HeartVisions
@@ -1235,9 +1768,13 @@ Create a comprehensive, personalized insights report that:
         Args:
             prompt: User's description of what they want to visualize
             user_name: Optional user's first name for personalization
+            include_base64: Also inline the PNG as base64 (for older clients)
+            user_id: Scopes variation to the user
+            reuse: Allow returning a cached image for the same prompt
+            variation: Opt-in seed for a fresh image, itself cached per user
         
         Returns:
-            Dict with image_base64 and caption
+            Dict with image_key, image_url, caption, cached (and image_base64 if requested)
         """
         try:
             # Enhance the prompt for photorealistic, professional results
@@ -1254,33 +1791,45 @@ Style requirements:
 
 Think: high-end lifestyle photography, not artistic painting."""
             
-            logger.info("Generating HeartVision with enhanced prompt")
-            
-            # Initialize image generator
-            image_gen = OpenAIImageGeneration(api_key=self.api_key)
-            
-            # Generate image using dall-e-3 with HD quality for premium results
-            import asyncio
-            try:
-                images = await asyncio.wait_for(
-                    image_gen.generate_images(
-                        prompt=enhanced_prompt,
-                        model="dall-e-3",
-                        number_of_images=1
-                        # Note: size and quality parameters not supported by emergentintegrations library
-                        # The library will use DALL-E 3 defaults: 1024x1024 size and standard quality
-                    ),
-                    timeout=45.0  # 45 second timeout for HD generation
-                )
-            except asyncio.TimeoutError:
-                logger.error("Image generation timed out after 30 seconds")
-                raise Exception("Image generation took too long. Please try again.")
-            
-            if not images or len(images) == 0:
-                raise Exception("No image was generated")
+            async def generate():
+                logger.info("Generating HeartVision with enhanced prompt")
+                
+                # Initialize image generator
+                image_gen = providers.provider.image_generator(api_key=self.api_key)
+                
+                # Generate image using dall-e-3 with HD quality for premium results
+                import asyncio
+                try:
+                    images = await asyncio.wait_for(
+                        metrics.observe_call(
+                            image_gen.generate_images(
+                                prompt=enhanced_prompt,
+                                model="dall-e-3",
+                                number_of_images=1
+                                # Note: size and quality parameters not supported by emergentintegrations library
+                                # The library will use DALL-E 3 defaults: 1024x1024 size and standard quality
+                            ),
+                            metrics.IMAGE_GENERATION_SECONDS, metrics.IMAGE_GENERATIONS, "dall-e-3"
+                        ),
+                        timeout=45.0  # 45 second timeout for HD generation
+                    )
+                except asyncio.TimeoutError:
+                    logger.error("Image generation timed out after 45 seconds")
+                    raise Exception("Image generation took too long. Please try again.")
+                
+                if not images or len(images) == 0:
+                    raise Exception("No image was generated")
+                
+                # Store once, serve by URL from /api/media/{key}
+                return media_store.put(images[0], "image/png"), len(images[0])
             
-            # Convert to base64
-            image_base64 = base64.b64encode(images[0]).decode('utf-8')
+            if reuse:
+                key = heart_vision_cache_key(enhanced_prompt, user_id=user_id, variation=variation)
+                image_key, cached = await heart_vision_cache.get_or_generate(key, generate)
+                if cached:
+                    logger.info("HeartVision cache hit for %s", image_key)
+            else:
+                (image_key, _), cached = await generate(), False
             
             # Generate a supportive caption
             caption_prompts = [
@@ -1296,14 +1845,297 @@ Think: high-end lifestyle photography, not artistic painting."""
             
             logger.info("Successfully generated HeartVision image")
             
-            return {
-                "image_base64": image_base64,
-                "caption": caption
+            result = {
+                "image_key": image_key,
+                "image_url": media_store.url_for(image_key),
+                "caption": caption,
+                "cached": cached
             }
+            if include_base64:
+                result["image_base64"] = base64.b64encode(media_store.get_path(image_key).read_bytes()).decode('utf-8')
+            return result
+            
+        except Exception as e:
+            logger.error("Error generating heart vision: %s", e, exc_info=True)
+            raise
+    
+    def _tts_request(self, text: str, voice: str, model: str, fmt: str) -> Tuple[Dict, Dict]:
+        """Headers and payload for an OpenAI speech request"""
+        # Use user's OpenAI API key for TTS
+        openai_key = providers.provider.speech_api_key()
+        if not openai_key:
+            logger.error("OPENAI_API_KEY not found for TTS")
+            raise Exception("OpenAI API key not configured for text-to-speech")
+        
+        headers = {
+            "Authorization": f"Bearer {openai_key}",
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "model": model,
+            "input": text,
+            "voice": voice,
+            "response_format": fmt
+        }
+        return headers, payload
+    
+    def _get_tts_client(self):
+        """
+        One pooled HTTP client for all speech requests
+        
+        Chunked renders make several requests per script; a client each would mean a
+        new TLS setup (and SSL context build) per sentence
+        """
+        if self._tts_client is None:
+            import httpx
+            self._tts_client = httpx.AsyncClient(
+                timeout=TTS_TIMEOUT_SECONDS, transport=providers.provider.speech_transport()
+            )
+        return self._tts_client
+    
+    async def close(self):
+        """Release pooled connections (app shutdown)"""
+        if self._tts_client is not None:
+            await self._tts_client.aclose()
+            self._tts_client = None
+    
+    async def _synthesize_speech(self, text: str, voice: str, model: str, fmt: str) -> bytes:
+        """Render speech with OpenAI's audio API (one upstream call)"""
+        logger.info("Generating TTS with voice: %s", voice)
+        headers, payload = self._tts_request(text, voice, model, fmt)
+        
+        async def request() -> bytes:
+            # Use OpenAI API directly, with timeout
+            response = await self._get_tts_client().post(OPENAI_TTS_URL, headers=headers, json=payload)
             
+            if response.status_code != 200:
+                logger.error("OpenAI TTS error: %s - %s", response.status_code, response.text)
+                raise Exception(f"TTS generation failed: {response.status_code}")
+            return response.content
+        
+        audio_bytes = await metrics.observe_call(
+            request(), metrics.TTS_REQUEST_SECONDS, metrics.TTS_REQUESTS, model, "full"
+        )
+        
+        logger.info("Successfully generated TTS audio (%s bytes)", len(audio_bytes))
+        return audio_bytes
+    
+    def _speech_chunks(self, text: str, fmt: str) -> Optional[List[str]]:
+        """Sentence chunks to render separately, or None to render the text in one request"""
+        if not TTS_CHUNKING or not tts_chunking.should_chunk(text, fmt):
+            return None
+        chunks = tts_chunking.split_script(text)
+        return chunks if len(chunks) > 1 else None
+    
+    def _render_speech_chunks(
+        self,
+        chunks: List[str],
+        voice: str,
+        model: str,
+        fmt: str,
+        offset: int = 0
+    ) -> List[asyncio.Task]:
+        """
+        Start rendering chunks concurrently (at most TTS_CHUNK_CONCURRENCY at a time)
+        
+        Each chunk goes through the TTS cache, so only chunks whose text changed
+        since the last render call OpenAI. Tasks resolve to the chunk's audio bytes.
+        
+        Args:
+            offset: Position of chunks[0] in the script (only the script's first chunk keeps its ID3 tag)
+        """
+        semaphore = asyncio.Semaphore(TTS_CHUNK_CONCURRENCY)
+        
+        async def render(index: int, chunk: str) -> bytes:
+            async with semaphore:
+                path, _ = await tts_cache.get_or_synthesize(
+                    tts_cache.cache_key(chunk, voice, model, fmt),
+                    lambda: self._synthesize_speech(chunk, voice, model, fmt)
+                )
+            data = path.read_bytes()
+            return tts_chunking.strip_id3(data) if index else data
+        
+        return [asyncio.ensure_future(render(index, chunk)) for index, chunk in enumerate(chunks, start=offset)]
+    
+    async def _synthesize_chunked(self, chunks: List[str], voice: str, model: str, fmt: str) -> bytes:
+        started = time.perf_counter()
+        tasks = self._render_speech_chunks(chunks, voice, model, fmt)
+        try:
+            audio = b"".join(await asyncio.gather(*tasks))
+        finally:
+            for task in tasks:
+                task.cancel()
+        logger.info("Rendered TTS in %s chunks (%s bytes) in %.2fs", len(chunks), len(audio), time.perf_counter() - started)
+        return audio
+    
+    async def stream_speech(
+        self,
+        text: str,
+        voice: str = "shimmer",
+        model: str = tts_cache.DEFAULT_MODEL,
+        fmt: str = tts_cache.DEFAULT_FORMAT
+    ) -> Tuple[AsyncIterator[bytes], bool]:
+        """
+        Speech audio as a byte stream, so playback can start before synthesis finishes
+        
+        Cached audio is read from disk. Long scripts are rendered sentence by sentence
+        in parallel and streamed in order as each sentence is ready; shorter ones pass
+        OpenAI's chunked response through as it arrives. Either way the result is
+        stored in the TTS cache once it completes, and the first upstream response is
+        awaited before returning, so errors surface before any bytes are sent.
+        
+        Returns:
+            (audio chunks, cache_hit)
+        
+        Raises:
+            ValueError for an unsupported voice, model or format
+        """
+        key = tts_cache.cache_key(text, voice, model, fmt)
+        path = tts_cache.lookup(key)
+        if path:
+            logger.info("TTS cache hit for %s", key)
+            return tts_cache.iter_file(path), True
+        
+        sentences = self._speech_chunks(text, fmt)
+        if sentences:
+            return await self._stream_chunked(key, sentences, voice, model, fmt), False
+        
+        return await self._stream_upstream(key, text, voice, model, fmt), False
+    
+    async def _stream_upstream(self, key: str, text: str, voice: str, model: str, fmt: str) -> AsyncIterator[bytes]:
+        """Pass OpenAI's chunked response through as it arrives, caching it under key once complete"""
+        logger.info("Streaming TTS with voice: %s", voice)
+        headers, payload = self._tts_request(text, voice, model, fmt)
+        
+        started = time.perf_counter()
+        client = self._get_tts_client()
+        try:
+            response = await client.send(
+                client.build_request("POST", OPENAI_TTS_URL, headers=headers, json=payload),
+                stream=True
+            )
+        except Exception:
+            metrics.TTS_REQUESTS.inc(model, "stream", "error")
+            raise
+        
+        if response.status_code != 200:
+            detail = (await response.aread()).decode(errors="replace")
+            await response.aclose()
+            metrics.TTS_REQUESTS.inc(model, "stream", "error")
+            logger.error("OpenAI TTS error: %s - %s", response.status_code, detail)
+            raise Exception(f"TTS generation failed: {response.status_code}")
+        
+        async def chunks() -> AsyncIterator[bytes]:
+            audio = bytearray()
+            completed = False
+            try:
+                async for chunk in response.aiter_bytes():
+                    if not audio:
+                        ttfb = time.perf_counter() - started
+                        tts_cache.record_first_byte(ttfb)
+                        metrics.TTS_FIRST_BYTE_SECONDS.observe(ttfb, model)
+                        logger.info("TTS first audio byte after %.0fms", ttfb * 1000)
+                    audio += chunk
+                    yield chunk
+                completed = True
+            finally:
+                await response.aclose()
+                metrics.TTS_REQUEST_SECONDS.observe(time.perf_counter() - started, model, "stream")
+                metrics.TTS_REQUESTS.inc(model, "stream", "ok" if completed else "aborted")
+                # A client that disconnects mid-stream leaves a truncated clip - don't cache it
+                if completed and audio:
+                    tts_cache.put(key, bytes(audio))
+                    logger.info("Streamed TTS audio (%s bytes) in %.2fs", len(audio), time.perf_counter() - started)
+        
+        return chunks()
+    
+    async def _stream_chunked(self, key: str, sentences: List[str], voice: str, model: str, fmt: str) -> AsyncIterator[bytes]:
+        """
+        Stream a script's chunks in order, caching the stitched audio under the script's key
+        
+        The first sentence streams straight from OpenAI (so the first byte arrives as
+        soon as single-shot streaming would), while the rest render in parallel
+        """
+        logger.info("Streaming TTS with voice: %s in %s chunks", voice, len(sentences))
+        started = time.perf_counter()
+        rest = self._render_speech_chunks(sentences[1:], voice, model, fmt, offset=1)
+        first_key = tts_cache.cache_key(sentences[0], voice, model, fmt)
+        try:
+            path = tts_cache.lookup(first_key)
+            first = tts_cache.iter_file(path) if path else \
+                await self._stream_upstream(first_key, sentences[0], voice, model, fmt)
+        except Exception:
+            for task in rest:
+                task.cancel()
+            raise
+        
+        async def chunks() -> AsyncIterator[bytes]:
+            audio = bytearray()
+            completed = False
+            try:
+                async for data in first:
+                    audio += data
+                    yield data
+                for task in rest:
+                    data = await task
+                    audio += data
+                    yield data
+                completed = True
+            finally:
+                await first.aclose()
+                # Renders already in flight still finish and cache their chunk
+                for task in rest:
+                    task.cancel()
+                if completed:
+                    tts_cache.put(key, bytes(audio))
+                    tts_cache.demote(tts_cache.cache_key(sentence, voice, model, fmt) for sentence in sentences)
+                    logger.info("Streamed TTS audio (%s bytes) in %.2fs", len(audio), time.perf_counter() - started)
+        
+        return chunks()
+    
+    async def get_speech_audio(
+        self,
+        text: str,
+        voice: str = "shimmer",
+        model: str = tts_cache.DEFAULT_MODEL,
+        fmt: str = tts_cache.DEFAULT_FORMAT
+    ) -> Dict:
+        """
+        Speech audio for a text, from the TTS disk cache when it's been rendered before
+        Long scripts are rendered as parallel sentence chunks and stitched in order
+        
+        Args:
+            text: The text to convert to speech
+            voice: Voice to use (shimmer, alloy, echo, fable, onyx, nova)
+            model: tts-1 (faster) or tts-1-hd
+            fmt: Audio format (mp3, opus, aac, flac, wav)
+        
+        Returns:
+            Dict with audio_key, audio_url, cached
+        
+        Raises:
+            ValueError for an unsupported voice, model or format
+        """
+        key = tts_cache.cache_key(text, voice, model, fmt)
+        sentences = self._speech_chunks(text, fmt)
+        
+        def synthesize():
+            if sentences:
+                return self._synthesize_chunked(sentences, voice, model, fmt)
+            return self._synthesize_speech(text, voice, model, fmt)
+        
+        try:
+            _, cached = await tts_cache.get_or_synthesize(key, synthesize)
         except Exception as e:
-            logger.error(f"Error generating heart vision: {e}", exc_info=True)
+            logger.error("Error generating TTS: %s", e, exc_info=True)
             raise
+        
+        if cached:
+            logger.info("TTS cache hit for %s", key)
+        elif sentences:
+            # The stitched file is what gets played - its chunks are first to go when space runs out
+            tts_cache.demote(tts_cache.cache_key(sentence, voice, model, fmt) for sentence in sentences)
+        return {"audio_key": key, "audio_url": tts_cache.url_for(key), "cached": cached}
     
     async def generate_text_to_speech(
         self,
@@ -1321,55 +2153,18 @@ Think: high-end lifestyle photography, not artistic painting."""
         Returns:
             Base64-encoded audio (MP3)
         """
-        try:
-            logger.info(f"Generating TTS with voice: {voice}")
-            
-            # Use user's OpenAI API key for TTS
-            openai_key = os.getenv("OPENAI_API_KEY")
-            if not openai_key:
-                logger.error("OPENAI_API_KEY not found for TTS")
-                raise Exception("OpenAI API key not configured for text-to-speech")
-            
-            # Use OpenAI API directly
-            import httpx
-            
-            url = "https://api.openai.com/v1/audio/speech"
-            headers = {
-                "Authorization": f"Bearer {openai_key}",
-                "Content-Type": "application/json"
-            }
-            
-            payload = {
-                "model": "tts-1",  # Standard quality, faster
-                "input": text,
-                "voice": voice,
-                "response_format": "mp3"
-            }
-            
-            # Generate audio with timeout
-            import asyncio
-            async with httpx.AsyncClient(timeout=20.0) as client:
-                response = await client.post(url, headers=headers, json=payload)
-                
-                if response.status_code != 200:
-                    logger.error(f"OpenAI TTS error: {response.status_code} - {response.text}")
-                    raise Exception(f"TTS generation failed: {response.status_code}")
-                
-                audio_bytes = response.content
-            
-            # Convert to base64
-            audio_base64 = base64.b64encode(audio_bytes).decode('utf-8')
-            
-            logger.info(f"Successfully generated TTS audio ({len(audio_bytes)} bytes)")
-            return audio_base64
-            
-        except Exception as e:
-            logger.error(f"Error generating TTS: {e}", exc_info=True)
-            raise
+        audio = await self.get_speech_audio(text, voice)
+        return base64.b64encode(tts_cache.get_path(audio["audio_key"]).read_bytes()).decode('utf-8')
+    
+    def get_tts_cache_stats(self) -> Dict:
+        """Hit/miss counters and size of the TTS audio cache"""
+        return tts_cache.stats()
     
     def _get_fallback_questions(self) -> List[Dict]:
         """Fallback quiz questions if AI generation fails - matches frontend format"""
-        return [
+        metrics.AI_FALLBACKS.inc("quiz_questions")
+        # Options are always ordered secure, anxious, avoidant, fearful-avoidant
+        questions = [
             {
                 "id": 1,
                 "question": "When a friend needs space, I usually...",
@@ -1471,6 +2266,7 @@ Think: high-end lifestyle photography, not artistic painting."""
                 ]
             }
         ]
+        return self._index_option_weights(questions, option_styles=ATTACHMENT_STYLES)
 
 
 # Create singleton instance
@@ -0,0 +1,138 @@
+"""
+Local stand-in for OpenAI's speech and chat completion APIs, for tests and benchmarks
+Streams deterministic fake audio with a configurable delay before the first byte
+and between chunks, roughly as tts-1 does, and answers chat completions after a
+configurable, jittered delay, so streaming, caching and load can be measured
+without an API key or network.
+
+Chat completions are served at /v1/chat/completions and at /llm/chat/completions,
+the path Emergent keys (sk-emergent-...) are sent to under INTEGRATION_PROXY_URL.
+Prompts that ask for JSON get a JSON object back; everything else gets a short reply.
+
+Run from backend/:
+    python benchmarks/fake_openai_server.py --port 8765 --first-byte-ms 400
+then start the API with OPENAI_TTS_URL=http://127.0.0.1:8765/v1/audio/speech
+(and INTEGRATION_PROXY_URL=http://127.0.0.1:8765 for the LLM)
+"""
+import json
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+import threading
+
+import uvicorn
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+CONTENT_TYPES = {"mp3": "audio/mpeg", "opus": "audio/ogg", "aac": "audio/aac", "flac": "audio/flac", "wav": "audio/wav"}
+
+
+def fake_audio(text: str, voice: str, size: int) -> bytes:
+    """Deterministic bytes for a text and voice (same input, same audio - like the real thing)"""
+    seed = hashlib.sha256(f"{voice}|{text}".encode()).digest()
+    return b"ID3" + (seed * (size // len(seed) + 1))[:max(size - 3, 0)]
+
+
+CHAT_REPLY = "That sounds like a lot to carry. What feels most important to you about it right now?"
+# Parses as an insights report (and is harmless JSON anywhere else one is asked for)
+JSON_REPLY = {
+    "emotionalPatterns": ["Reflects before reacting", "Seeks reassurance when anxious"],
+    "communicationStyle": "Thoughtful and open",
+    "relationshipGoals": ["Set clearer boundaries", "Ask for needs directly"],
+    "keyInsights": {"strengths": ["Self-aware"], "areasForGrowth": ["Self-compassion"], "progressSigns": ["Consistent check-ins"]},
+    "personalizedRecommendations": [{"category": "Self-Care", "recommendation": "Take a daily walk", "why": "It steadies mood"}],
+    "moodTrends": {"pattern": "Steadier week on week", "triggers": ["Late replies"], "improvements": ["Calmer evenings"]},
+    "nextSteps": ["Keep reflecting daily"],
+}
+
+
+def create_app(first_byte_ms: float = 400, chunk_ms: float = 40, bytes_per_char: int = 500,
+               chunk_size: int = 4096, chat_ms: float = 800, chat_jitter_ms: float = 200,
+               seed: int = 0) -> FastAPI:
+    """
+    Args:
+        first_byte_ms: Delay before the first audio byte (synthesis latency)
+        chunk_ms: Delay between subsequent chunks
+        bytes_per_char: Audio size per input character (~500 for 64kbps speech)
+        chat_ms: Mean chat completion latency
+        chat_jitter_ms: Standard deviation of the chat latency (normal, clipped at 0)
+        seed: Seed for the latency jitter, so runs are repeatable
+    """
+    app = FastAPI()
+    app.state.requests = 0
+    app.state.chat_requests = 0
+    jitter = random.Random(seed)
+
+    @app.post("/v1/audio/speech")
+    async def speech(request: Request):
+        if not request.headers.get("authorization", "").startswith("Bearer "):
+            raise HTTPException(status_code=401, detail="Missing API key")
+        payload = await request.json()
+        text = payload.get("input") or ""
+        if not text:
+            raise HTTPException(status_code=400, detail="input is required")
+        fmt = payload.get("response_format", "mp3")
+        app.state.requests += 1
+        audio = fake_audio(text, payload.get("voice", ""), len(text) * bytes_per_char)
+
+        async def chunks():
+            await asyncio.sleep(first_byte_ms / 1000)
+            for start in range(0, len(audio), chunk_size):
+                if start:
+                    await asyncio.sleep(chunk_ms / 1000)
+                yield audio[start:start + chunk_size]
+
+        return StreamingResponse(chunks(), media_type=CONTENT_TYPES.get(fmt, "audio/mpeg"))
+
+    @app.post("/v1/chat/completions")
+    @app.post("/llm/chat/completions")
+    async def chat_completions(request: Request):
+        if not request.headers.get("authorization", "").startswith("Bearer "):
+            raise HTTPException(status_code=401, detail="Missing API key")
+        payload = await request.json()
+        messages = payload.get("messages") or []
+        if not messages:
+            raise HTTPException(status_code=400, detail="messages is required")
+        app.state.chat_requests += 1
+        await asyncio.sleep(max(jitter.gauss(chat_ms, chat_jitter_ms), 0) / 1000)
+
+        prompt = " ".join(str(m.get("content", "")) for m in messages)
+        content = json.dumps(JSON_REPLY) if "JSON" in prompt else CHAT_REPLY
+        return {
+            "id": f"chatcmpl-fake-{app.state.chat_requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": payload.get("model", "gpt-4o-mini"),
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(content) // 4,
+                      "total_tokens": (len(prompt) + len(content)) // 4},
+        }
+
+    return app
+
+
+def serve_in_thread(app: FastAPI, port: int, host: str = "127.0.0.1") -> uvicorn.Server:
+    """Run an app on a background thread; set .should_exit = True to stop it"""
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level="warning"))
+    server.install_signal_handlers = lambda: None
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fake OpenAI speech API")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--first-byte-ms", type=float, default=400)
+    parser.add_argument("--chunk-ms", type=float, default=40)
+    parser.add_argument("--bytes-per-char", type=int, default=500)
+    parser.add_argument("--chat-ms", type=float, default=800)
+    parser.add_argument("--chat-jitter-ms", type=float, default=200)
+    args = parser.parse_args()
+
+    uvicorn.run(create_app(args.first_byte_ms, args.chunk_ms, args.bytes_per_char,
+                           chat_ms=args.chat_ms, chat_jitter_ms=args.chat_jitter_ms),
+                host="127.0.0.1", port=args.port)
@@ -0,0 +1,91 @@
+"""
+Payload size benchmark for the paginated history endpoints
+Compares the JSON bytes a client downloads for reflections and insights reports
+with the old unbounded select('*') against capped pages, field projection and
+the summary report view. Uses synthetic rows shaped like production data.
+
+Run from backend/:
+    python benchmarks/history_payload.py --rows 1000
+"""
+import sys
+import json
+import uuid
+import argparse
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import pagination  # noqa: E402
+from server import MAX_REFLECTIONS_PAGE, MAX_REPORTS_PAGE  # noqa: E402
+
+SENTENCE = "You're learning to notice your patterns and respond with more self-compassion. "
+
+
+def make_reflection(user_id: str, day: datetime) -> dict:
+    return {
+        "id": str(uuid.uuid4()), "user_id": user_id, "reflection_date": day.date().isoformat(),
+        "grateful_for": SENTENCE, "proud_of": SENTENCE, "helpful_moment": SENTENCE,
+        "coaches_chatted_with": ["flirty", "therapist"], "conversation_rating": 4,
+        "helpful_moments": SENTENCE * 2, "areas_for_improvement": SENTENCE,
+        "created_at": day.isoformat() + "+00:00", "updated_at": day.isoformat() + "+00:00",
+    }
+
+
+def make_report(user_id: str, day: datetime) -> dict:
+    insights = {
+        "emotionalPatterns": [SENTENCE] * 3,
+        "communicationStyle": SENTENCE * 2,
+        "relationshipGoals": [SENTENCE] * 3,
+        "keyInsights": {key: [SENTENCE] * 3 for key in ("strengths", "areasForGrowth", "progressSigns")},
+        "personalizedRecommendations": [
+            {"category": c, "recommendation": SENTENCE, "why": SENTENCE}
+            for c in ("Self-Care", "Communication", "Boundaries")
+        ],
+        "moodTrends": {"pattern": SENTENCE, "triggers": [SENTENCE] * 2, "improvements": [SENTENCE] * 2},
+        "nextSteps": [SENTENCE] * 5,
+        "healingProgressScore": 71, "attachmentStyle": "secure",
+    }
+    return {
+        "id": str(uuid.uuid4()), "user_id": user_id, "report_type": "comprehensive", "insights": insights,
+        "conversation_count": 42, "mood_entries_analyzed": 12, "attachment_style": "secure",
+        "healing_progress_score": 71, "period_start": (day - timedelta(days=30)).date().isoformat(),
+        "period_end": day.date().isoformat(), "created_at": day.isoformat() + "+00:00",
+    }
+
+
+def payload_bytes(rows, columns=None) -> int:
+    if columns:
+        rows = [{column: row[column] for column in columns} for row in rows]
+    return len(json.dumps(rows, separators=(',', ':')).encode())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare history endpoint payload sizes")
+    parser.add_argument("--rows", type=int, default=1000, help="Rows a client could ask for with an unbounded limit")
+    args = parser.parse_args()
+
+    user_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    reflections = [make_reflection(user_id, now - timedelta(days=i)) for i in range(args.rows)]
+    reports = [make_report(user_id, now - timedelta(days=i)) for i in range(args.rows)]
+
+    chart_fields = pagination.parse_fields(
+        "reflection_date,conversation_rating", pagination.REFLECTION_FIELDS, required=('reflection_date',)
+    )
+    cases = [
+        ("reflections select('*') unbounded", payload_bytes(reflections)),
+        (f"reflections page (cap {MAX_REFLECTIONS_PAGE})", payload_bytes(reflections[:MAX_REFLECTIONS_PAGE])),
+        ("reflections page, fields=date,rating", payload_bytes(reflections[:MAX_REFLECTIONS_PAGE], chart_fields)),
+        ("reports select('*') unbounded", payload_bytes(reports)),
+        (f"reports page (cap {MAX_REPORTS_PAGE})", payload_bytes(reports[:MAX_REPORTS_PAGE])),
+        ("reports page, view=summary", payload_bytes(reports[:MAX_REPORTS_PAGE], pagination.REPORT_SUMMARY_FIELDS)),
+    ]
+    results = {name: size for name, size in cases}
+    for name, size in cases:
+        print(f"{name:<42} {size / 1024:>10.1f} KiB")
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,311 @@
+"""
+Load test and latency baseline for the HeartLift API
+Runs the real FastAPI app in-process (uvicorn on a background thread) against
+local stand-ins - fake_postgrest.py for Supabase, seeded with a few hundred users'
+reflections, conversations, subscriptions and reports, and the fake AI provider
+(AI_PROVIDER=fake, see providers.py) for the LLM with a configurable, jittered
+latency - then drives each endpoint at increasing concurrency and reports
+throughput and p50/p95/p99 latency, plus the AI fallbacks served along the way.
+
+--provider emergent sends LLM calls through the real emergentintegrations client
+to fake_openai_server.py instead, to include the client's HTTP overhead.
+--timeout-rate, --error-rate and --malformed-rate inject faults into the fake
+provider, to measure the timeout and fallback paths.
+
+Endpoints: chat (/api/ai/chat, first message of the day), usage_check
+(/api/usage/check/{user_id}), reflections_past, reflections_today, reflections_save
+and insights (/api/ai/insights, about half the users have a fresh precomputed report).
+
+The results are written as JSON for regression comparison; pass --baseline to
+compare against an earlier run and exit non-zero when an endpoint's p95 got worse
+by more than --tolerance.
+
+Run from backend/:
+    python benchmarks/load_test.py --concurrency 1,8,32 --requests 200 --output load_test.json
+    python benchmarks/load_test.py --baseline load_test.json --output load_test_new.json
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import random
+import socket
+import asyncio
+import argparse
+import platform
+import tempfile
+from pathlib import Path
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+import httpx  # noqa: E402
+
+import fake_openai_server  # noqa: E402
+import fake_postgrest  # noqa: E402
+
+COACHES = ["therapist", "flirty", "bestie", "tough-love"]
+MESSAGES = [
+    "I keep checking my phone waiting for them to text back",
+    "We argued again last night about spending time with friends",
+    "I felt proud that I said no to something I didn't want to do",
+    "How do I tell my partner I need more space without hurting them?",
+]
+
+# name -> request for the i-th call: (method, path, json body or None)
+Request = Tuple[str, str, Optional[Dict]]
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def user_ids(count: int) -> List[str]:
+    return [str(uuid.uuid5(uuid.NAMESPACE_URL, f"heartlift-load-test-{i}")) for i in range(count)]
+
+
+def seed_tables(users: List[str], seed: int = 0) -> Dict[str, List[Dict]]:
+    """A month of reflections, yesterday's conversation, subscriptions, usage and reports per user"""
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    today = now.date()
+    yesterday = now - timedelta(days=1)
+    tables: Dict[str, List[Dict]] = {name: [] for name in (
+        "daily_reflections", "conversation_history", "subscribers", "daily_usage",
+        "insights_reports", "quiz_results", "usage_tracking", "user_insight_features",
+    )}
+    for index, user_id in enumerate(users):
+        for days_ago in range(30):
+            day = today - timedelta(days=days_ago)
+            tables["daily_reflections"].append({
+                "id": str(uuid.uuid4()), "user_id": user_id, "reflection_date": day.isoformat(),
+                "coaches_chatted_with": rng.sample(COACHES, 2), "conversation_rating": rng.randint(1, 5),
+                "helpful_moments": "Naming what I was feeling", "areas_for_improvement": "Speaking up sooner",
+                "created_at": f"{day.isoformat()}T21:00:00", "updated_at": f"{day.isoformat()}T21:00:00",
+            })
+        for turn in range(6):
+            sender = "user" if turn % 2 == 0 else "coach"
+            text = rng.choice(MESSAGES) if sender == "user" else fake_openai_server.CHAT_REPLY
+            tables["conversation_history"].append({
+                "id": str(uuid.uuid4()), "user_id": user_id, "coach_id": COACHES[0], "sender": sender,
+                "message_content": text,
+                "created_at": (yesterday.replace(hour=20, minute=turn)).isoformat(),
+            })
+        tables["quiz_results"].append({
+            "id": str(uuid.uuid4()), "user_id": user_id, "attachment_style": "anxious",
+            "completed_at": (now - timedelta(days=7)).isoformat(),
+        })
+        if index % 5 == 0:
+            tables["subscribers"].append({"user_id": user_id, "subscribed": True, "status": "active"})
+        if index % 2 == 0:
+            tables["daily_usage"].append({"user_id": user_id, "date": today.isoformat(), "message_count": rng.randint(1, 9)})
+            tables["insights_reports"].append({
+                "id": str(uuid.uuid4()), "user_id": user_id, "report_type": "precomputed",
+                "insights": fake_openai_server.JSON_REPLY, "created_at": (now - timedelta(hours=3)).isoformat(),
+            })
+    return tables
+
+
+def endpoints(users: List[str]) -> Dict[str, Callable[[int], Request]]:
+    today = datetime.utcnow().date().isoformat()
+
+    def user(i: int) -> str:
+        return users[i % len(users)]
+
+    return {
+        "chat": lambda i: ("POST", "/api/ai/chat", {
+            "message": MESSAGES[i % len(MESSAGES)], "coach_id": COACHES[0], "user_id": user(i),
+            "conversation_history": [],
+        }),
+        "usage_check": lambda i: ("GET", f"/api/usage/check/{user(i)}", None),
+        "reflections_past": lambda i: ("GET", f"/api/reflections/past/{user(i)}?limit=30", None),
+        "reflections_today": lambda i: ("GET", f"/api/reflections/today/{user(i)}", None),
+        "reflections_save": lambda i: ("POST", "/api/reflections/save", {
+            "user_id": user(i), "reflection_date": today, "coaches_chatted_with": COACHES[:2],
+            "conversation_rating": 1 + i % 5, "helpful_moments": "Slowing down before replying",
+        }),
+        "insights": lambda i: ("POST", "/api/ai/insights", {"user_id": user(i)}),
+    }
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(p / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+async def run_level(client: httpx.AsyncClient, make_request: Callable[[int], Request],
+                    concurrency: int, total: int) -> Dict:
+    """total requests from concurrency workers; latency in ms for the successful ones"""
+    latencies: List[float] = []
+    errors = 0
+    next_index = 0
+
+    async def worker():
+        nonlocal next_index, errors
+        while next_index < total:
+            index = next_index
+            next_index += 1
+            method, path, body = make_request(index)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            if ok:
+                latencies.append((time.perf_counter() - started) * 1000)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 2),
+        "mean_ms": round(sum(latencies) / len(latencies), 2) if latencies else 0.0,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+    }
+
+
+async def run_suite(base_url: str, requests: Dict[str, Callable[[int], Request]],
+                    levels: List[int], per_level: int) -> Dict:
+    results: Dict[str, Dict[str, Dict]] = {}
+    limits = httpx.Limits(max_connections=max(levels), max_keepalive_connections=max(levels))
+    async with httpx.AsyncClient(base_url=base_url, timeout=60, limits=limits) as client:
+        for name, make_request in requests.items():
+            # Warm up: first-request setup, connection pool, caches
+            await run_level(client, make_request, 2, 4)
+            results[name] = {}
+            for concurrency in levels:
+                total = max(per_level, concurrency * 2)
+                stats = await run_level(client, make_request, concurrency, total)
+                results[name][str(concurrency)] = stats
+                print(f"{name:<18} c={concurrency:<4} {stats['throughput_rps']:>8.1f} req/s  "
+                      f"p50 {stats['p50_ms']:>8.1f}  p95 {stats['p95_ms']:>8.1f}  p99 {stats['p99_ms']:>8.1f} ms  "
+                      f"errors {stats['errors']}")
+    return results
+
+
+def compare(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """Endpoints/levels whose p95 or error count got worse than the baseline allows"""
+    regressions = []
+    for name, levels in results.items():
+        for concurrency, stats in levels.items():
+            before = baseline.get("results", {}).get(name, {}).get(concurrency)
+            if not before:
+                continue
+            if stats["p95_ms"] > before["p95_ms"] * (1 + tolerance):
+                regressions.append(f"{name} c={concurrency}: p95 {before['p95_ms']}ms -> {stats['p95_ms']}ms")
+            if stats["errors"] > before["errors"]:
+                regressions.append(f"{name} c={concurrency}: errors {before['errors']} -> {stats['errors']}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the API in-process against local fakes")
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--concurrency", default="1,8,32", help="Comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=200, help="Requests per endpoint per level")
+    parser.add_argument("--endpoints", default="", help="Comma-separated subset of endpoint names")
+    parser.add_argument("--query-ms", type=float, default=3, help="Fake PostgREST latency per query")
+    parser.add_argument("--llm-ms", type=float, default=800, help="Fake LLM mean latency")
+    parser.add_argument("--llm-jitter-ms", type=float, default=200)
+    parser.add_argument("--provider", choices=("fake", "emergent"), default="fake")
+    parser.add_argument("--timeout-rate", type=float, default=0, help="Share of fake AI calls that hang")
+    parser.add_argument("--error-rate", type=float, default=0, help="Share of fake AI calls that fail")
+    parser.add_argument("--malformed-rate", type=float, default=0, help="Share of fake JSON replies truncated")
+    parser.add_argument("--output", default="load_test.json")
+    parser.add_argument("--baseline", help="Earlier --output to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed p95 increase over the baseline")
+    args = parser.parse_args()
+
+    levels = [int(c) for c in args.concurrency.split(",") if c.strip()]
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    users = user_ids(args.users)
+
+    postgrest_port, openai_port, api_port = free_port(), free_port(), free_port()
+    fake_openai_server.serve_in_thread(fake_postgrest.create_app(args.query_ms, seed_tables(users)), postgrest_port)
+    fake_openai_server.serve_in_thread(fake_openai_server.create_app(
+        chat_ms=args.llm_ms, chat_jitter_ms=args.llm_jitter_ms), openai_port)
+
+    # Point the app at the fakes before it's imported (database.py connects at import)
+    scratch = tempfile.mkdtemp(prefix="heartlift-load-test-")
+    os.environ.update({
+        "SUPABASE_URL": f"http://127.0.0.1:{postgrest_port}",
+        "SUPABASE_SERVICE_KEY": fake_postgrest.FAKE_SERVICE_KEY,
+        "EMERGENT_LLM_KEY": "sk-emergent-load-test",
+        "INTEGRATION_PROXY_URL": f"http://127.0.0.1:{openai_port}",
+        "OPENAI_TTS_URL": f"http://127.0.0.1:{openai_port}/v1/audio/speech",
+        "MEDIA_ROOT": os.path.join(scratch, "media"),
+        "TTS_CACHE_DIR": os.path.join(scratch, "tts_cache"),
+        "HEART_VISION_JOBS_DIR": os.path.join(scratch, "heart_vision_jobs"),
+        "AI_PROVIDER": args.provider,
+        "FAKE_AI_LLM_LATENCY_MS": f"normal:{args.llm_ms}:{args.llm_jitter_ms}",
+        "FAKE_AI_TIMEOUT_RATE": str(args.timeout_rate),
+        "FAKE_AI_ERROR_RATE": str(args.error_rate),
+        "FAKE_AI_MALFORMED_RATE": str(args.malformed_rate),
+        "TRACE_EXPORTER": "none",
+        "LOG_LEVEL": os.environ.get("LOG_LEVEL", "WARNING"),
+    })
+    import server  # noqa: E402
+    import metrics  # noqa: E402
+    api = fake_openai_server.serve_in_thread(server.app, api_port)
+
+    requests = endpoints(users)
+    if args.endpoints:
+        wanted = {name.strip() for name in args.endpoints.split(",")}
+        requests = {name: make for name, make in requests.items() if name in wanted}
+
+    results = asyncio.run(run_suite(f"http://127.0.0.1:{api_port}", requests, levels, args.requests))
+    api.should_exit = True
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "users": args.users,
+            "requests_per_level": args.requests,
+            "query_ms": args.query_ms,
+            "llm_ms": args.llm_ms,
+            "llm_jitter_ms": args.llm_jitter_ms,
+            "provider": args.provider,
+            "timeout_rate": args.timeout_rate,
+            "error_rate": args.error_rate,
+            "malformed_rate": args.malformed_rate,
+        },
+        "results": results,
+        "fallbacks": {kind: metrics.AI_FALLBACKS.value(kind)
+                      for kind in ("coach_chat", "insights", "quiz_analysis", "conversation_analysis",
+                                   "text_suggestions", "quiz_questions")
+                      if metrics.AI_FALLBACKS.value(kind)},
+    }
+    Path(args.output).write_text(json.dumps(report, indent=2))
+    print(f"Wrote {args.output}")
+
+    if baseline:
+        regressions = compare(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline} (p95 tolerance {args.tolerance:.0%})")
+
+
+if __name__ == "__main__":
+    main()
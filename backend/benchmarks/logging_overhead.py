@@ -0,0 +1,110 @@
+"""
+Log overhead benchmark for one /api/ai/chat request
+Replays the log calls a first-of-the-day chat request makes (reflections fetch,
+yesterday fetch, prompt assembly) and measures their cost on the request thread:
+
+- before: f-strings at INFO, text format, written synchronously (the old basicConfig)
+- after: %-style calls with the per-request chatter at DEBUG, JSON format, queued to
+  the listener thread (logging_config defaults with LOG_FORMAT=json)
+- after_debug: the same with LOG_LEVEL=DEBUG, so every record is still emitted
+
+Output goes to a temporary file, not a terminal, so the write cost is realistic.
+Reported as request-thread CPU time (time.thread_time) - in this tight loop the
+listener thread competes for the GIL, which a server waiting on Supabase and the
+LLM mostly doesn't - alongside wall time.
+
+Run from backend/:
+    python benchmarks/logging_overhead.py --requests 20000
+"""
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import logging_config  # noqa: E402
+
+logger = logging.getLogger("server")
+USER_ID = "3f0e6a52-8c1d-4d7e-9a51-2b6c0e8f4d11"
+REFLECTIONS = [{"id": i, "reflection_date": "2026-01-0%d" % i} for i in range(1, 4)]
+KEY_MESSAGES = ["a", "b", "c", "d"]
+
+
+def request_before():
+    logger.info(f"Fetching reflections for user {USER_ID} to personalize chat")
+    logger.info(f"Found {len(REFLECTIONS)} reflections for context")
+    logger.info(f"Fetching yesterday's conversation ({'2026-01-01'}) for context")
+    logger.info(f"Set yesterday's summary with {len(KEY_MESSAGES)} key points")
+    logger.info("Added reflection context for first conversation of the day")
+    logger.info("Added yesterday's conversation summary with greeting variety")
+
+
+def request_after():
+    logger.debug("Fetching reflections for user %s to personalize chat", USER_ID)
+    logger.debug("Found %d reflections for context", len(REFLECTIONS))
+    logger.debug("Fetching yesterday's conversation (%s) for context", "2026-01-01")
+    logger.debug("Set yesterday's summary with %d key points", len(KEY_MESSAGES))
+    logger.debug("Added reflection context for first conversation of the day")
+    logger.debug("Added yesterday's conversation summary with greeting variety")
+
+
+def per_request_us(fn, requests: int):
+    """(request-thread CPU, wall) microseconds per request"""
+    cpu_started, wall_started = time.thread_time(), time.perf_counter()
+    for _ in range(requests):
+        fn()
+    return ((time.thread_time() - cpu_started) / requests * 1e6,
+            (time.perf_counter() - wall_started) / requests * 1e6)
+
+
+def use_basic_config(stream):
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+    root.addHandler(handler)
+    root.setLevel(logging.INFO)
+
+
+def use_logging_config(stream, level: str):
+    logging_config.LOG_FORMAT = "json"
+    logging_config.LOG_LEVEL = level
+    stderr, sys.stderr = sys.stderr, stream
+    try:
+        logging_config.configure_logging()
+    finally:
+        sys.stderr = stderr
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure log overhead per chat request")
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+    n = args.requests
+
+    with tempfile.TemporaryFile("w") as stream:
+        use_basic_config(stream)
+        results = {"before": per_request_us(request_before, n)}
+
+        use_logging_config(stream, "INFO")
+        results["after"] = per_request_us(request_after, n)
+
+        use_logging_config(stream, "DEBUG")
+        results["after_debug"] = per_request_us(request_after, n)
+        logging_config.shutdown_logging()
+
+    print(f"{'':<12} {'cpu_us':>10} {'wall_us':>10}")
+    for name, (cpu, wall) in results.items():
+        print(f"{name:<12} {cpu:>10.2f} {wall:>10.2f}")
+    print(f"records dropped by the queue: {logging_config.dropped_records()}")
+    results = {name: {"cpu_us": round(cpu, 2), "wall_us": round(wall, 2)} for name, (cpu, wall) in results.items()}
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
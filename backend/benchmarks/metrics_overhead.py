@@ -0,0 +1,120 @@
+"""
+Overhead benchmark for the Prometheus instrumentation
+Measures what metrics cost per request and per Supabase query:
+- Counter.inc / Histogram.observe on their own
+- A minimal FastAPI app called in-process over ASGI, with and without MetricsMiddleware
+- A query builder chain with and without the database.py timing proxy (no network)
+
+Run from backend/ (database.py needs the usual Supabase env, but makes no calls here):
+    python benchmarks/metrics_overhead.py --iterations 20000
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI  # noqa: E402
+
+import metrics  # noqa: E402
+from database import _TimedQuery  # noqa: E402
+
+
+class FakeQuery:
+    """Stands in for a postgrest builder: every call returns the builder, execute() returns rows"""
+
+    def select(self, *args, **kwargs):
+        return self
+
+    def eq(self, *args, **kwargs):
+        return self
+
+    def order(self, *args, **kwargs):
+        return self
+
+    def limit(self, *args, **kwargs):
+        return self
+
+    def execute(self):
+        return []
+
+
+def per_call_ns(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e9
+
+
+def make_app() -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/reflections/past/{user_id}")
+    async def reflections(user_id: str):
+        return {"reflections": []}
+
+    return app
+
+
+async def asgi_request_us(app, iterations: int) -> float:
+    """Mean microseconds per request through the ASGI app (no sockets, no HTTP client)"""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    def scope(i: int) -> dict:
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": f"/api/reflections/past/user-{i % 100}", "raw_path": b"",
+            "query_string": b"", "root_path": "", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80),
+        }
+
+    started = time.perf_counter()
+    for i in range(iterations):
+        await app(scope(i), receive, send)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure metrics instrumentation overhead")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    n = args.iterations
+
+    counter = metrics.Counter("bench_total", "bench", ("route", "status"))
+    histogram = metrics.Histogram("bench_seconds", "bench", ("route",))
+    results = {
+        "counter_inc_ns": per_call_ns(lambda: counter.inc("/api/x", "200"), n),
+        "histogram_observe_ns": per_call_ns(lambda: histogram.observe(0.0123, "/api/x"), n),
+    }
+
+    bare = make_app()
+    instrumented = metrics.MetricsMiddleware(make_app())
+    # Warm both up (route compilation, first-request setup) before timing
+    asyncio.run(asgi_request_us(bare, 200))
+    asyncio.run(asgi_request_us(instrumented, 200))
+    results["request_us_bare"] = asyncio.run(asgi_request_us(bare, n))
+    results["request_us_instrumented"] = asyncio.run(asgi_request_us(instrumented, n))
+    results["middleware_overhead_us"] = results["request_us_instrumented"] - results["request_us_bare"]
+
+    raw = FakeQuery()
+    results["query_chain_ns_bare"] = per_call_ns(
+        lambda: raw.select("*").eq("user_id", "u").order("created_at").limit(10).execute(), n)
+    results["query_chain_ns_instrumented"] = per_call_ns(
+        lambda: _TimedQuery(raw, "daily_reflections").select("*").eq("user_id", "u").order("created_at")
+        .limit(10).execute(), n)
+    results["query_overhead_us"] = (results["query_chain_ns_instrumented"] - results["query_chain_ns_bare"]) / 1000
+
+    results = {name: round(value, 2) for name, value in results.items()}
+    for name, value in results.items():
+        print(f"{name:<30} {value:>12.2f}")
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
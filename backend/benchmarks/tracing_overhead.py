@@ -0,0 +1,115 @@
+"""
+Overhead benchmark for request tracing
+Measures what tracing costs at each sampling rate:
+- A child span inside an unsampled trace and inside a sampled one
+- A minimal FastAPI app called in-process over ASGI: no middleware, then
+  TracingMiddleware with TRACE_SAMPLE_RATE 0, 0.01 and 1 (three spans per request)
+
+Sampled spans are exported to a temporary file, so the exporter thread's work counts too.
+
+Run from backend/:
+    python benchmarks/tracing_overhead.py --iterations 20000
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fastapi import FastAPI  # noqa: E402
+
+import tracing  # noqa: E402
+
+
+def per_call_ns(fn, iterations: int) -> float:
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn()
+    return (time.perf_counter() - started) / iterations * 1e9
+
+
+async def asgi_request_us(app, iterations: int) -> float:
+    """Mean microseconds per request through the ASGI app (no sockets, no HTTP client)"""
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    def scope(i: int) -> dict:
+        return {
+            "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "GET",
+            "scheme": "http", "path": f"/api/reflections/past/user-{i % 100}", "raw_path": b"",
+            "query_string": b"", "root_path": "", "headers": [], "client": ("127.0.0.1", 1), "server": ("test", 80),
+        }
+
+    started = time.perf_counter()
+    for i in range(iterations):
+        await app(scope(i), receive, send)
+    return (time.perf_counter() - started) / iterations * 1e6
+
+
+def make_app(traced: bool) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/api/reflections/past/{user_id}")
+    async def reflections(user_id: str):
+        if traced:
+            # Two stages, like a fetch and a usage insert
+            with tracing.span("stage.fetch", table="daily_reflections"):
+                pass
+            with tracing.span("stage.track"):
+                pass
+        return {"reflections": []}
+
+    return app
+
+
+def child_span_ns(sampled: bool, iterations: int) -> float:
+    tracing.TRACE_SAMPLE_RATE = 1.0 if sampled else 0.0
+    with tracing.root_span("bench"):
+        def child():
+            with tracing.span("child", table="t"):
+                pass
+        return per_call_ns(child, iterations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure tracing overhead")
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+    n = args.iterations
+
+    tracing.TRACE_EXPORT_PATH = Path(tempfile.mkdtemp()) / "spans.jsonl"
+
+    results = {
+        "child_span_ns_unsampled": child_span_ns(False, n),
+        "child_span_ns_sampled": child_span_ns(True, n),
+    }
+
+    bare = make_app(traced=False)
+    traced = tracing.TracingMiddleware(make_app(traced=True))
+    asyncio.run(asgi_request_us(bare, 200))
+    asyncio.run(asgi_request_us(traced, 200))
+    results["request_us_bare"] = asyncio.run(asgi_request_us(bare, n))
+    for rate in (0.0, 0.01, 1.0):
+        tracing.TRACE_SAMPLE_RATE = rate
+        results[f"request_us_sampled_{rate:g}"] = asyncio.run(asgi_request_us(traced, n))
+        tracing.flush()
+    for rate in (0.0, 0.01, 1.0):
+        results[f"overhead_us_sampled_{rate:g}"] = results[f"request_us_sampled_{rate:g}"] - results["request_us_bare"]
+
+    results = {name: round(value, 2) for name, value in results.items()}
+    for name, value in results.items():
+        print(f"{name:<30} {value:>12.2f}")
+    stats = tracing.exporter_stats()
+    print(f"spans exported: {stats['exported']}, dropped: {stats['dropped']}")
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+End-to-end latency benchmark for sentence-chunked text-to-speech
+Renders visualization-practice-length scripts single-shot (one tts-1 request for the
+whole script) and chunked (sentences rendered in parallel and stitched), then
+re-renders a script with one edited sentence to show per-chunk cache reuse.
+
+OpenAI is replaced by benchmarks/fake_openai_server.py, whose latency grows with
+input length like tts-1's. Run from backend/:
+    python benchmarks/tts_chunking.py --scripts 3 --concurrency 4
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_openai_server import create_app, serve_in_thread  # noqa: E402
+
+STEPS = [
+    "Find a comfortable position and gently close your eyes",
+    "Take three slow, deep breaths, letting each exhale be a little longer than the inhale",
+    "Imagine a path in front of you leading to a place where you feel completely safe and calm",
+    "Notice the colours around you, the sounds in the distance, and the temperature of the air on your skin",
+    "As you arrive, feel your shoulders soften and your jaw relax, releasing any tension you've been holding",
+    "Know that this place is always here for you, and you can return whenever you need to feel grounded",
+    "Rest here for a few more breaths, letting a sense of peace settle through your whole body",
+    "When you're ready, slowly bring your awareness back to the room and open your eyes",
+]
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def script(number: int) -> str:
+    """A practice with no sentence shared with other numbers (so chunk caching doesn't flatter a case)"""
+    # Joined the way VisualisationPractices.tsx joins a practice's steps
+    return '. '.join(f"{step}, practice {number}" for step in STEPS)
+
+
+async def timed(coroutine) -> float:
+    started = time.perf_counter()
+    await coroutine
+    return time.perf_counter() - started
+
+
+async def first_byte(service, text: str) -> float:
+    started = time.perf_counter()
+    chunks, _ = await service.stream_speech(text)
+    elapsed = None
+    async for _ in chunks:
+        if elapsed is None:
+            elapsed = time.perf_counter() - started
+    return elapsed
+
+
+def ms(samples) -> dict:
+    return {"median_ms": round(statistics.median(samples) * 1000, 1), "max_ms": round(max(samples) * 1000, 1)}
+
+
+async def run(args, ai_service_module, fake_app) -> dict:
+    service = ai_service_module.ai_service
+    results = {}
+
+    ai_service_module.TTS_CHUNKING = False
+    results["single-shot end-to-end"] = ms([await timed(service.get_speech_audio(script(i))) for i in range(args.scripts)])
+    results["single-shot first byte"] = ms([await first_byte(service, script(100 + i)) for i in range(args.scripts)])
+
+    ai_service_module.TTS_CHUNKING = True
+    results["chunked end-to-end"] = ms([await timed(service.get_speech_audio(script(200 + i))) for i in range(args.scripts)])
+    results["chunked first byte"] = ms([await first_byte(service, script(300 + i)) for i in range(args.scripts)])
+
+    # Edit one sentence of an already-rendered script
+    edited = script(200).replace("three slow, deep breaths", "four slow, deep breaths")
+    assert edited != script(200)
+    requests_before = fake_app.state.requests
+    results["chunked re-render after 1-sentence edit"] = ms([await timed(service.get_speech_audio(edited))])
+    results["upstream requests for edit"] = fake_app.state.requests - requests_before
+    results["chunks per script"] = len(ai_service_module.tts_chunking.split_script(script(0)))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare single-shot and sentence-chunked TTS latency")
+    parser.add_argument("--scripts", type=int, default=3, help="Distinct scripts per case")
+    parser.add_argument("--concurrency", type=int, default=4, help="Chunks rendered at once per script")
+    parser.add_argument("--first-byte-ms", type=float, default=400, help="Fake upstream synthesis latency")
+    parser.add_argument("--chunk-ms", type=float, default=40, help="Fake upstream delay per 4 KiB of audio")
+    args = parser.parse_args()
+
+    fake_app = create_app(args.first_byte_ms, args.chunk_ms)
+    fake_port = free_port()
+    fake = serve_in_thread(fake_app, fake_port)
+
+    os.environ["OPENAI_TTS_URL"] = f"http://127.0.0.1:{fake_port}/v1/audio/speech"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ["TTS_CACHE_DIR"] = tempfile.mkdtemp(prefix="tts-bench-")
+    os.environ["TTS_CHUNK_CONCURRENCY"] = str(args.concurrency)
+    import ai_service as ai_service_module  # noqa: E402
+
+    results = asyncio.run(run(args, ai_service_module, fake_app))
+    fake.should_exit = True
+
+    for name, value in results.items():
+        if isinstance(value, dict):
+            print(f"{name:<42} median {value['median_ms']:>8.1f} ms   max {value['max_ms']:>8.1f} ms")
+        else:
+            print(f"{name:<42} {value}")
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Time-to-first-audio-byte benchmark for text-to-speech
+Compares how long a client waits before it has playable audio from the JSON
+endpoint (/api/ai/text-to-speech, whole clip base64-encoded) and the streaming
+endpoint (/api/ai/text-to-speech/stream), for uncached and cached scripts.
+
+OpenAI is replaced by benchmarks/fake_openai_server.py, and the API runs in-process
+with a throwaway TTS cache. Run from backend/:
+    python benchmarks/tts_streaming.py --scripts 5 --first-byte-ms 400
+"""
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fake_openai_server import create_app, serve_in_thread  # noqa: E402
+
+SCRIPT = ("Close your eyes and take a slow breath in. Picture a place where you feel completely safe. "
+          "Notice the colours, the sounds and the warmth around you. ")
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def time_json(client: httpx.Client, text: str) -> float:
+    """Seconds until the whole base64 clip has arrived (nothing plays before that)"""
+    started = time.perf_counter()
+    response = client.post("/api/ai/text-to-speech", json={"text": text})
+    response.raise_for_status()
+    return time.perf_counter() - started
+
+
+def time_stream(client: httpx.Client, text: str) -> tuple:
+    """(seconds to first audio byte, seconds to last byte)"""
+    started = time.perf_counter()
+    first_byte = None
+    with client.stream("POST", "/api/ai/text-to-speech/stream", json={"text": text}) as response:
+        response.raise_for_status()
+        for _ in response.iter_bytes():
+            if first_byte is None:
+                first_byte = time.perf_counter() - started
+    return first_byte, time.perf_counter() - started
+
+
+def summarize(samples) -> dict:
+    return {"median_ms": round(statistics.median(samples) * 1000, 1), "max_ms": round(max(samples) * 1000, 1)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare TTS time-to-first-audio-byte, JSON vs streaming")
+    parser.add_argument("--scripts", type=int, default=5, help="Distinct scripts per endpoint")
+    parser.add_argument("--repeat", type=int, default=3, help="Script length multiplier")
+    parser.add_argument("--first-byte-ms", type=float, default=400, help="Fake upstream synthesis latency")
+    parser.add_argument("--chunk-ms", type=float, default=40, help="Fake upstream delay between chunks")
+    args = parser.parse_args()
+
+    fake_port, api_port = free_port(), free_port()
+    fake = serve_in_thread(create_app(args.first_byte_ms, args.chunk_ms), fake_port)
+
+    # Point the API at the fake before it's imported
+    os.environ["OPENAI_TTS_URL"] = f"http://127.0.0.1:{fake_port}/v1/audio/speech"
+    os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+    os.environ["TTS_CACHE_DIR"] = tempfile.mkdtemp(prefix="tts-bench-")
+    from server import app  # noqa: E402
+    api = serve_in_thread(app, api_port)
+
+    results = {}
+    with httpx.Client(base_url=f"http://127.0.0.1:{api_port}", timeout=120) as client:
+        texts = [f"{i}. {SCRIPT * args.repeat}" for i in range(args.scripts * 2)]
+        json_texts, stream_texts = texts[:args.scripts], texts[args.scripts:]
+
+        results["json uncached (full clip)"] = summarize([time_json(client, text) for text in json_texts])
+        streamed = [time_stream(client, text) for text in stream_texts]
+        results["stream uncached first byte"] = summarize([first for first, _ in streamed])
+        results["stream uncached last byte"] = summarize([last for _, last in streamed])
+        results["json cached (full clip)"] = summarize([time_json(client, text) for text in json_texts])
+        results["stream cached first byte"] = summarize([time_stream(client, text)[0] for text in stream_texts])
+        results["server first byte stats"] = client.get("/api/admin/tts-cache-stats").json()
+
+    api.should_exit = True
+    fake.should_exit = True
+
+    for name, value in results.items():
+        if "median_ms" in value:
+            print(f"{name:<32} median {value['median_ms']:>8.1f} ms   max {value['max_ms']:>8.1f} ms")
+    print(json.dumps(results))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,355 @@
+"""
+Bulk NDJSON import/export for HeartLift user histories
+Moves whole reflection and insights-report histories in one streaming request
+(device migrations, support tooling) instead of one API call per row.
+
+Memory stays constant in the history size:
+- Imports parse the request body line by line and write in chunks of IMPORT_CHUNK_SIZE
+- Exports read EXPORT_PAGE_SIZE rows at a time with keyset pagination and stream them out
+"""
+import io
+import csv
+import json
+import time
+import logging
+from datetime import date, datetime
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi.concurrency import run_in_threadpool
+from pydantic import BaseModel, ValidationError, field_validator
+
+from database import supabase
+import pagination
+
+logger = logging.getLogger(__name__)
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+CSV_MEDIA_TYPE = "text/csv"
+IMPORT_CHUNK_SIZE = 500
+EXPORT_PAGE_SIZE = 500
+# Lines longer than this are rejected rather than buffered
+MAX_LINE_BYTES = 1024 * 1024
+USAGE_EXPORT_FIELDS = (
+    'id', 'type', 'coach_id', 'timestamp', 'message_length', 'response_length', 'success',
+)
+# Identify users (error text can quote their messages) - only exported when asked for
+USAGE_IDENTIFYING_FIELDS = ('user_id', 'session_id', 'error')
+# Per-line errors reported back to the caller (the rest are only counted)
+MAX_REPORTED_ERRORS = 20
+# created_at values per existing-report lookup - keeps the in.(...) filter well under URL limits
+REPORT_LOOKUP_BATCH = 50
+# Report types a user's history can hold ('precomputed' is the pipeline's cache)
+IMPORTABLE_REPORT_TYPES = (
+    'comprehensive', 'conversation_analysis', 'mood_analysis', 'healing_progress', 'attachment_analysis',
+)
+
+
+class ReflectionImportRow(BaseModel):
+    """
+    A daily reflection - only the columns present in the file are written, since
+    deployments differ (grateful_for/proud_of/helpful_moment vs notes)
+    """
+    reflection_date: str
+    coaches_chatted_with: Optional[List[str]] = None
+    conversation_rating: Optional[int] = None
+    helpful_moments: Optional[str] = None
+    areas_for_improvement: Optional[str] = None
+    grateful_for: Optional[str] = None
+    proud_of: Optional[str] = None
+    helpful_moment: Optional[str] = None
+    notes: Optional[str] = None
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+
+    @field_validator('reflection_date')
+    @classmethod
+    def valid_date(cls, value: str) -> str:
+        return date.fromisoformat(value[:10]).isoformat()
+
+
+class ReportImportRow(BaseModel):
+    insights: Dict
+    report_type: str = "comprehensive"
+    conversation_count: Optional[int] = None
+    mood_entries_analyzed: Optional[int] = None
+    attachment_style: Optional[str] = None
+    healing_progress_score: Optional[int] = None
+    period_start: Optional[str] = None
+    period_end: Optional[str] = None
+    created_at: str
+
+    @field_validator('report_type')
+    @classmethod
+    def importable_type(cls, value: str) -> str:
+        if value not in IMPORTABLE_REPORT_TYPES:
+            raise ValueError(f"report_type must be one of {', '.join(IMPORTABLE_REPORT_TYPES)}")
+        return value
+
+
+class ImportResult:
+    """Counts and the first few per-line errors of an import"""
+
+    def __init__(self):
+        self.imported = 0
+        self.skipped = 0
+        self.failed = 0
+        self.errors: List[Dict] = []
+
+    def add_error(self, line: int, error: str, rows: int = 1):
+        self.failed += rows
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line, "error": error})
+
+    def to_dict(self) -> Dict:
+        return {"imported": self.imported, "skipped": self.skipped, "failed": self.failed, "errors": self.errors}
+
+
+async def iter_ndjson(body: AsyncIterator[bytes]) -> AsyncIterator[Tuple[int, Optional[Dict], Optional[str]]]:
+    """
+    Parse an NDJSON byte stream one line at a time
+
+    Yields:
+        (line_number, row, error) - row is None when the line couldn't be parsed
+    """
+    buffer = b""
+    line_number = 0
+
+    def parse(line: bytes):
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            return None, f"Invalid JSON: {e}"
+        if not isinstance(row, dict):
+            return None, "Each line must be a JSON object"
+        return row, None
+
+    async for chunk in body:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            line_number += 1
+            if line.strip():
+                yield (line_number, *parse(line))
+        if len(buffer) > MAX_LINE_BYTES:
+            raise ValueError(f"Line {line_number + 1} is longer than {MAX_LINE_BYTES} bytes")
+
+    if buffer.strip():
+        yield (line_number + 1, *parse(buffer))
+
+
+async def import_rows(
+    body: AsyncIterator[bytes],
+    user_id: str,
+    model,
+    write_chunk: Callable[[List[Dict]], Tuple[int, int]]
+) -> Dict:
+    """
+    Validate NDJSON rows for a user and write them in chunks
+
+    Args:
+        body: Request body stream
+        user_id: Owner of every imported row (any user_id in the file is ignored)
+        model: Row model (ReflectionImportRow / ReportImportRow)
+        write_chunk: Writes a list of rows, returns (written, skipped) - rows only
+            carry the columns their line set, so it must not fill in the rest
+
+    Returns:
+        {imported, skipped, failed, errors} - a chunk that fails to write counts all
+        its rows as failed, and the import carries on with the next chunk
+    """
+    result = ImportResult()
+    chunk: List[Dict] = []
+    chunk_lines: List[int] = []
+
+    async def flush():
+        try:
+            # write_chunk is a blocking Supabase call - keep it off the event loop
+            written, skipped = await run_in_threadpool(write_chunk, list(chunk))
+            result.imported += written
+            result.skipped += skipped
+        except Exception as e:
+            # Earlier chunks are already committed - report them rather than fail the request
+            logger.error("Import chunk (lines %s-%s) failed: %s", chunk_lines[0], chunk_lines[-1], e, exc_info=True)
+            result.add_error(
+                chunk_lines[0], f"Lines {chunk_lines[0]}-{chunk_lines[-1]} were not written: {e}", rows=len(chunk)
+            )
+        chunk.clear()
+        chunk_lines.clear()
+
+    async for line_number, row, error in iter_ndjson(body):
+        if error:
+            result.add_error(line_number, error)
+            continue
+        try:
+            parsed = model(**row)
+        except ValidationError as e:
+            result.add_error(line_number, "; ".join(err['msg'] for err in e.errors()))
+            continue
+        # Columns the line set, plus non-null defaults - never a column the file doesn't use
+        record = {
+            column: value for column, value in parsed.dict().items()
+            if column in parsed.model_fields_set or value is not None
+        }
+        record['user_id'] = user_id
+        chunk.append(record)
+        chunk_lines.append(line_number)
+        if len(chunk) >= IMPORT_CHUNK_SIZE:
+            await flush()
+
+    if chunk:
+        await flush()
+    return result.to_dict()
+
+
+def _by_columns(rows: List[Dict]) -> List[List[Dict]]:
+    """
+    Rows grouped by the columns they set
+
+    A PostgREST bulk write sends every column any row has, nulls included, so a
+    row must only share a request with rows setting the same columns - otherwise
+    a line without notes would wipe the notes already stored for its day
+    """
+    groups: Dict[frozenset, List[Dict]] = {}
+    for row in rows:
+        groups.setdefault(frozenset(row), []).append(row)
+    return list(groups.values())
+
+
+def upsert_reflections(rows: List[Dict]) -> Tuple[int, int]:
+    """
+    Reflections are keyed by day - re-importing a file updates rather than duplicates
+
+    Only the columns in the file are written, so existing values (and created_at,
+    unless the file has it) are kept
+    """
+    now = datetime.utcnow().isoformat()
+    # Lines for the same day apply in order, as they would with one save per line
+    by_day: Dict[str, Dict] = {}
+    for row in rows:
+        by_day.setdefault(row['reflection_date'], {}).update(row)
+    for row in by_day.values():
+        row['updated_at'] = row.get('updated_at') or now
+    for group in _by_columns(list(by_day.values())):
+        supabase.table('daily_reflections') \
+            .upsert(group, on_conflict='user_id,reflection_date') \
+            .execute()
+    return len(by_day), len(rows) - len(by_day)
+
+
+def insert_reports(rows: List[Dict]) -> Tuple[int, int]:
+    """Reports have no natural key, so skip ones already stored with the same created_at"""
+    user_id = rows[0]['user_id']
+    seen = set()
+    for i in range(0, len(rows), REPORT_LOOKUP_BATCH):
+        existing = supabase.table('insights_reports') \
+            .select('created_at') \
+            .eq('user_id', user_id) \
+            .in_('created_at', [row['created_at'] for row in rows[i:i + REPORT_LOOKUP_BATCH]]) \
+            .execute().data or []
+        seen.update(_timestamp_key(row['created_at']) for row in existing)
+
+    new_rows = []
+    for row in rows:
+        key = _timestamp_key(row['created_at'])
+        if key not in seen:
+            seen.add(key)
+            new_rows.append(row)
+    for group in _by_columns(new_rows):
+        supabase.table('insights_reports').insert(group).execute()
+    return len(new_rows), len(rows) - len(new_rows)
+
+
+def _timestamp_key(value: str) -> str:
+    """Compare timestamps written as '...Z', '...+00:00' or without an offset as the same instant"""
+    value = str(value).replace('T', ' ')
+    for suffix in ('Z', '+00:00', '+00'):
+        if value.endswith(suffix):
+            return value[:-len(suffix)]
+    return value
+
+
+def export_rows(
+    table: str,
+    user_id: str,
+    columns: Tuple[str, ...],
+    sort_key: str,
+    unique_sort_key: bool,
+    exclude: Optional[Dict[str, str]] = None
+) -> Iterator[bytes]:
+    """
+    Stream a user's rows as NDJSON, newest first, one page in memory at a time
+
+    A sync generator, so StreamingResponse runs the Supabase reads in its threadpool
+
+    Args:
+        exclude: Column -> value of rows to leave out (e.g. internal report types)
+    """
+    cursor = None
+    exported = 0
+    while True:
+        query = supabase.table(table).select(', '.join(columns)).eq('user_id', user_id)
+        for column, value in (exclude or {}).items():
+            query = query.neq(column, value)
+        query = pagination.apply_cursor(query, cursor, sort_key, unique_sort_key=unique_sort_key)
+        rows, cursor = pagination.fetch_page(query, EXPORT_PAGE_SIZE, sort_key, unique_sort_key=unique_sort_key)
+        for row in rows:
+            yield (json.dumps(row, default=str) + "\n").encode()
+        exported += len(rows)
+        if not cursor:
+            break
+    logger.info("Exported %s %s rows for user %s", exported, table, user_id)
+
+
+def export_usage_rows(
+    start: str,
+    end: str,
+    fmt: str = "ndjson",
+    usage_type: Optional[str] = None,
+    identifying: bool = False
+) -> Iterator[bytes]:
+    """
+    Stream usage_tracking rows with start <= timestamp < end, oldest first, as NDJSON or CSV
+
+    Reads one EXPORT_PAGE_SIZE page at a time, keyed on (timestamp, id), and logs throughput
+
+    Args:
+        identifying: Include USAGE_IDENTIFYING_FIELDS
+    """
+    started = time.perf_counter()
+    cursor = None
+    exported = 0
+    columns = USAGE_EXPORT_FIELDS + (USAGE_IDENTIFYING_FIELDS if identifying else ())
+
+    if fmt == "csv":
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+        writer.writeheader()
+        yield buffer.getvalue().encode()
+
+    while True:
+        query = supabase.table('usage_tracking') \
+            .select(', '.join(columns)) \
+            .gte('timestamp', start) \
+            .lt('timestamp', end)
+        if usage_type:
+            query = query.eq('type', usage_type)
+        query = pagination.apply_cursor(query, cursor, 'timestamp', descending=False)
+        rows, cursor = pagination.fetch_page(query, EXPORT_PAGE_SIZE, 'timestamp', descending=False)
+
+        if fmt == "csv":
+            buffer = io.StringIO()
+            writer = csv.DictWriter(buffer, fieldnames=columns, extrasaction='ignore')
+            writer.writerows(rows)
+            page = buffer.getvalue()
+        else:
+            page = "".join(json.dumps(row, default=str) + "\n" for row in rows)
+        if page:
+            yield page.encode()
+
+        exported += len(rows)
+        if not cursor:
+            break
+
+    elapsed = time.perf_counter() - started
+    rate = exported / elapsed if elapsed > 0 else 0.0
+    logger.info("Exported %s usage_tracking rows as %s in %.2fs (%.0f rows/s)", exported, fmt, elapsed, rate)
@@ -0,0 +1,89 @@
+"""
+Supabase client shared by the HeartLift backend modules
+"""
+import os
+import time
+import logging
+from pathlib import Path
+from dotenv import load_dotenv
+from supabase import create_client, Client
+
+import metrics
+import tracing
+
+ROOT_DIR = Path(__file__).parent
+load_dotenv(ROOT_DIR / '.env')
+
+logger = logging.getLogger(__name__)
+
+# Supabase connection
+SUPABASE_URL = os.environ.get('SUPABASE_URL', '')
+SUPABASE_SERVICE_KEY = os.environ.get('SUPABASE_SERVICE_KEY', '')
+
+if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
+    logger.error("❌ SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in environment")
+    raise RuntimeError("Supabase credentials not configured")
+
+# The builder call that decides what a query does (the first one wins: upsert().select() is an upsert)
+QUERY_OPERATIONS = frozenset(('select', 'insert', 'upsert', 'update', 'delete'))
+
+
+class _TimedQuery:
+    """
+    Query builder proxy that times execute() per table and operation, in metrics
+    and as a supabase.<operation> span
+    
+    Chained builder calls return new proxies, so .table(...).select(...).eq(...).execute()
+    reads exactly as it does on the plain client
+    """
+    __slots__ = ('_query', '_table', '_operation')
+    
+    def __init__(self, query, table: str, operation: str = ''):
+        self._query = query
+        self._table = table
+        self._operation = operation
+    
+    def __getattr__(self, name):
+        attr = getattr(self._query, name)
+        if name == 'execute':
+            return self._execute
+        if not callable(attr):
+            # Builder properties (e.g. .not_) return builders too
+            return _TimedQuery(attr, self._table, self._operation) if hasattr(attr, 'execute') else attr
+        operation = self._operation or (name if name in QUERY_OPERATIONS else '')
+        
+        def chained(*args, **kwargs):
+            return _TimedQuery(attr(*args, **kwargs), self._table, operation)
+        return chained
+    
+    def _execute(self, *args, **kwargs):
+        operation = self._operation or 'unknown'
+        started = time.perf_counter()
+        try:
+            with tracing.span(f"supabase.{operation}", table=self._table):
+                return self._query.execute(*args, **kwargs)
+        except Exception:
+            metrics.DB_QUERY_ERRORS.inc(self._table, operation)
+            raise
+        finally:
+            metrics.DB_QUERY_SECONDS.observe(time.perf_counter() - started, self._table, operation)
+
+
+class InstrumentedClient:
+    """Supabase client whose table() and rpc() queries are timed in metrics"""
+    
+    def __init__(self, client: Client):
+        self._client = client
+    
+    def table(self, name: str) -> _TimedQuery:
+        return _TimedQuery(self._client.table(name), name)
+    
+    def rpc(self, fn: str, params: dict = None, *args, **kwargs) -> _TimedQuery:
+        return _TimedQuery(self._client.rpc(fn, params or {}, *args, **kwargs), f"rpc:{fn}", 'rpc')
+    
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+supabase = InstrumentedClient(create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY))
+logger.info(f"✅ Supabase connected to: {SUPABASE_URL}")
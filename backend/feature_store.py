@@ -0,0 +1,359 @@
+"""
+Incremental per-user insight features for HeartLift
+Keeps one compact row per user in user_insight_features, updated as messages and
+reflections are written, so insights generation never rescans 30 days of history.
+
+Row shape (see USER_INSIGHT_FEATURES.sql):
+    message_count     lifetime count of user messages to coaches
+    topic_counts      {"breakup": 4, "family": 2, ...} (lifetime)
+    mood_counts       {"anxious": 3, "hopeful": 1, ...} (lifetime)
+    activity_by_day   {"2025-01-18": 6, ...} (last 90 days)
+    topics_by_day     {"2025-01-18": {"breakup": 2, ...}, ...} (last 90 days)
+    moods_by_day      {"2025-01-18": {"anxious": 1, ...}, ...} (last 90 days)
+    reflections       {"2025-01-18": {"rating": 8, "themes": {...}, "coaches": [...]}, ...} (last 90 days)
+    ranked_topics     [["miss ex", 1.0], ["work", 0.62], ...] from the nightly TF-IDF pass
+                      (ignored once older than RANKED_TOPICS_MAX_AGE_HOURS)
+    backfilled_at     when the row was rebuilt from history; NULL for rows the
+                      incremental updates created before any backfill ran
+"""
+import os
+import re
+import logging
+from collections import Counter
+from datetime import datetime, timedelta, date, timezone
+from typing import Dict, List, Optional, Set, Tuple
+
+from database import supabase
+import topic_extractor
+
+logger = logging.getLogger(__name__)
+
+# Topic keywords - a message counts once per topic however many keywords match
+TOPIC_KEYWORDS = {
+    "breakup": ["breakup", "break up", "broke up", "ex ", "my ex", "split", "dumped", "heartbreak", "moving on"],
+    "dating": ["date", "dating", "crush", "match", "tinder", "hinge", "bumble", "flirt"],
+    "relationship": ["boyfriend", "girlfriend", "partner", "husband", "wife", "relationship"],
+    "family": ["mum", "mom", "dad", "parent", "sister", "brother", "family", "sibling"],
+    "friendship": ["friend", "friends", "friendship", "bestie", "group chat"],
+    "work_school": ["work", "job", "boss", "school", "college", "uni", "exam", "class"],
+    "self_esteem": ["confidence", "confident", "worth", "insecure", "self-esteem", "ugly", "not enough"],
+    "communication": ["talk", "text", "message", "reply", "ignored", "conversation", "communicate"],
+    "boundaries": ["boundary", "boundaries", "say no", "space", "respect"],
+    "trust": ["trust", "cheat", "cheated", "lie", "lied", "jealous", "betray"],
+    "loneliness": ["lonely", "alone", "isolated", "no one", "nobody"],
+    "attachment": ["attachment", "anxious", "avoidant", "clingy", "abandon"],
+}
+
+MOOD_KEYWORDS = {
+    "anxious": ["anxious", "anxiety", "worried", "worry", "nervous", "panic", "overthink"],
+    "sad": ["sad", "cry", "crying", "down", "depressed", "hurt", "heartbroken", "miss"],
+    "angry": ["angry", "mad", "furious", "annoyed", "frustrated", "resent"],
+    "lonely": ["lonely", "alone", "isolated"],
+    "hopeful": ["hope", "hopeful", "better", "excited", "looking forward", "optimistic"],
+    "calm": ["calm", "peaceful", "relaxed", "okay", "fine", "content"],
+    "grateful": ["grateful", "thankful", "appreciate", "proud"],
+}
+
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Batch topic extraction reads at most this many recent messages per user
+TOPIC_MESSAGES_PER_USER = 50
+TOPIC_USER_CHUNK = 100
+PAGE_SIZE = 1000
+# A missed nightly run is tolerated; older ranked topics fall back to keyword topic counts
+RANKED_TOPICS_MAX_AGE_HOURS = int(os.getenv("RANKED_TOPICS_MAX_AGE_HOURS", "48"))
+# Days of per-day features kept (matches jsonb_trim_days in USER_INSIGHT_FEATURES.sql)
+FEATURE_HISTORY_DAYS = 90
+
+
+def _match_keywords(text: str, keyword_map: Dict[str, List[str]]) -> Dict[str, int]:
+    """Which keys of keyword_map the text mentions (1 per key)"""
+    text = f" {_WHITESPACE_RE.sub(' ', (text or '').lower())} "
+    return {key: 1 for key, keywords in keyword_map.items() if any(k in text for k in keywords)}
+
+
+def extract_topics(text: str) -> Dict[str, int]:
+    return _match_keywords(text, TOPIC_KEYWORDS)
+
+
+def extract_moods(text: str) -> Dict[str, int]:
+    return _match_keywords(text, MOOD_KEYWORDS)
+
+
+def _reflection_features(reflection: Dict) -> Dict:
+    """Compact per-day summary of a daily reflection"""
+    text = " ".join(filter(None, [
+        reflection.get('helpful_moments'),
+        reflection.get('areas_for_improvement'),
+        reflection.get('helpful_moment'),
+        reflection.get('grateful_for'),
+        reflection.get('proud_of'),
+    ]))
+    return {
+        "rating": reflection.get('conversation_rating'),
+        "themes": extract_topics(text),
+        "moods": extract_moods(text),
+        "coaches": reflection.get('coaches_chatted_with') or [],
+    }
+
+
+def record_message(user_id: str, message: str, day: Optional[date] = None):
+    """Add one user message to the user's features (atomic increment in Postgres)"""
+    if not user_id:
+        return
+    try:
+        supabase.rpc('record_message_features', {
+            "p_user_id": user_id,
+            "p_day": (day or datetime.utcnow().date()).isoformat(),
+            "p_topics": extract_topics(message),
+            "p_moods": extract_moods(message),
+        }).execute()
+    except Exception as e:
+        logger.warning("Could not record message features: %s", e)
+
+
+def record_reflection(user_id: str, reflection: Dict):
+    """Store the reflection's features under its date - re-saving the same day overwrites, never double counts"""
+    if not user_id or not reflection.get('reflection_date'):
+        return
+    try:
+        supabase.rpc('record_reflection_features', {
+            "p_user_id": user_id,
+            "p_day": str(reflection['reflection_date'])[:10],
+            "p_reflection": _reflection_features(reflection),
+        }).execute()
+    except Exception as e:
+        logger.warning("Could not record reflection features: %s", e)
+
+
+def get_user_features(user_id: str) -> Optional[Dict]:
+    """
+    The user's feature row, or None if nothing has been recorded yet
+
+    A row without backfilled_at only holds what was recorded incrementally since
+    the feature store was deployed - see needs_backfill
+    """
+    response = supabase.table('user_insight_features') \
+        .select('*') \
+        .eq('user_id', user_id) \
+        .limit(1) \
+        .execute()
+    return response.data[0] if response.data else None
+
+
+def needs_backfill(features: Optional[Dict]) -> bool:
+    """
+    True until a user's row has been rebuilt from history once
+
+    record_message_features / record_reflection_features create the row on a user's
+    first message or reflection, so a row existing doesn't mean it covers the past
+    """
+    return not features or not features.get('backfilled_at')
+
+
+def load_user_features(user_id: str) -> Optional[Dict]:
+    """
+    The user's feature row, backfilled from history first if it has never been
+
+    Blocking (a backfill pages through up to FEATURE_HISTORY_DAYS of history) -
+    async callers run it in a threadpool
+    """
+    features = get_user_features(user_id)
+    if needs_backfill(features):
+        features = backfill_user_features(user_id)
+    return features
+
+
+def backfill_user_features(user_id: str, lookback_days: int = FEATURE_HISTORY_DAYS) -> Dict:
+    """
+    Rebuild a user's feature row from their recent history - for users whose
+    activity predates the feature store, and after imports
+
+    Recomputes every windowed feature from the source tables, so messages and
+    reflections already recorded incrementally aren't counted twice
+    """
+    since = datetime.utcnow() - timedelta(days=lookback_days)
+    topic_counts: Counter = Counter()
+    mood_counts: Counter = Counter()
+    activity_by_day: Counter = Counter()
+    topics_by_day: Dict[str, Counter] = {}
+    moods_by_day: Dict[str, Counter] = {}
+
+    messages = []
+    start = 0
+    while True:
+        rows = supabase.table('conversation_history') \
+            .select('message_content, created_at') \
+            .eq('user_id', user_id) \
+            .eq('sender', 'user') \
+            .gte('created_at', since.isoformat()) \
+            .order('created_at', desc=False) \
+            .range(start, start + PAGE_SIZE - 1) \
+            .execute().data or []
+        messages.extend(rows)
+        if len(rows) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+
+    for msg in messages:
+        day = str(msg.get('created_at', ''))[:10]
+        topics = extract_topics(msg.get('message_content') or '')
+        moods = extract_moods(msg.get('message_content') or '')
+        topic_counts.update(topics)
+        mood_counts.update(moods)
+        topics_by_day.setdefault(day, Counter()).update(topics)
+        moods_by_day.setdefault(day, Counter()).update(moods)
+        activity_by_day[day] += 1
+
+    reflections = supabase.table('daily_reflections') \
+        .select('reflection_date, conversation_rating, coaches_chatted_with, helpful_moments, '
+                'areas_for_improvement, helpful_moment, grateful_for, proud_of') \
+        .eq('user_id', user_id) \
+        .gte('reflection_date', since.date().isoformat()) \
+        .execute().data or []
+
+    row = {
+        "user_id": user_id,
+        "message_count": len(messages),
+        "topic_counts": dict(topic_counts),
+        "mood_counts": dict(mood_counts),
+        "activity_by_day": dict(activity_by_day),
+        "topics_by_day": {day: dict(counts) for day, counts in topics_by_day.items()},
+        "moods_by_day": {day: dict(counts) for day, counts in moods_by_day.items()},
+        "reflections": {str(r['reflection_date'])[:10]: _reflection_features(r) for r in reflections},
+        "updated_at": datetime.utcnow().isoformat(),
+        "backfilled_at": datetime.utcnow().isoformat(),
+    }
+    supabase.table('user_insight_features').upsert(row).execute()
+    logger.info("Backfilled insight features for user %s from %s messages", user_id, len(messages))
+    return row
+
+
+def refresh_ranked_topics(user_ids: List[str], lookback_days: int = 30) -> int:
+    """
+    Recompute ranked_topics for many users with one vectorized TF-IDF pass
+    Meant for the nightly pipeline, not the request path
+
+    Users whose feature row hasn't been backfilled are backfilled first, so writing
+    ranked_topics never creates a zeroed row that would pass for a complete one
+
+    Returns:
+        Number of users whose topics were stored
+    """
+    since = (datetime.utcnow() - timedelta(days=lookback_days)).isoformat()
+    messages_by_user: Dict[str, List[str]] = {user_id: [] for user_id in user_ids}
+
+    for i in range(0, len(user_ids), TOPIC_USER_CHUNK):
+        chunk = user_ids[i:i + TOPIC_USER_CHUNK]
+        start = 0
+        while True:
+            rows = supabase.table('conversation_history') \
+                .select('user_id, message_content') \
+                .in_('user_id', chunk) \
+                .eq('sender', 'user') \
+                .gte('created_at', since) \
+                .order('created_at', desc=True) \
+                .range(start, start + PAGE_SIZE - 1) \
+                .execute().data or []
+            for row in rows:
+                messages = messages_by_user.get(row.get('user_id'))
+                if messages is not None and len(messages) < TOPIC_MESSAGES_PER_USER and row.get('message_content'):
+                    messages.append(row['message_content'])
+            if len(rows) < PAGE_SIZE:
+                break
+            start += PAGE_SIZE
+
+    topics = topic_extractor.extract_topics_batch(messages_by_user)
+    ranked_users = [user_id for user_id, ranked in topics.items() if ranked]
+    backfilled = _backfilled_user_ids(ranked_users)
+    for user_id in ranked_users:
+        if user_id not in backfilled:
+            backfill_user_features(user_id)
+
+    now = datetime.utcnow().isoformat()
+    # Every row exists by now, so these upserts only update ranked_topics
+    rows = [
+        {"user_id": user_id, "ranked_topics": [[topic, score] for topic, score in ranked], "ranked_topics_at": now}
+        for user_id, ranked in topics.items() if ranked
+    ]
+    for i in range(0, len(rows), TOPIC_USER_CHUNK):
+        supabase.table('user_insight_features').upsert(rows[i:i + TOPIC_USER_CHUNK]).execute()
+
+    logger.info("Refreshed ranked topics for %s of %s users", len(rows), len(user_ids))
+    return len(rows)
+
+
+def _backfilled_user_ids(user_ids: List[str]) -> Set[str]:
+    """Which of these users already have a backfilled feature row"""
+    backfilled: Set[str] = set()
+    for i in range(0, len(user_ids), TOPIC_USER_CHUNK):
+        rows = supabase.table('user_insight_features') \
+            .select('user_id, backfilled_at') \
+            .in_('user_id', user_ids[i:i + TOPIC_USER_CHUNK]) \
+            .execute().data or []
+        backfilled.update(row['user_id'] for row in rows if not needs_backfill(row))
+    return backfilled
+
+
+def fresh_ranked_topics(features: Dict) -> List[Tuple[str, float]]:
+    """The row's TF-IDF ranked topics, or [] when missing or older than RANKED_TOPICS_MAX_AGE_HOURS"""
+    ranked_at = features.get('ranked_topics_at')
+    if not features.get('ranked_topics') or not ranked_at:
+        return []
+    try:
+        ranked_at = datetime.fromisoformat(str(ranked_at).replace('Z', '+00:00'))
+    except ValueError:
+        return []
+    if ranked_at.tzinfo:
+        ranked_at = ranked_at.astimezone(timezone.utc).replace(tzinfo=None)
+    if ranked_at < datetime.utcnow() - timedelta(hours=RANKED_TOPICS_MAX_AGE_HOURS):
+        return []
+    return [tuple(topic) for topic in features['ranked_topics']]
+
+
+def summarize_features(features: Dict, lookback_days: int = 30) -> Dict:
+    """
+    Aggregate a feature row into what the insights prompt needs
+
+    Returns:
+        {conversation_count, mood_entries_count, topics, topics_ranked, moods,
+         reflection_themes, average_rating, active_days} - all over the last lookback_days
+        topics are the TF-IDF ranked topics when fresh (topics_ranked), else keyword topic counts
+    """
+    cutoff = (datetime.utcnow().date() - timedelta(days=lookback_days)).isoformat()
+
+    def in_window(by_day: Optional[Dict]) -> Dict:
+        return {day: value for day, value in (by_day or {}).items() if day >= cutoff}
+
+    activity = in_window(features.get('activity_by_day'))
+    reflections = in_window(features.get('reflections'))
+
+    topic_counts: Counter = Counter()
+    for counts in in_window(features.get('topics_by_day')).values():
+        topic_counts.update(counts)
+    message_moods: Counter = Counter()
+    for counts in in_window(features.get('moods_by_day')).values():
+        message_moods.update(counts)
+
+    themes: Counter = Counter()
+    reflection_moods: Counter = Counter()
+    ratings = []
+    for reflection in reflections.values():
+        themes.update(reflection.get('themes') or {})
+        reflection_moods.update(reflection.get('moods') or {})
+        if reflection.get('rating') is not None:
+            ratings.append(reflection['rating'])
+
+    moods = message_moods + reflection_moods
+    ranked = fresh_ranked_topics(features)[:8]
+
+    return {
+        "conversation_count": sum(activity.values()),
+        "mood_entries_count": len(reflections),
+        "topics": ranked or topic_counts.most_common(5),
+        "topics_ranked": bool(ranked),
+        "moods": moods.most_common(5),
+        "reflection_themes": themes.most_common(5),
+        "average_rating": round(sum(ratings) / len(ratings), 1) if ratings else None,
+        "active_days": len(activity),
+    }
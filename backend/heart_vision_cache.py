@@ -0,0 +1,175 @@
+"""
+Prompt-keyed cache of generated HeartVision images
+Users often regenerate the same intention ("feeling calm after a breakup"); a repeat
+of a normalized enhanced prompt reuses the stored image instead of paying for
+another DALL-E generation.
+
+- Key: SHA-256 of the normalized enhanced prompt, plus an optional per-user variation
+  seed so a user can opt into a fresh take that is then cached for them
+- Bounded: entries are evicted least-recently-used once their images exceed MAX_BYTES
+- Concurrent misses for the same key share one generation
+- Index persisted as JSON next to the media, so the cache survives restarts
+"""
+import os
+import re
+import json
+import time
+import asyncio
+import hashlib
+import logging
+import tempfile
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+import media_store
+
+logger = logging.getLogger(__name__)
+
+INDEX_PATH = Path(os.getenv("HEART_VISION_CACHE_INDEX", str(media_store.MEDIA_ROOT / "heart_vision_cache.json")))
+MAX_BYTES = int(os.getenv("HEART_VISION_CACHE_MAX_MB", "512")) * 1024 * 1024
+# Saved galleries link to /api/media URLs, so evicted images are only deleted when this is on
+DELETE_EVICTED_MEDIA = os.getenv("HEART_VISION_CACHE_DELETE_MEDIA", "false").lower() == "true"
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_PUNCTUATION_RE = re.compile(r"[^\w\s]")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case, punctuation and spacing don't change what gets drawn"""
+    return _WHITESPACE_RE.sub(" ", _PUNCTUATION_RE.sub(" ", (prompt or "").lower())).strip()
+
+
+def cache_key(enhanced_prompt: str, user_id: Optional[str] = None, variation: Optional[int] = None) -> str:
+    parts = [normalize_prompt(enhanced_prompt)]
+    if variation is not None:
+        parts += [user_id or "", str(variation)]
+    return hashlib.sha256("|".join(parts).encode()).hexdigest()
+
+
+class HeartVisionCache:
+    """LRU index of cache key -> stored image, bounded by total image bytes"""
+
+    def __init__(self, index_path: Path = INDEX_PATH, max_bytes: int = MAX_BYTES):
+        self.index_path = index_path
+        self.max_bytes = max_bytes
+        self.entries: "OrderedDict[str, Dict]" = OrderedDict()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.saved_seconds = 0.0
+        self._in_flight: Dict[str, asyncio.Future] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            entries = json.loads(self.index_path.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logger.warning("Ignoring unreadable HeartVision cache index: %s", e)
+            return
+        # Stored least recently used first; drop entries whose image has gone
+        for key, entry in entries:
+            if media_store.get_path(entry["image_key"]):
+                self.entries[key] = entry
+                self.total_bytes += entry["bytes"]
+
+    def _save(self):
+        self.index_path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.index_path.parent, prefix=".tmp-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(list(self.entries.items()), f)
+        os.replace(tmp, self.index_path)
+
+    def get(self, key: str) -> Optional[Dict]:
+        entry = self.entries.get(key)
+        if entry and not media_store.get_path(entry["image_key"]):
+            self._remove(key)
+            entry = None
+        if not entry:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        entry["last_used_at"] = datetime.utcnow().isoformat()
+        entry["hits"] = entry.get("hits", 0) + 1
+        self.hits += 1
+        self.saved_seconds += entry["generation_seconds"]
+        self._save()
+        return entry
+
+    def put(self, key: str, image_key: str, size: int, generation_seconds: float):
+        if key in self.entries:
+            self._remove(key)
+        now = datetime.utcnow().isoformat()
+        self.entries[key] = {
+            "image_key": image_key,
+            "bytes": size,
+            "generation_seconds": round(generation_seconds, 2),
+            "created_at": now,
+            "last_used_at": now,
+            "hits": 0,
+        }
+        self.total_bytes += size
+        while self.total_bytes > self.max_bytes and len(self.entries) > 1:
+            oldest = next(iter(self.entries))
+            self._remove(oldest, delete_media=DELETE_EVICTED_MEDIA)
+            self.evictions += 1
+        self._save()
+
+    def _remove(self, key: str, delete_media: bool = False):
+        entry = self.entries.pop(key)
+        self.total_bytes -= entry["bytes"]
+        # Identical images can sit under several keys - only delete unreferenced files
+        if delete_media and not any(e["image_key"] == entry["image_key"] for e in self.entries.values()):
+            media_store.delete(entry["image_key"])
+
+    async def get_or_generate(
+        self,
+        key: str,
+        generate: Callable[[], Awaitable[Tuple[str, int]]]
+    ) -> Tuple[str, bool]:
+        """
+        Cached image key, or generate and cache one
+
+        Args:
+            generate: Coroutine factory returning (image_key, size_in_bytes)
+
+        Returns:
+            (image_key, cache_hit)
+        """
+        entry = self.get(key)
+        if entry:
+            return entry["image_key"], True
+
+        future = self._in_flight.get(key)
+        if future is None:
+            async def run():
+                started = time.perf_counter()
+                image_key, size = await generate()
+                self.put(key, image_key, size, time.perf_counter() - started)
+                return image_key
+
+            future = asyncio.ensure_future(run())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(future), False
+
+    def stats(self) -> Dict:
+        lookups = self.hits + self.misses
+        return {
+            "name": "heart_vision",
+            "entries": len(self.entries),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(self.hits / lookups * 100, 2) if lookups else 0.0,
+            "saved_generation_seconds": round(self.saved_seconds, 1),
+        }
+
+
+heart_vision_cache = HeartVisionCache()
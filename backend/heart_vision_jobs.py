@@ -0,0 +1,286 @@
+"""
+Background job queue for HeartVision image generation
+POST returns a job id straight away; a fixed pool of workers renders images with
+bounded concurrency, and clients poll the job or subscribe to its SSE stream
+instead of holding a request open for up to 45 seconds.
+
+Job state is written to one JSON file per job under JOBS_DIR, so a restart
+re-queues anything that was queued or mid-render instead of losing it.
+"""
+import os
+import json
+import time
+import uuid
+import asyncio
+import logging
+import tempfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional
+
+from ai_service import ai_service
+import image_derivatives
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+JOBS_DIR = Path(os.getenv("HEART_VISION_JOBS_DIR", str(ROOT_DIR / "data" / "heart_vision_jobs")))
+WORKERS = int(os.getenv("HEART_VISION_WORKERS", "2"))
+MAX_QUEUED = int(os.getenv("HEART_VISION_MAX_QUEUED", "100"))
+# A job interrupted this many times (restarts mid-render) is failed instead of retried
+MAX_ATTEMPTS = 3
+# Finished jobs are kept this long for clients to collect, then pruned - on startup,
+# and on submit at most once per PRUNE_INTERVAL_SECONDS
+JOB_RETENTION_HOURS = 24
+PRUNE_INTERVAL_SECONDS = 600
+SSE_HEARTBEAT_SECONDS = 15
+
+QUEUED, RUNNING, SUCCEEDED, FAILED = "queued", "running", "succeeded", "failed"
+TERMINAL_STATUSES = (SUCCEEDED, FAILED)
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class HeartVisionJobQueue:
+    """Persistent job store plus the asyncio worker pool that drains it"""
+
+    def __init__(self, jobs_dir: Path = JOBS_DIR, workers: int = WORKERS):
+        self.jobs_dir = jobs_dir
+        self.worker_count = workers
+        self.jobs: Dict[str, Dict] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._workers: List[asyncio.Task] = []
+        # Notified on every state change of a job (SSE subscribers wait on it)
+        self._changed: Dict[str, asyncio.Condition] = {}
+        self._subscribers: Dict[str, int] = {}
+        # Variant renders started by workers (held so they aren't garbage collected)
+        self._background: set = set()
+        self._last_pruned = time.monotonic()
+
+    # ---- persistence ----
+
+    def _path(self, job_id: str) -> Path:
+        return self.jobs_dir / f"{job_id}.json"
+
+    def _save(self, job: Dict):
+        job["updated_at"] = datetime.utcnow().isoformat()
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.jobs_dir, prefix=".tmp-")
+        with os.fdopen(fd, "w") as f:
+            json.dump(job, f)
+        os.replace(tmp, self._path(job["id"]))
+
+    @staticmethod
+    def _retention_cutoff() -> str:
+        return (datetime.utcnow() - timedelta(hours=JOB_RETENTION_HOURS)).isoformat()
+
+    @staticmethod
+    def _expired(job: Dict, cutoff: str) -> bool:
+        return job.get("status") in TERMINAL_STATUSES and job.get("updated_at", "") < cutoff
+
+    def _load(self) -> List[Dict]:
+        """Read persisted jobs, dropping finished ones past retention"""
+        if not self.jobs_dir.exists():
+            return []
+        cutoff = self._retention_cutoff()
+        jobs = []
+        for path in self.jobs_dir.glob("*.json"):
+            try:
+                job = json.loads(path.read_text())
+            except (OSError, ValueError) as e:
+                logger.warning("Skipping unreadable job file %s: %s", path.name, e)
+                continue
+            if self._expired(job, cutoff):
+                path.unlink(missing_ok=True)
+                continue
+            jobs.append(job)
+        return sorted(jobs, key=lambda job: job.get("created_at", ""))
+
+    def prune(self) -> int:
+        """
+        Forget finished jobs past retention, in memory and on disk
+
+        Returns:
+            Number of jobs removed
+        """
+        self._last_pruned = time.monotonic()
+        cutoff = self._retention_cutoff()
+        expired = [
+            job_id for job_id, job in self.jobs.items()
+            if self._expired(job, cutoff) and job_id not in self._subscribers
+        ]
+        for job_id in expired:
+            del self.jobs[job_id]
+            self._path(job_id).unlink(missing_ok=True)
+        if expired:
+            logger.info("Pruned %s finished HeartVision jobs", len(expired))
+        return len(expired)
+
+    # ---- lifecycle ----
+
+    async def start(self):
+        """Load persisted jobs, re-queue unfinished ones and start the workers"""
+        self._queue = asyncio.Queue()
+        requeued = 0
+        for job in self._load():
+            self.jobs[job["id"]] = job
+            if job["status"] in TERMINAL_STATUSES:
+                continue
+            if job["status"] == RUNNING and job.get("attempts", 0) >= MAX_ATTEMPTS:
+                await self._finish(job, FAILED, error="Image generation was interrupted. Please try again.")
+                continue
+            job["status"] = QUEUED
+            self._save(job)
+            self._queue.put_nowait(job["id"])
+            requeued += 1
+
+        self._workers = [asyncio.create_task(self._worker(i)) for i in range(self.worker_count)]
+        logger.info("HeartVision job queue started: %s workers, %s jobs re-queued", self.worker_count, requeued)
+
+    async def stop(self):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    # ---- jobs ----
+
+    async def submit(
+        self,
+        prompt: str,
+        user_name: Optional[str] = None,
+        user_id: Optional[str] = None,
+        reuse: bool = True,
+        variation: Optional[int] = None
+    ) -> Dict:
+        """
+        Queue a HeartVision generation (options as for ai_service.generate_heart_vision)
+
+        Raises:
+            QueueFullError if MAX_QUEUED jobs are already waiting
+        """
+        if self._queue is None:
+            raise RuntimeError("HeartVision job queue is not running")
+        if self._queue.qsize() >= MAX_QUEUED:
+            raise QueueFullError("Too many images are being generated right now. Please try again shortly.")
+        if time.monotonic() - self._last_pruned >= PRUNE_INTERVAL_SECONDS:
+            self.prune()
+
+        now = datetime.utcnow().isoformat()
+        job = {
+            "id": str(uuid.uuid4()),
+            "status": QUEUED,
+            "prompt": prompt,
+            "user_name": user_name,
+            "user_id": user_id,
+            "reuse": reuse,
+            "variation": variation,
+            "attempts": 0,
+            "result": None,
+            "error": None,
+            "created_at": now,
+        }
+        self.jobs[job["id"]] = job
+        self._save(job)
+        await self._queue.put(job["id"])
+        logger.info("Queued HeartVision job %s (%s waiting)", job['id'], self._queue.qsize())
+        return job
+
+    def get(self, job_id: str) -> Optional[Dict]:
+        return self.jobs.get(job_id)
+
+    def public_view(self, job: Dict) -> Dict:
+        """What clients see - no prompt echo or attempt counters"""
+        return {
+            "job_id": job["id"],
+            "status": job["status"],
+            "result": job.get("result"),
+            "error": job.get("error"),
+            "created_at": job.get("created_at"),
+            "updated_at": job.get("updated_at"),
+        }
+
+    async def _notify(self, job_id: str):
+        condition = self._changed.get(job_id)
+        if condition:
+            async with condition:
+                condition.notify_all()
+
+    async def _finish(self, job: Dict, status: str, result: Optional[Dict] = None, error: Optional[str] = None):
+        job.update(status=status, result=result, error=error)
+        self._save(job)
+        await self._notify(job["id"])
+
+    async def _worker(self, number: int):
+        while True:
+            job_id = await self._queue.get()
+            job = self.jobs.get(job_id)
+            try:
+                if not job or job["status"] != QUEUED:
+                    continue
+                job["status"] = RUNNING
+                job["attempts"] = job.get("attempts", 0) + 1
+                self._save(job)
+                await self._notify(job_id)
+
+                try:
+                    result = await ai_service.generate_heart_vision(
+                        prompt=job["prompt"],
+                        user_name=job.get("user_name"),
+                        include_base64=False,
+                        user_id=job.get("user_id"),
+                        reuse=job.get("reuse", True),
+                        variation=job.get("variation")
+                    )
+                except Exception as e:
+                    logger.error("HeartVision job %s failed: %s", job_id, e)
+                    await self._finish(job, FAILED, error=str(e))
+                    continue
+
+                result["variants"] = image_derivatives.variant_urls(result["image_key"])
+                await self._finish(job, SUCCEEDED, result=result)
+                logger.info("HeartVision job %s finished on worker %s", job_id, number)
+                # Gallery thumbnails, off the critical path
+                task = asyncio.create_task(image_derivatives.create_variants_in_background(result["image_key"]))
+                self._background.add(task)
+                task.add_done_callback(self._background.discard)
+            finally:
+                self._queue.task_done()
+
+    async def events(self, job_id: str) -> AsyncIterator[str]:
+        """
+        Server-sent events for a job: one "status" event per change, ending after
+        a terminal status, with comment heartbeats to keep proxies from timing out
+        """
+        condition = self._changed.setdefault(job_id, asyncio.Condition())
+        self._subscribers[job_id] = self._subscribers.get(job_id, 0) + 1
+        last_sent = None
+        try:
+            while True:
+                job = self.jobs.get(job_id)
+                if job is None:
+                    return
+                state = (job["status"], job.get("updated_at"))
+                if state != last_sent:
+                    last_sent = state
+                    yield f"event: status\ndata: {json.dumps(self.public_view(job))}\n\n"
+                    if job["status"] in TERMINAL_STATUSES:
+                        return
+                changed = True
+                async with condition:
+                    try:
+                        await asyncio.wait_for(condition.wait(), timeout=SSE_HEARTBEAT_SECONDS)
+                    except asyncio.TimeoutError:
+                        changed = False
+                if not changed:
+                    yield ": keep-alive\n\n"
+        finally:
+            self._subscribers[job_id] -= 1
+            if not self._subscribers[job_id]:
+                self._subscribers.pop(job_id, None)
+                self._changed.pop(job_id, None)
+
+
+job_queue = HeartVisionJobQueue()
@@ -0,0 +1,129 @@
+"""
+Resized WebP/AVIF variants of HeartVision images
+Gallery views download a small thumbnail instead of the full 1024x1024 PNG.
+
+Variants are rendered with Pillow in a process pool (CPU-bound, keeps the event loop
+free) and stored next to the original in media_store, keyed by the original's hash:
+    <sha256>.png -> <sha256>_thumb.webp, <sha256>_medium.avif, ...
+They're created right after generation, or on first request if that hasn't run yet.
+"""
+import os
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional, Tuple
+
+import media_store
+
+logger = logging.getLogger(__name__)
+
+# Longest edge in pixels
+SIZES = {"thumb": 256, "medium": 512}
+FORMATS = ("webp", "avif")
+QUALITY = {"webp": 80, "avif": 60}
+DERIVATIVE_WORKERS = int(os.getenv("IMAGE_DERIVATIVE_WORKERS", "2"))
+
+_executor: Optional[ProcessPoolExecutor] = None
+# Variants being rendered right now, so concurrent requests share one render
+_in_flight: Dict[str, asyncio.Future] = {}
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=DERIVATIVE_WORKERS)
+    return _executor
+
+
+def _render(data: bytes, variants: List[Tuple[str, str]]) -> Dict[Tuple[str, str], bytes]:
+    """Worker process: resize once per size, encode once per format"""
+    # Imported in the worker so the API process doesn't pay for Pillow
+    import io
+    from PIL import Image, features
+
+    source = Image.open(io.BytesIO(data))
+    source.load()
+    if source.mode not in ("RGB", "RGBA"):
+        source = source.convert("RGBA" if "transparency" in source.info else "RGB")
+
+    rendered: Dict[Tuple[str, str], bytes] = {}
+    resized: Dict[str, "Image.Image"] = {}
+    for size, fmt in variants:
+        if not features.check(fmt):
+            continue
+        if size not in resized:
+            image = source.copy()
+            image.thumbnail((SIZES[size], SIZES[size]), Image.Resampling.LANCZOS)
+            resized[size] = image
+        out = io.BytesIO()
+        resized[size].save(out, format=fmt.upper(), quality=QUALITY[fmt])
+        rendered[(size, fmt)] = out.getvalue()
+    return rendered
+
+
+def variant_key(key: str, size: str, fmt: str) -> str:
+    return f"{key.split('.', 1)[0]}_{size}.{fmt}"
+
+
+def variant_urls(key: str) -> Dict[str, str]:
+    """Size-parameterized URLs for every variant size (WebP - supported by every client we ship)"""
+    return {size: f"{media_store.url_for(key)}?size={size}&format=webp" for size in SIZES}
+
+
+async def create_variants(key: str, variants: Optional[List[Tuple[str, str]]] = None) -> Dict[Tuple[str, str], str]:
+    """
+    Render and store variants of a stored image
+
+    Args:
+        key: Original's media key
+        variants: (size, format) pairs, default every size x format
+
+    Returns:
+        (size, format) -> variant media key, for the variants that exist
+    """
+    variants = variants or [(size, fmt) for size in SIZES for fmt in FORMATS]
+    keys = {variant: variant_key(key, *variant) for variant in variants}
+    missing = [variant for variant, vkey in keys.items() if not media_store.get_path(vkey)]
+
+    if missing:
+        path = media_store.get_path(key)
+        if not path:
+            raise FileNotFoundError(key)
+        loop = asyncio.get_running_loop()
+        rendered = await loop.run_in_executor(_get_executor(), _render, path.read_bytes(), missing)
+        for (size, fmt), data in rendered.items():
+            media_store.put_as(keys[(size, fmt)], data)
+        logger.info("Created %s variants of %s", len(rendered), key)
+
+    return {variant: vkey for variant, vkey in keys.items() if media_store.get_path(vkey)}
+
+
+async def create_variants_in_background(key: str):
+    """create_variants for a BackgroundTask - failures are logged; requests render lazily instead"""
+    try:
+        await create_variants(key)
+    except Exception as e:
+        logger.warning("Could not create variants of %s: %s", key, e)
+
+
+async def get_variant(key: str, size: str, fmt: str) -> Optional[str]:
+    """Key of one variant, rendering it now if needed (None if the format can't be encoded)"""
+    vkey = variant_key(key, size, fmt)
+    if media_store.get_path(vkey):
+        return vkey
+
+    # Share one render between concurrent requests for the same variant
+    future = _in_flight.get(vkey)
+    if future is None:
+        future = asyncio.ensure_future(create_variants(key, [(size, fmt)]))
+        _in_flight[vkey] = future
+        future.add_done_callback(lambda _: _in_flight.pop(vkey, None))
+    created = await asyncio.shield(future)
+    return created.get((size, fmt))
+
+
+def shutdown():
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
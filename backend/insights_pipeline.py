@@ -0,0 +1,174 @@
+"""
+Nightly insights pipeline for HeartLift
+Precomputes insights reports for users who were active in the last day so
+/api/ai/insights can serve them instantly instead of calling the LLM on open.
+
+Run from cron (e.g. 03:00 UTC):
+    python insights_pipeline.py --concurrency 4
+
+- Bounded concurrency: at most --concurrency reports are generated at once
+- Idempotent: users who already have a precomputed report for the run date are skipped
+- Resumable: finished users are checkpointed, so a crashed run picks up where it stopped
+- Fallback reports (LLM timed out or failed) are neither stored nor checkpointed, so
+  the next run retries those users and /api/ai/insights generates live meanwhile
+"""
+import os
+import json
+import asyncio
+import logging
+import argparse
+from datetime import datetime, timedelta, date
+from pathlib import Path
+from typing import Dict, List, Set
+
+from database import supabase
+import feature_store
+from server import (
+    build_insights_report,
+    build_insights_report_row,
+    InsightsSaveRequest,
+    INSIGHTS_LOOKBACK_DAYS,
+)
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+CHECKPOINT_DIR = Path(os.getenv("INSIGHTS_PIPELINE_CHECKPOINT_DIR", str(ROOT_DIR / "data" / "insights_pipeline")))
+PAGE_SIZE = 1000
+
+
+def get_active_user_ids(since: datetime) -> List[str]:
+    """Distinct users who sent a coach message since the given time"""
+    user_ids: Set[str] = set()
+    start = 0
+    while True:
+        response = supabase.table('conversation_history') \
+            .select('user_id') \
+            .eq('sender', 'user') \
+            .gte('created_at', since.isoformat()) \
+            .order('created_at', desc=False) \
+            .range(start, start + PAGE_SIZE - 1) \
+            .execute()
+        rows = response.data or []
+        user_ids.update(row['user_id'] for row in rows if row.get('user_id'))
+        if len(rows) < PAGE_SIZE:
+            break
+        start += PAGE_SIZE
+    return sorted(user_ids)
+
+
+def has_precomputed_report(user_id: str, run_date: date) -> bool:
+    """True if this run (or an earlier attempt of it) already stored the user's report"""
+    response = supabase.table('insights_reports') \
+        .select('id') \
+        .eq('user_id', user_id) \
+        .eq('report_type', 'precomputed') \
+        .eq('period_end', run_date.isoformat()) \
+        .limit(1) \
+        .execute()
+    return bool(response.data)
+
+
+class Checkpoint:
+    """Append-only list of users finished in a run, one user id per line"""
+
+    def __init__(self, run_date: date):
+        CHECKPOINT_DIR.mkdir(parents=True, exist_ok=True)
+        self.path = CHECKPOINT_DIR / f"{run_date.isoformat()}.done"
+        self.done: Set[str] = set()
+        if self.path.exists():
+            self.done = {line.strip() for line in self.path.read_text().splitlines() if line.strip()}
+
+    def mark_done(self, user_id: str):
+        self.done.add(user_id)
+        with open(self.path, "a") as f:
+            f.write(f"{user_id}\n")
+
+
+async def precompute_user_insights(user_id: str, run_date: date) -> str:
+    """
+    Generate and store one user's report
+
+    Returns:
+        "generated" if a report was stored, "skipped" if it already existed, or
+        "fallback" if the LLM failed and nothing was stored
+    """
+    if has_precomputed_report(user_id, run_date):
+        return "skipped"
+
+    insights = await build_insights_report(user_id)
+    if insights.get('isFallback'):
+        return "fallback"
+
+    report = InsightsSaveRequest(
+        user_id=user_id,
+        insights=insights,
+        conversation_count=insights.get('conversationCount', 0),
+        mood_entries_analyzed=insights.get('moodEntriesAnalyzed', 0),
+        attachment_style=insights.get('attachmentStyle', 'exploring'),
+        healing_progress_score=insights.get('healingProgressScore', 0),
+        analysis_period_start=(run_date - timedelta(days=INSIGHTS_LOOKBACK_DAYS)).isoformat(),
+        analysis_period_end=run_date.isoformat()
+    )
+    supabase.table('insights_reports') \
+        .insert(build_insights_report_row(report, report_type="precomputed")) \
+        .execute()
+    return "generated"
+
+
+async def run_pipeline(run_date: date, concurrency: int = 4, active_days: int = 1) -> Dict:
+    """
+    Precompute insights for everyone active in the last active_days
+
+    Returns:
+        Counts of generated, skipped, fallback and failed users
+    """
+    since = datetime.combine(run_date, datetime.min.time()) - timedelta(days=active_days)
+    user_ids = get_active_user_ids(since)
+    checkpoint = Checkpoint(run_date)
+    pending = [user_id for user_id in user_ids if user_id not in checkpoint.done]
+
+    logger.info(f"Insights pipeline {run_date}: {len(user_ids)} active users, {len(pending)} still to process")
+
+    # Refresh everyone's ranked topics in one vectorized pass before generating reports
+    try:
+        feature_store.refresh_ranked_topics(pending, lookback_days=INSIGHTS_LOOKBACK_DAYS)
+    except Exception as e:
+        logger.warning(f"Could not refresh ranked topics: {e}")
+
+    semaphore = asyncio.Semaphore(concurrency)
+    summary = {
+        "active_users": len(user_ids), "generated": 0, "skipped": len(user_ids) - len(pending),
+        "fallback": 0, "failed": 0,
+    }
+
+    async def process(user_id: str):
+        async with semaphore:
+            try:
+                outcome = await precompute_user_insights(user_id, run_date)
+                summary[outcome] += 1
+                if outcome == "fallback":
+                    # Not checkpointed - canned text isn't worth serving for a day
+                    logger.warning(f"Insights for user {user_id} fell back, not storing a precomputed report")
+                    return
+                checkpoint.mark_done(user_id)
+            except Exception as e:
+                # Not checkpointed, so the next run retries this user
+                summary["failed"] += 1
+                logger.error(f"Failed to precompute insights for user {user_id}: {e}", exc_info=True)
+
+    await asyncio.gather(*(process(user_id) for user_id in pending))
+
+    logger.info(f"Insights pipeline {run_date} finished: {summary}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompute insights reports for recently active users")
+    parser.add_argument("--date", help="Run date (YYYY-MM-DD), default today UTC")
+    parser.add_argument("--concurrency", type=int, default=4, help="Reports generated in parallel")
+    parser.add_argument("--active-days", type=int, default=1, help="Include users active in the last N days")
+    args = parser.parse_args()
+
+    run_date = date.fromisoformat(args.date) if args.date else datetime.utcnow().date()
+    print(json.dumps(asyncio.run(run_pipeline(run_date, args.concurrency, args.active_days)), indent=2))
@@ -0,0 +1,213 @@
+"""
+Logging setup for HeartLift backend
+Keeps log output off the request path:
+
+- Records go through a QueueHandler to a QueueListener thread, so request handlers
+  never block on stdout or a slow log shipper (LOG_ASYNC=false writes inline)
+- LOG_FORMAT=json writes one JSON object per line (message, level, logger, time,
+  request_id, trace_id, exception, and any extra= fields); LOG_FORMAT=text keeps
+  the human-readable format for local runs
+- LOG_LEVEL sets the root level; LOG_LEVELS overrides it per module, e.g.
+  "server=DEBUG,httpx=WARNING"
+- RequestIdMiddleware gives each request an id (the caller's X-Request-Id, or a new
+  one) that is stamped on every record logged while handling it
+
+Use %-style arguments (logger.debug("Found %s rows", n)) on hot paths, so filtered
+records are never formatted.
+"""
+import os
+import sys
+import json
+import uuid
+import queue
+import atexit
+import logging
+import logging.handlers
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Dict, Optional
+
+import tracing
+
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text")  # text | json
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_LEVELS = os.getenv("LOG_LEVELS", "")
+LOG_ASYNC = os.getenv("LOG_ASYNC", "true").lower() == "true"
+LOG_QUEUE_SIZE = 10000
+
+# Chatty libraries, quietened unless LOG_LEVELS says otherwise
+DEFAULT_MODULE_LEVELS = {"httpx": "WARNING", "httpcore": "WARNING", "hpack": "WARNING"}
+
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - [req=%(request_id)s trace=%(trace_id)s] %(message)s'
+REQUEST_ID_HEADER = "X-Request-Id"
+
+_request_id: ContextVar[str] = ContextVar("heartlift_request_id", default="-")
+_listener: Optional["_QueueListener"] = None
+_dropped = 0
+
+# Attributes every LogRecord has - anything else came from extra= and goes into the JSON
+_RECORD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {
+    "message", "asctime", "request_id", "trace_id", "span_id",
+}
+
+
+def current_request_id() -> str:
+    return _request_id.get()
+
+
+def dropped_records() -> int:
+    """Records discarded because the listener fell LOG_QUEUE_SIZE records behind"""
+    return _dropped
+
+
+def parse_levels(spec: str) -> Dict[str, str]:
+    """ "server=DEBUG,httpx=WARNING" -> {"server": "DEBUG", "httpx": "WARNING"} """
+    levels = {}
+    for item in spec.split(","):
+        name, _, level = item.partition("=")
+        if name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+class ContextFilter(tracing.TraceContextFilter):
+    """Adds request_id, trace_id and span_id to every record"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get()
+        return super().filter(record)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+            "trace_id": getattr(record, "trace_id", "-"),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener thread
+
+    Only the message itself is rendered here (args may change after the call returns);
+    timestamps, JSON encoding and the write happen on the listener thread
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.message = record.getMessage()
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        record.msg, record.args, record.exc_info = record.message, None, None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        global _dropped
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            # Drop rather than stall the event loop behind a stuck stream
+            _dropped += 1
+
+
+class _QueueListener(logging.handlers.QueueListener):
+    def enqueue_sentinel(self):
+        # Wait for room - the stock put_nowait raises if the queue is full at shutdown
+        self.queue.put(self._sentinel)
+
+
+def configure_logging():
+    """
+    Set up root logging from LOG_FORMAT, LOG_LEVEL, LOG_LEVELS and LOG_ASYNC
+
+    Safe to call more than once; replaces the root logger's handlers each time
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT))
+
+    if LOG_ASYNC:
+        handler = _QueueHandler(queue.Queue(maxsize=LOG_QUEUE_SIZE))
+        _listener = _QueueListener(handler.queue, output, respect_handler_level=True)
+        _listener.start()
+    else:
+        handler = output
+    # On the handler the caller's thread runs, so the request's contextvars are visible
+    handler.addFilter(ContextFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(LOG_LEVEL.upper())
+
+    for name, level in {**DEFAULT_MODULE_LEVELS, **parse_levels(LOG_LEVELS)}.items():
+        logging.getLogger(name).setLevel(level)
+
+
+def shutdown_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+class RequestIdMiddleware:
+    """
+    ASGI middleware giving each request an id for log correlation
+
+    Reuses the caller's X-Request-Id (e.g. from a proxy) when it looks sane, and
+    echoes the id back in the response
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope.get("headers", ()):
+            if key == b"x-request-id":
+                candidate = value.decode("latin-1").strip()
+                if 0 < len(candidate) <= 128 and candidate.isprintable():
+                    request_id = candidate
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER.lower().encode(), request_id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _request_id.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            _request_id.reset(token)
@@ -0,0 +1,116 @@
+"""
+Content-addressed media storage for HeartLift
+Generated media (HeartVision images) is written once under the SHA-256 of its bytes
+and served by URL from /api/media/{key}, instead of being base64-encoded into JSON.
+
+Keys never change meaning, so responses can be cached forever (immutable) and
+identical bytes are only stored once. Files live under MEDIA_ROOT - a local
+stand-in for Supabase Storage / an object store.
+"""
+import os
+import re
+import hashlib
+import logging
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+MEDIA_ROOT = Path(os.getenv("MEDIA_ROOT", str(ROOT_DIR / "data" / "media")))
+MEDIA_URL_PREFIX = "/api/media"
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "jpg": "image/jpeg",
+    "webp": "image/webp",
+    "avif": "image/avif",
+}
+EXTENSIONS = {content_type: ext for ext, content_type in CONTENT_TYPES.items()}
+
+# "<sha256>.<ext>", or "<sha256>_<variant>.<ext>" for a derivative of that original
+_KEY_RE = re.compile(r"^[0-9a-f]{64}(_[a-z]+)?\.(" + "|".join(CONTENT_TYPES) + r")$")
+
+
+def is_valid_key(key: str) -> bool:
+    return bool(_KEY_RE.match(key or ""))
+
+
+def path_for(key: str) -> Path:
+    """Sharded location (ab/cd/<key>) so no directory grows too large"""
+    return MEDIA_ROOT / key[:2] / key[2:4] / key
+
+
+def put(data: bytes, content_type: str = "image/png") -> str:
+    """
+    Store bytes and return their key ("<sha256>.<ext>")
+
+    Writing the same bytes twice is a no-op
+    """
+    key = f"{hashlib.sha256(data).hexdigest()}.{EXTENSIONS[content_type]}"
+    return put_as(key, data)
+
+
+def put_as(key: str, data: bytes) -> str:
+    """Store bytes under a derived key (e.g. an image variant named after its original)"""
+    if not is_valid_key(key):
+        raise ValueError(f"Invalid media key: {key}")
+    path = path_for(key)
+    if path.exists():
+        return key
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    logger.info("Stored media %s (%s bytes)", key, len(data))
+    return key
+
+
+def get_path(key: str) -> Optional[Path]:
+    """Path of a stored object, or None for unknown/invalid keys"""
+    if not is_valid_key(key):
+        return None
+    path = path_for(key)
+    return path if path.is_file() else None
+
+
+def delete(key: str) -> int:
+    """
+    Delete a stored original and its derived variants
+
+    Returns:
+        Number of files removed
+    """
+    if not is_valid_key(key):
+        return 0
+    digest = key.split(".", 1)[0].split("_", 1)[0]
+    removed = 0
+    for path in path_for(key).parent.glob(f"{digest}*"):
+        path.unlink(missing_ok=True)
+        removed += 1
+    if removed:
+        logger.info("Deleted media %s (%s files)", key, removed)
+    return removed
+
+
+def content_type_for(key: str) -> str:
+    return CONTENT_TYPES[key.rsplit(".", 1)[-1]]
+
+
+def etag_for(key: str) -> str:
+    """Strong ETag - the key already identifies the content"""
+    return f'"{key}"'
+
+
+def url_for(key: str) -> str:
+    """Backend-relative URL the frontend prefixes with its backend URL"""
+    return f"{MEDIA_URL_PREFIX}/{key}"
@@ -0,0 +1,295 @@
+"""
+Prometheus metrics for HeartLift backend
+Counters and histograms rendered in the Prometheus text format at /metrics, without
+a client library dependency. Recording is a lock, a dict lookup and a bisect, so it
+is cheap enough for every request and every Supabase query.
+
+Wired in by:
+- MetricsMiddleware - request rate and latency per route template
+- database.py - latency per Supabase table and operation
+- ai_service.py - LLM latency per model, image and TTS calls, fallback rates
+"""
+import time
+import asyncio
+import threading
+from bisect import bisect_left
+from typing import Awaitable, Dict, List, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Seconds - request/query scale, and upstream AI call scale
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UPSTREAM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 4.0, 8.0, 15.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic count per label set"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values: str, amount: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        return self._values.get(label_values, 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.label_names, labels)} {_format_value(value)}"
+                for labels, value in values]
+
+
+class Gauge:
+    """Value that goes up and down (unlabelled)"""
+
+    kind = "gauge"
+    label_names = ()
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        with self._lock:
+            self._value -= amount
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {_format_value(self._value)}"]
+
+
+class Histogram:
+    """Bucketed observations per label set (cumulative buckets are built at render time)"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._values: Dict[Tuple[str, ...], list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(label_values)
+            if state is None:
+                state = self._values[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            state[0][index] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, *label_values: str) -> "_Timer":
+        """Context manager observing the elapsed seconds of its block"""
+        return _Timer(self, label_values)
+
+    def count(self, *label_values: str) -> int:
+        state = self._values.get(label_values)
+        return state[2] if state else 0
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = [(labels, list(state[0]), state[1], state[2]) for labels, state in self._values.items()]
+        lines = []
+        for labels, bucket_counts, total, count in values:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), bucket_counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "label_values", "started")
+
+    def __init__(self, histogram: Histogram, label_values: Tuple[str, ...]):
+        self.histogram = histogram
+        self.label_values = label_values
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.histogram.observe(time.perf_counter() - self.started, *self.label_values)
+        return False
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, object] = {}
+
+    def register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.samples())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labels: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labels))
+
+
+def gauge(name: str, documentation: str) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation))
+
+
+def histogram(name: str, documentation: str, labels: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labels, buckets))
+
+
+# ---- HeartLift metrics ----
+
+HTTP_REQUESTS = counter(
+    "heartlift_http_requests_total", "HTTP requests by route template and status", ("method", "route", "status"))
+HTTP_REQUEST_SECONDS = histogram(
+    "heartlift_http_request_duration_seconds", "HTTP request latency (until the response body is sent)",
+    ("method", "route"))
+HTTP_IN_PROGRESS = gauge("heartlift_http_requests_in_progress", "HTTP requests being handled")
+
+DB_QUERY_SECONDS = histogram(
+    "heartlift_supabase_query_duration_seconds", "Supabase query latency by table and operation",
+    ("table", "operation"))
+DB_QUERY_ERRORS = counter(
+    "heartlift_supabase_query_errors_total", "Supabase queries that raised", ("table", "operation"))
+
+LLM_REQUEST_SECONDS = histogram(
+    "heartlift_llm_request_duration_seconds", "LLM call latency by model and operation",
+    ("model", "operation"), buckets=UPSTREAM_BUCKETS)
+LLM_REQUESTS = counter(
+    "heartlift_llm_requests_total", "LLM calls by outcome (ok, error, timeout)", ("model", "operation", "outcome"))
+
+IMAGE_GENERATION_SECONDS = histogram(
+    "heartlift_image_generation_duration_seconds", "Image generation latency by model", ("model",),
+    buckets=UPSTREAM_BUCKETS)
+IMAGE_GENERATIONS = counter(
+    "heartlift_image_generations_total", "Image generations by outcome", ("model", "outcome"))
+TTS_REQUEST_SECONDS = histogram(
+    "heartlift_tts_request_duration_seconds", "OpenAI speech request latency, whole clip (mode full or stream)",
+    ("model", "mode"), buckets=UPSTREAM_BUCKETS)
+TTS_REQUESTS = counter(
+    "heartlift_tts_requests_total",
+    "OpenAI speech requests by outcome (ok, error, timeout, or aborted - stream closed by the client)",
+    ("model", "mode", "outcome"))
+TTS_FIRST_BYTE_SECONDS = histogram(
+    "heartlift_tts_first_byte_seconds", "OpenAI speech time to first audio byte when streaming", ("model",),
+    buckets=UPSTREAM_BUCKETS)
+
+AI_FALLBACKS = counter(
+    "heartlift_ai_fallbacks_total", "Canned responses served because the AI call failed, timed out or was unparseable",
+    ("kind",))
+
+
+async def observe_call(call: Awaitable[T], histogram: Histogram, counter: Counter, *labels: str) -> T:
+    """
+    Await an upstream call, recording its latency in histogram and its outcome in counter
+
+    The counter's labels are labels plus the outcome: "ok", "error", or "timeout"
+    (cancelled, e.g. by asyncio.wait_for)
+    """
+    started = time.perf_counter()
+    outcome = "error"
+    try:
+        result = await call
+        outcome = "ok"
+        return result
+    except asyncio.CancelledError:
+        outcome = "timeout"
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - started, *labels)
+        counter.inc(*labels, outcome)
+
+
+def render() -> str:
+    return REGISTRY.render()
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware counting requests and timing them per route template
+    (/api/reflections/past/{user_id}, not one series per user)
+
+    Plain ASGI rather than BaseHTTPMiddleware, so streaming responses aren't buffered
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+        HTTP_IN_PROGRESS.inc()
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router records the matched route on the scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "")
+            HTTP_REQUEST_SECONDS.observe(time.perf_counter() - started, method, template)
+            HTTP_REQUESTS.inc(method, template, str(status))
+            HTTP_IN_PROGRESS.dec()
@@ -0,0 +1,123 @@
+"""
+Keyset pagination and column projection for HeartLift history endpoints
+Pages are fetched with "WHERE sort_key < last seen" instead of growing limits/offsets,
+so every page costs the same and clients only download the columns they ask for.
+
+Cursors are opaque to clients: base64 JSON of the last row's sort key and id.
+"""
+import json
+import base64
+import binascii
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+# Columns clients may ask for by name. Requests without fields select '*', since
+# deployments differ (grateful_for/proud_of/helpful_moment vs notes)
+REFLECTION_FIELDS = (
+    'id', 'user_id', 'reflection_date', 'grateful_for', 'proud_of', 'helpful_moment', 'notes',
+    'coaches_chatted_with', 'conversation_rating', 'helpful_moments', 'areas_for_improvement',
+    'created_at', 'updated_at',
+)
+REPORT_FIELDS = (
+    'id', 'user_id', 'report_type', 'insights', 'conversation_count', 'mood_entries_analyzed',
+    'attachment_style', 'healing_progress_score', 'period_start', 'period_end', 'created_at',
+)
+# Report list view without the (large) insights JSONB
+REPORT_SUMMARY_FIELDS = tuple(field for field in REPORT_FIELDS if field != 'insights')
+
+
+def clamp_limit(limit: int, max_limit: int) -> int:
+    """Page size within 1..max_limit, whatever the caller asked for"""
+    return max(1, min(limit, max_limit))
+
+
+def parse_fields(
+    fields: Optional[str],
+    allowed: Tuple[str, ...],
+    required: Tuple[str, ...],
+    default: Tuple[str, ...] = ('*',)
+) -> List[str]:
+    """
+    Columns to select from a comma-separated fields parameter
+
+    Args:
+        fields: e.g. "reflection_date,conversation_rating" (None/empty selects default)
+        allowed: Columns clients may request
+        required: Columns always selected (the cursor needs them)
+        default: Selected when fields is omitted - every column unless a view says otherwise
+
+    Raises:
+        HTTPException 400 for unknown columns
+    """
+    if not fields:
+        return list(default)
+    requested = [field.strip() for field in fields.split(',') if field.strip()]
+    unknown = sorted(set(requested) - set(allowed))
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return list(dict.fromkeys(list(required) + requested))
+
+
+def encode_cursor(row: Dict, sort_key: str) -> str:
+    payload = json.dumps({"k": row.get(sort_key), "id": row.get('id')}, separators=(',', ':'))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Dict:
+    """
+    Raises:
+        HTTPException 400 for cursors this server didn't issue
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(payload, dict) or not payload.get('k'):
+            raise ValueError("missing sort key")
+        return payload
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def apply_cursor(query, cursor: Optional[str], sort_key: str, unique_sort_key: bool = False, descending: bool = True):
+    """
+    Restrict a query to rows after the cursor in sort order
+
+    The id tie-break is only needed when several rows can share a sort key value
+    """
+    if not cursor:
+        return query
+    position = decode_cursor(cursor)
+    op = 'lt' if descending else 'gt'
+    if unique_sort_key or not position.get('id'):
+        return getattr(query, op)(sort_key, position['k'])
+    # Timestamps contain '.' and ':', which PostgREST only accepts inside quotes in or=()
+    key, row_id = f'"{position["k"]}"', f'"{position["id"]}"'
+    return query.or_(f"{sort_key}.{op}.{key},and({sort_key}.eq.{key},id.{op}.{row_id})")
+
+
+def fetch_page(
+    query,
+    limit: int,
+    sort_key: str,
+    unique_sort_key: bool = False,
+    descending: bool = True
+) -> Tuple[List[Dict], Optional[str]]:
+    """
+    Run a cursor-filtered query for one page
+
+    Fetches one extra row to know whether there's another page
+
+    Returns:
+        (rows, next_cursor) - next_cursor is None on the last page
+    """
+    query = query.order(sort_key, desc=descending)
+    if not unique_sort_key:
+        query = query.order('id', desc=descending)
+    rows = query.limit(limit + 1).execute().data or []
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, encode_cursor(rows[-1], sort_key)
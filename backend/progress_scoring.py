@@ -0,0 +1,163 @@
+"""
+Deterministic healing-progress scoring for HeartLift insights
+Computes healingProgressScore and attachmentStyle from real activity - reflection
+ratings, chat frequency and stored quiz results - so they are cheap, reproducible
+and consistent between reports. The LLM only writes the narrative.
+
+All window metrics are computed together: daily series for the last 90 days are
+masked by a (windows x days) matrix instead of looping per window.
+"""
+from collections import Counter
+from datetime import date, datetime
+from typing import Dict, List, Optional
+
+import numpy as np
+
+WINDOWS = (7, 30, 90)
+HISTORY_DAYS = max(WINDOWS)
+
+# Score components (weights sum to 1)
+SCORE_WEIGHTS = {
+    "reflection_rating": 0.40,
+    "engagement": 0.30,
+    "rating_trend": 0.15,
+    "self_reflection": 0.15,
+}
+# Daily reflection ratings are 1-5 stars
+RATING_MIN, RATING_MAX = 1, 5
+# Active on half the days of the month counts as fully engaged
+TARGET_ACTIVE_DAY_SHARE = 0.5
+# Reflections in the last 30 days for full self-reflection credit
+TARGET_REFLECTIONS = 12
+# Rating change per day (stars) that maps to the ends of the trend scale
+MAX_TREND_PER_DAY = 0.05
+
+QUIZ_STYLE_HALF_LIFE_DAYS = 30
+
+
+def _daily_series(values_by_day: Dict[str, float], today: date) -> np.ndarray:
+    """Values for the last HISTORY_DAYS days, oldest first, NaN where there's no entry"""
+    series = np.full(HISTORY_DAYS, np.nan)
+    for day, value in values_by_day.items():
+        if value is None:
+            continue
+        try:
+            offset = (today - date.fromisoformat(str(day)[:10])).days
+        except ValueError:
+            continue
+        if 0 <= offset < HISTORY_DAYS:
+            series[HISTORY_DAYS - 1 - offset] = float(value)
+    return series
+
+
+def compute_window_metrics(features: Dict, today: Optional[date] = None) -> Dict[int, Dict]:
+    """
+    Rating and activity metrics for each window in WINDOWS
+
+    Returns:
+        {7: {average_rating, rated_days, active_days, messages, active_day_share}, 30: {...}, 90: {...}}
+    """
+    today = today or datetime.utcnow().date()
+
+    ratings = _daily_series(
+        {day: (r or {}).get('rating') for day, r in (features.get('reflections') or {}).items()}, today
+    )
+    reflected = _daily_series({day: 1 for day in (features.get('reflections') or {})}, today)
+    messages = np.nan_to_num(_daily_series(features.get('activity_by_day') or {}, today))
+
+    # masks[w, d] is True when day d falls inside window w
+    windows = np.asarray(WINDOWS)
+    day_age = np.arange(HISTORY_DAYS)[::-1]
+    masks = day_age[None, :] < windows[:, None]
+
+    rated = masks & ~np.isnan(ratings)
+    rated_days = rated.sum(axis=1)
+    rating_sums = np.where(rated, ratings, 0.0).sum(axis=1)
+    average_rating = np.divide(rating_sums, rated_days, out=np.full(len(WINDOWS), np.nan), where=rated_days > 0)
+
+    active_days = (masks & (messages > 0)).sum(axis=1)
+    message_totals = (masks * messages).sum(axis=1)
+    reflection_days = (masks & ~np.isnan(reflected)).sum(axis=1)
+
+    return {
+        int(window): {
+            "average_rating": None if np.isnan(average_rating[i]) else round(float(average_rating[i]), 2),
+            "rated_days": int(rated_days[i]),
+            "reflection_days": int(reflection_days[i]),
+            "active_days": int(active_days[i]),
+            "messages": int(message_totals[i]),
+            "active_day_share": round(float(active_days[i]) / window, 3),
+        }
+        for i, window in enumerate(WINDOWS)
+    }
+
+
+def rating_trend(features: Dict, today: Optional[date] = None, window: int = 30) -> Optional[float]:
+    """Least-squares slope of reflection ratings per day over the window (None with < 3 ratings)"""
+    today = today or datetime.utcnow().date()
+    ratings = _daily_series(
+        {day: (r or {}).get('rating') for day, r in (features.get('reflections') or {}).items()}, today
+    )[-window:]
+    days = np.flatnonzero(~np.isnan(ratings))
+    if len(days) < 3:
+        return None
+    slope = np.polyfit(days.astype(float), ratings[days], 1)[0]
+    return round(float(slope), 4)
+
+
+def dominant_quiz_style(quiz_results: List[Dict], today: Optional[date] = None) -> Optional[str]:
+    """Recency-weighted vote over stored quiz results (a result's weight halves every 30 days)"""
+    today = today or datetime.utcnow().date()
+    votes: Counter = Counter()
+    for result in quiz_results:
+        style = result.get('attachment_style')
+        if not style:
+            continue
+        try:
+            age = (today - date.fromisoformat(str(result.get('completed_at'))[:10])).days
+        except ValueError:
+            age = HISTORY_DAYS
+        votes[style] += 0.5 ** (max(age, 0) / QUIZ_STYLE_HALF_LIFE_DAYS)
+    if not votes:
+        return None
+    # Ties resolve alphabetically so the result never depends on row order
+    return max(sorted(votes), key=votes.get)
+
+
+def compute_healing_progress(
+    features: Dict,
+    quiz_results: Optional[List[Dict]] = None,
+    today: Optional[date] = None
+) -> Dict:
+    """
+    Deterministic progress metrics for an insights report
+
+    Args:
+        features: The user's user_insight_features row (may be empty)
+        quiz_results: Recent quiz_results rows ({attachment_style, completed_at})
+        today: Scoring date, defaults to today UTC
+
+    Returns:
+        {healingProgressScore (0-100), attachmentStyle, components, windows, ratingTrend}
+    """
+    today = today or datetime.utcnow().date()
+    windows = compute_window_metrics(features or {}, today)
+    month = windows[30]
+    trend = rating_trend(features or {}, today)
+
+    # Each component is 0-1, with 0.5 as "no signal yet"
+    components = {
+        "reflection_rating": (month["average_rating"] - RATING_MIN) / (RATING_MAX - RATING_MIN) if month["average_rating"] is not None else 0.5,
+        "engagement": min(month["active_day_share"] / TARGET_ACTIVE_DAY_SHARE, 1.0),
+        "rating_trend": float(np.clip(0.5 + trend / (2 * MAX_TREND_PER_DAY), 0, 1)) if trend is not None else 0.5,
+        "self_reflection": min(month["reflection_days"] / TARGET_REFLECTIONS, 1.0),
+    }
+    score = sum(SCORE_WEIGHTS[name] * value for name, value in components.items())
+
+    return {
+        "healingProgressScore": int(round(float(np.clip(score, 0, 1)) * 100)),
+        "attachmentStyle": dominant_quiz_style(quiz_results or [], today) or "exploring",
+        "components": {name: round(value, 3) for name, value in components.items()},
+        "windows": {str(window): metrics for window, metrics in windows.items()},
+        "ratingTrend": trend,
+    }
@@ -0,0 +1,296 @@
+"""
+AI providers for HeartLift backend
+The upstream clients AIService talks to - chat, image generation and speech -
+behind one small interface, picked by AI_PROVIDER:
+
+- "emergent" (default): emergentintegrations LlmChat and OpenAIImageGeneration,
+  and OpenAI's speech API over the network
+- "fake": local, deterministic stand-ins for benchmarks and offline runs. Latency
+  is drawn from configurable distributions, replies stream token by token, and a
+  configurable share of calls hang (to trip timeouts), fail, or return malformed
+  JSON, so caching, fallback and streaming paths can be measured with no network
+
+Fake settings (FAKE_AI_*) are read from the environment:
+    FAKE_AI_SEED                 seed for latencies and fault injection (default 0)
+    FAKE_AI_LLM_LATENCY_MS       time to first token, a distribution (default "lognormal:600:0.4")
+    FAKE_AI_TOKEN_MS             delay between streamed tokens (default 5)
+    FAKE_AI_IMAGE_LATENCY_MS     image generation time (default "normal:4000:800")
+    FAKE_AI_TTS_FIRST_BYTE_MS    speech time to first byte (default "normal:400:80")
+    FAKE_AI_TTS_CHUNK_MS         delay between speech chunks (default 20)
+    FAKE_AI_TIMEOUT_RATE         share of calls that hang for FAKE_AI_HANG_SECONDS (default 0)
+    FAKE_AI_ERROR_RATE           share of calls that raise (default 0)
+    FAKE_AI_MALFORMED_RATE       share of JSON replies that come back truncated (default 0)
+
+Distributions are "fixed:MS", "uniform:LOW:HIGH", "normal:MEAN:STDDEV" or
+"lognormal:MEDIAN:SIGMA", in milliseconds.
+"""
+import os
+import json
+import math
+import zlib
+import struct
+import random
+import asyncio
+import hashlib
+import logging
+from functools import lru_cache
+from typing import AsyncIterator, Callable, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+AI_PROVIDER = os.getenv("AI_PROVIDER", "emergent")  # emergent | fake
+
+
+class UserMessage:
+    """A user turn sent to a chat - provider-neutral"""
+
+    def __init__(self, text: str):
+        self.text = text
+
+
+class ProviderError(Exception):
+    """An upstream call failed (the fake raises this for injected errors)"""
+
+
+# ---- Emergent (production) ----
+
+class EmergentChat:
+    """emergentintegrations LlmChat behind the provider chat interface"""
+
+    def __init__(self, api_key: str, session_id: str, system_message: str):
+        from emergentintegrations.llm.chat import LlmChat
+        self._chat = LlmChat(api_key=api_key, session_id=session_id, system_message=system_message)
+
+    def with_model(self, provider: str, model: str) -> "EmergentChat":
+        self._chat = self._chat.with_model(provider, model)
+        return self
+
+    async def send_message(self, message: UserMessage) -> str:
+        from emergentintegrations.llm.chat import UserMessage as EmergentUserMessage
+        return await self._chat.send_message(EmergentUserMessage(text=message.text))
+
+    async def stream_message(self, message: UserMessage) -> AsyncIterator[str]:
+        # LlmChat has no streaming API - the whole reply arrives as one chunk
+        yield await self.send_message(message)
+
+
+class EmergentProvider:
+    name = "emergent"
+
+    def chat(self, api_key: str, session_id: str, system_message: str) -> EmergentChat:
+        return EmergentChat(api_key, session_id, system_message)
+
+    def image_generator(self, api_key: str):
+        from emergentintegrations.llm.openai.image_generation import OpenAIImageGeneration
+        return OpenAIImageGeneration(api_key=api_key)
+
+    def speech_api_key(self) -> Optional[str]:
+        return os.getenv("OPENAI_API_KEY")
+
+    def speech_transport(self) -> Optional[httpx.AsyncBaseTransport]:
+        """None - speech requests go over the network to OPENAI_TTS_URL"""
+        return None
+
+
+# ---- Fake (local) ----
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """A distribution spec ("lognormal:600:0.4") as a sampler returning milliseconds"""
+    kind, *params = spec.split(":")
+    try:
+        values = [float(p) for p in params]
+        if kind == "fixed" and len(values) == 1:
+            return lambda rng: values[0]
+        if kind == "uniform" and len(values) == 2:
+            return lambda rng: rng.uniform(values[0], values[1])
+        if kind == "normal" and len(values) == 2:
+            return lambda rng: max(rng.gauss(values[0], values[1]), 0.0)
+        if kind == "lognormal" and len(values) == 2:
+            return lambda rng: rng.lognormvariate(math.log(values[0]), values[1])
+    except ValueError:
+        pass
+    raise ValueError(f"Invalid latency distribution {spec!r} - use fixed:MS, uniform:LOW:HIGH, "
+                     "normal:MEAN:STDDEV or lognormal:MEDIAN:SIGMA")
+
+
+@lru_cache(maxsize=64)
+def _json_example(system_message: str) -> Optional[str]:
+    """
+    The example JSON in a prompt ("return ONLY this JSON structure: {...}"), which
+    is shaped like the reply the caller parses - a list if the prompt asks for an array
+    """
+    decoder = json.JSONDecoder()
+    want_list = "JSON array" in system_message
+    candidates = []
+    index = 0
+    while index < len(system_message):
+        if system_message[index] not in "{[":
+            index += 1
+            continue
+        try:
+            value, end = decoder.raw_decode(system_message, index)
+        except ValueError:
+            index += 1
+            continue
+        if isinstance(value, list) == want_list:
+            return json.dumps(value)
+        candidates.append(value)
+        # Skip past it, so lists nested in an example object aren't mistaken for the reply
+        index = end
+    return json.dumps(candidates[0]) if candidates else None
+
+
+def _fake_png(seed: bytes, size: int = 256) -> bytes:
+    """A valid solid-colour PNG, coloured by seed"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data) & 0xffffffff)
+
+    row = b"\x00" + bytes(seed[:3]) * size
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(row * size))
+            + chunk(b"IEND", b""))
+
+
+def _fake_audio(text: str, voice: str, bytes_per_char: int = 500) -> bytes:
+    """Deterministic "MP3" for a text and voice: an empty ID3 tag and seeded frame bytes"""
+    seed = hashlib.sha256(f"{voice}|{text}".encode()).digest()
+    size = max(len(text) * bytes_per_char, len(seed))
+    return b"ID3\x04\x00\x00\x00\x00\x00\x00" + (seed * (size // len(seed) + 1))[:size]
+
+
+class FakeChat:
+    """Chat that replies locally after a sampled delay, streaming word by word"""
+
+    def __init__(self, provider: "FakeProvider", session_id: str, system_message: str):
+        self._provider = provider
+        self._system_message = system_message
+        self.model = "gpt-4o-mini"
+
+    def with_model(self, provider: str, model: str) -> "FakeChat":
+        self.model = model
+        return self
+
+    def _reply(self, message: UserMessage) -> str:
+        example = _json_example(self._system_message) if "JSON" in self._system_message else None
+        if example is None:
+            return ("That sounds like a lot to carry. Let's slow down for a moment - "
+                    "what feels most important to you about it right now?")
+        if self._provider.roll(self._provider.malformed_rate):
+            # Cut off mid-object, as a truncated or rambling completion would be
+            return example[:max(len(example) // 2, 1)]
+        return example
+
+    async def stream_message(self, message: UserMessage) -> AsyncIterator[str]:
+        await self._provider.upstream_delay(self._provider.llm_latency)
+        tokens = self._reply(message).split(" ")
+        for index, token in enumerate(tokens):
+            if index and self._provider.token_ms:
+                await asyncio.sleep(self._provider.token_ms / 1000)
+            yield token if index == len(tokens) - 1 else token + " "
+
+    async def send_message(self, message: UserMessage) -> str:
+        return "".join([token async for token in self.stream_message(message)])
+
+
+class FakeImageGenerator:
+    def __init__(self, provider: "FakeProvider"):
+        self._provider = provider
+
+    async def generate_images(self, prompt: str, model: str, number_of_images: int = 1) -> List[bytes]:
+        await self._provider.upstream_delay(self._provider.image_latency)
+        return [_fake_png(hashlib.sha256(f"{prompt}|{i}".encode()).digest()) for i in range(number_of_images)]
+
+
+class _AudioStream(httpx.AsyncByteStream):
+    def __init__(self, provider: "FakeProvider", audio: bytes, chunk_size: int = 4096):
+        self._provider = provider
+        self._audio = audio
+        self._chunk_size = chunk_size
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        await self._provider.upstream_delay(self._provider.tts_first_byte)
+        for start in range(0, len(self._audio), self._chunk_size):
+            if start and self._provider.tts_chunk_ms:
+                await asyncio.sleep(self._provider.tts_chunk_ms / 1000)
+            yield self._audio[start:start + self._chunk_size]
+
+
+class FakeSpeechTransport(httpx.AsyncBaseTransport):
+    """Answers OpenAI speech requests in-process, streaming fake audio"""
+
+    def __init__(self, provider: "FakeProvider"):
+        self._provider = provider
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(await request.aread() or b"{}")
+        text = payload.get("input") or ""
+        if not text:
+            return httpx.Response(400, json={"error": {"message": "input is required"}})
+        audio = _fake_audio(text, payload.get("voice", ""))
+        return httpx.Response(200, headers={"Content-Type": "audio/mpeg"}, stream=_AudioStream(self._provider, audio))
+
+
+class FakeProvider:
+    name = "fake"
+
+    def __init__(
+        self,
+        seed: int = int(os.getenv("FAKE_AI_SEED", "0")),
+        llm_latency: str = os.getenv("FAKE_AI_LLM_LATENCY_MS", "lognormal:600:0.4"),
+        token_ms: float = float(os.getenv("FAKE_AI_TOKEN_MS", "5")),
+        image_latency: str = os.getenv("FAKE_AI_IMAGE_LATENCY_MS", "normal:4000:800"),
+        tts_first_byte: str = os.getenv("FAKE_AI_TTS_FIRST_BYTE_MS", "normal:400:80"),
+        tts_chunk_ms: float = float(os.getenv("FAKE_AI_TTS_CHUNK_MS", "20")),
+        timeout_rate: float = float(os.getenv("FAKE_AI_TIMEOUT_RATE", "0")),
+        error_rate: float = float(os.getenv("FAKE_AI_ERROR_RATE", "0")),
+        malformed_rate: float = float(os.getenv("FAKE_AI_MALFORMED_RATE", "0")),
+        hang_seconds: float = float(os.getenv("FAKE_AI_HANG_SECONDS", "120")),
+    ):
+        self._rng = random.Random(seed)
+        self.llm_latency = parse_latency(llm_latency)
+        self.token_ms = token_ms
+        self.image_latency = parse_latency(image_latency)
+        self.tts_first_byte = parse_latency(tts_first_byte)
+        self.tts_chunk_ms = tts_chunk_ms
+        self.timeout_rate = timeout_rate
+        self.error_rate = error_rate
+        self.malformed_rate = malformed_rate
+        self.hang_seconds = hang_seconds
+
+    def roll(self, rate: float) -> bool:
+        return rate > 0 and self._rng.random() < rate
+
+    async def upstream_delay(self, latency: Callable[[random.Random], float]):
+        """Wait as an upstream call would - or hang, or fail, at the configured rates"""
+        if self.roll(self.timeout_rate):
+            await asyncio.sleep(self.hang_seconds)
+        if self.roll(self.error_rate):
+            raise ProviderError("Simulated upstream error")
+        await asyncio.sleep(latency(self._rng) / 1000)
+
+    def chat(self, api_key: str, session_id: str, system_message: str) -> FakeChat:
+        return FakeChat(self, session_id, system_message)
+
+    def image_generator(self, api_key: str) -> FakeImageGenerator:
+        return FakeImageGenerator(self)
+
+    def speech_api_key(self) -> Optional[str]:
+        return "fake-openai-key"
+
+    def speech_transport(self) -> httpx.AsyncBaseTransport:
+        return FakeSpeechTransport(self)
+
+
+def create_provider(name: str = AI_PROVIDER):
+    if name == "emergent":
+        return EmergentProvider()
+    if name == "fake":
+        logger.warning("AI_PROVIDER=fake - chat, images and speech are simulated locally")
+        return FakeProvider()
+    raise ValueError(f"Unknown AI_PROVIDER {name!r} - use emergent or fake")
+
+
+provider = create_provider()
@@ -0,0 +1,285 @@
+"""
+Daily quiz question bank for HeartLift
+A local, versioned store of pre-validated attachment quiz questions indexed by theme.
+
+The bank is filled offline (python question_bank.py generate) so serving the daily
+quiz is a pure local read - no LLM call on the request path.
+
+On-disk format (gzip-compressed JSON):
+{
+  "version": 3,
+  "updated_at": "2025-01-18T03:00:00",
+  "themes": {"0": [{"q": "question", "o": ["4 options"], "s": ["4 styles"]}, ...], ...}
+}
+Theme keys are indexes into THEME_FOCUSES.
+"""
+import os
+import re
+import gzip
+import json
+import random
+import asyncio
+import logging
+import argparse
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+BANK_PATH = Path(os.getenv("QUIZ_BANK_PATH", str(ROOT_DIR / "data" / "question_bank.json.gz")))
+
+# Daily quiz themes - the day of year picks one, 60% of questions come from it
+THEME_FOCUSES = [
+    "family dynamics, parent-child relationships, and sibling bonds",
+    "friendships, social groups, and peer connections",
+    "emotional awareness, self-reflection, and inner feelings",
+    "communication styles, expressing needs, and listening to others",
+    "trust, vulnerability, and opening up to people",
+    "independence, personal space, and alone time preferences",
+    "conflict resolution, disagreements, and making peace"
+]
+
+VALID_STYLES = ("secure", "anxious", "avoidant", "fearful-avoidant")
+THEME_SHARE = 0.6
+NEAR_DUPLICATE_THRESHOLD = 0.6
+
+# Questions must stay age appropriate (13+) - reject anything that drifts into dating
+BLOCKED_WORDS = {
+    "sex", "sexual", "sexy", "date", "dating", "boyfriend", "girlfriend",
+    "kiss", "crush", "hookup", "flirt", "romantic", "partner"
+}
+
+_WORD_RE = re.compile(r"[a-z']+")
+
+# Loaded bank, reloaded when the file changes
+_bank: Optional[Dict] = None
+_bank_mtime: Optional[float] = None
+
+
+def load_bank() -> Optional[Dict]:
+    """Load the bank from disk, reusing the in-memory copy until the file changes"""
+    global _bank, _bank_mtime
+
+    try:
+        mtime = BANK_PATH.stat().st_mtime
+    except FileNotFoundError:
+        return None
+
+    if _bank is None or mtime != _bank_mtime:
+        try:
+            with gzip.open(BANK_PATH, "rt", encoding="utf-8") as f:
+                _bank = json.load(f)
+            _bank_mtime = mtime
+            logger.info(f"Loaded question bank v{_bank.get('version')} from {BANK_PATH}")
+        except (OSError, json.JSONDecodeError) as e:
+            logger.error(f"Could not load question bank: {e}")
+            return None
+
+    return _bank
+
+
+def bank_version() -> Optional[int]:
+    bank = load_bank()
+    return bank.get("version") if bank else None
+
+
+def save_bank(bank: Dict):
+    """Write the bank atomically with a bumped version"""
+    bank["version"] = bank.get("version", 0) + 1
+    bank["updated_at"] = datetime.utcnow().isoformat()
+
+    BANK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = BANK_PATH.with_suffix(".tmp")
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        json.dump(bank, f, separators=(",", ":"), ensure_ascii=False)
+    os.replace(tmp_path, BANK_PATH)
+    logger.info(f"Saved question bank v{bank['version']} to {BANK_PATH}")
+
+
+def sample_daily_questions(day: date, num_questions: int = 10) -> Optional[List[Dict]]:
+    """
+    Pick the day's questions from the bank - the same date always gives the same quiz
+
+    Args:
+        day: Quiz date
+        num_questions: Number of questions to return
+
+    Returns:
+        List of {question, options, styles}, or None if the bank can't fill the quiz
+    """
+    bank = load_bank()
+    if not bank:
+        return None
+
+    themes = bank.get("themes", {})
+    theme_index = day.timetuple().tm_yday % len(THEME_FOCUSES)
+    theme_pool = themes.get(str(theme_index), [])
+    other_pool = [
+        entry
+        for key, entries in sorted(themes.items())
+        if key != str(theme_index)
+        for entry in entries
+    ]
+
+    rng = random.Random(f"{day.isoformat()}:{bank.get('version')}")
+    from_theme = min(len(theme_pool), round(num_questions * THEME_SHARE))
+    from_others = min(len(other_pool), num_questions - from_theme)
+    if from_theme + from_others < num_questions:
+        # Top up from the theme if the other themes are thin
+        from_theme = min(len(theme_pool), num_questions - from_others)
+    if from_theme + from_others < num_questions:
+        return None
+
+    picked = rng.sample(theme_pool, from_theme) + rng.sample(other_pool, from_others)
+    rng.shuffle(picked)
+
+    return [
+        {"question": entry["q"], "options": list(entry["o"]), "styles": list(entry["s"])}
+        for entry in picked
+    ]
+
+
+def validate_question(question: Dict) -> Optional[Dict]:
+    """
+    Check a generated question against the quiz format rules
+
+    Returns:
+        Compact bank entry {q, o, s}, or None if the question is rejected
+    """
+    text = (question.get("question") or "").strip()
+    options = [str(o).strip() for o in question.get("options") or []]
+    styles = [str(s).lower().strip() for s in question.get("styles") or []]
+    styles = ["fearful-avoidant" if s == "fearful" else s for s in styles]
+
+    if not text or len(text) > 200:
+        return None
+    if len(options) != 4 or len(set(o.lower() for o in options)) != 4 or not all(options):
+        return None
+    if any(len(o) > 160 for o in options):
+        return None
+    # Each option must map to a different style so every answer carries signal
+    if sorted(styles) != sorted(VALID_STYLES):
+        return None
+
+    words = set(_WORD_RE.findall(" ".join([text] + options).lower()))
+    if words & BLOCKED_WORDS:
+        return None
+
+    return {"q": text, "o": options, "s": styles}
+
+
+def _shingles(text: str) -> set:
+    """Word bigrams of a question, used for near-duplicate detection"""
+    words = _WORD_RE.findall(text.lower())
+    if len(words) < 2:
+        return set(words)
+    return {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+
+def is_near_duplicate(text: str, existing: List[set], threshold: float = NEAR_DUPLICATE_THRESHOLD) -> bool:
+    """True if the question's bigram Jaccard similarity to any existing question reaches the threshold"""
+    candidate = _shingles(text)
+    if not candidate:
+        return True
+    for other in existing:
+        union = len(candidate | other)
+        if union and len(candidate & other) / union >= threshold:
+            return True
+    return False
+
+
+def add_questions(bank: Dict, theme_index: int, questions: List[Dict]) -> int:
+    """
+    Validate and deduplicate generated questions into a theme
+
+    Returns:
+        Number of questions added
+    """
+    themes = bank.setdefault("themes", {})
+    # Compare against the whole bank - the same question shouldn't appear under two themes
+    existing = [_shingles(entry["q"]) for entries in themes.values() for entry in entries]
+    entries = themes.setdefault(str(theme_index), [])
+
+    added = 0
+    for question in questions:
+        entry = validate_question(question)
+        if not entry or is_near_duplicate(entry["q"], existing):
+            continue
+        entries.append(entry)
+        existing.append(_shingles(entry["q"]))
+        added += 1
+
+    return added
+
+
+async def generate(theme_indexes: List[int], batches: int, per_batch: int, concurrency: int = 3) -> Dict:
+    """
+    Offline batch generation - ask the LLM for new questions per theme and merge them into the bank
+
+    Returns:
+        Questions added per theme
+    """
+    from ai_service import ai_service
+
+    bank = load_bank() or {"version": 0, "themes": {}}
+    semaphore = asyncio.Semaphore(concurrency)
+    run_id = datetime.utcnow().strftime("%Y%m%d%H%M%S")
+
+    async def run_batch(theme_index: int, batch: int) -> List[Dict]:
+        async with semaphore:
+            questions = await ai_service._request_quiz_questions(
+                theme=THEME_FOCUSES[theme_index],
+                num_questions=per_batch,
+                session_id=f"quiz-bank-{run_id}-{theme_index}-{batch}",
+                timeout=60.0
+            )
+            return questions or []
+
+    added = {}
+    for theme_index in theme_indexes:
+        results = await asyncio.gather(*(run_batch(theme_index, b) for b in range(batches)))
+        added[theme_index] = sum(add_questions(bank, theme_index, questions) for questions in results)
+        logger.info(f"Theme {theme_index}: added {added[theme_index]} questions")
+
+    if any(added.values()):
+        save_bank(bank)
+    return added
+
+
+def stats() -> Dict:
+    bank = load_bank()
+    if not bank:
+        return {"path": str(BANK_PATH), "exists": False}
+    return {
+        "path": str(BANK_PATH),
+        "exists": True,
+        "version": bank.get("version"),
+        "updated_at": bank.get("updated_at"),
+        "questions_per_theme": {
+            THEME_FOCUSES[int(key)]: len(entries) for key, entries in sorted(bank.get("themes", {}).items())
+        }
+    }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    parser = argparse.ArgumentParser(description="Manage the daily quiz question bank")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    generate_parser = subparsers.add_parser("generate", help="Generate new questions into the bank")
+    generate_parser.add_argument("--theme", type=int, action="append", help="Theme index (repeatable, default: all)")
+    generate_parser.add_argument("--batches", type=int, default=3, help="LLM calls per theme")
+    generate_parser.add_argument("--per-batch", type=int, default=10, help="Questions per LLM call")
+    generate_parser.add_argument("--concurrency", type=int, default=3)
+
+    subparsers.add_parser("stats", help="Show bank version and size")
+
+    args = parser.parse_args()
+    if args.command == "generate":
+        themes = args.theme or list(range(len(THEME_FOCUSES)))
+        print(json.dumps(asyncio.run(generate(themes, args.batches, args.per_batch, args.concurrency)), indent=2))
+    else:
+        print(json.dumps(stats(), indent=2))
@@ -0,0 +1,172 @@
+"""
+Daily reflection trend analytics for HeartLift
+Rolling rating averages, streaks, coach-usage distribution and rating trends computed
+server-side with pandas/NumPy, so the frontend charts a small summary instead of
+downloading a user's full reflection history.
+
+Results are cached per user and invalidated whenever the user saves a reflection.
+"""
+import os
+import logging
+from datetime import datetime, timedelta, date
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from cache import LRUCache
+from database import supabase
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WINDOWS = (7, 30)
+MAX_ANALYTICS_DAYS = 365
+MAX_WINDOWS = 5
+ANALYTICS_COLUMNS = 'reflection_date, conversation_rating, coaches_chatted_with, helpful_moments'
+
+# user_id -> {(today, days, windows): result}; popped on save so a user's entries go together
+_analytics_cache = LRUCache(
+    max_size=int(os.environ.get('REFLECTION_ANALYTICS_CACHE_SIZE', '2000')),
+    name="reflection_analytics"
+)
+
+
+def _longest_run(active: np.ndarray) -> int:
+    """Length of the longest run of True values"""
+    if not active.any():
+        return 0
+    # Run boundaries are where the padded series flips
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], active.astype(np.int8), [0]))))
+    return int((edges[1::2] - edges[::2]).max())
+
+
+def _current_run(active: np.ndarray) -> int:
+    """Consecutive True values at the end of the series - today may still be pending"""
+    if len(active) and not active[-1]:
+        active = active[:-1]
+    misses = np.flatnonzero(~active)
+    return int(len(active) - (misses[-1] + 1 if len(misses) else 0))
+
+
+def _slope(values: pd.Series) -> Optional[float]:
+    """Least-squares change per day over the non-missing values (None with < 3 points)"""
+    points = values.dropna()
+    if len(points) < 3:
+        return None
+    x = (points.index - points.index[0]).days.to_numpy(dtype=float)
+    return round(float(np.polyfit(x, points.to_numpy(dtype=float), 1)[0]), 4) + 0.0  # no -0.0
+
+
+def compute_reflection_analytics(
+    reflections: List[Dict],
+    days: int = 90,
+    windows: Sequence[int] = DEFAULT_WINDOWS,
+    today: Optional[date] = None
+) -> Dict:
+    """
+    Trend analytics over a user's reflections
+
+    Args:
+        reflections: daily_reflections rows (reflection_date, conversation_rating,
+            coaches_chatted_with, helpful_moments)
+        days: Length of the analysed period, ending today
+        windows: Rolling-average / trend window sizes in days
+        today: Period end, defaults to today UTC
+
+    Returns:
+        {period, summary, streaks, coach_usage, trends, series}
+        series has one entry per day: {date, rating, reflected, rolling_<w>d...}
+    """
+    today = today or datetime.utcnow().date()
+    start = today - timedelta(days=days - 1)
+    calendar = pd.date_range(start, today, freq="D")
+
+    frame = pd.DataFrame(reflections, columns=[
+        'reflection_date', 'conversation_rating', 'coaches_chatted_with', 'helpful_moments'
+    ])
+    frame['reflection_date'] = pd.to_datetime(frame['reflection_date'].astype(str).str[:10], errors='coerce')
+    frame = frame.dropna(subset=['reflection_date'])
+    frame = frame[(frame['reflection_date'] >= calendar[0]) & (frame['reflection_date'] <= calendar[-1])]
+    # One reflection per day (the table enforces it, but don't trust imports)
+    frame = frame.drop_duplicates('reflection_date', keep='last').set_index('reflection_date').sort_index()
+
+    ratings = pd.to_numeric(frame['conversation_rating'], errors='coerce').reindex(calendar)
+    reflected = pd.Series(calendar.isin(frame.index), index=calendar)
+
+    rolling = {
+        window: ratings.rolling(window, min_periods=1).mean()
+        for window in windows
+    }
+
+    coaches = frame['coaches_chatted_with'].dropna().explode().dropna()
+    coach_counts = coaches.value_counts()
+    coach_total = int(coach_counts.sum())
+
+    series = pd.DataFrame({"rating": ratings, "reflected": reflected})
+    for window, values in rolling.items():
+        series[f"rolling_{window}d"] = values.round(2)
+    series.index = series.index.strftime("%Y-%m-%d")
+    series = series.astype(object).where(series.notna(), None)
+
+    helpful = frame['helpful_moments'].fillna('').astype(str).str.strip() != ''
+
+    return {
+        "period": {"start": start.isoformat(), "end": today.isoformat(), "days": days},
+        "summary": {
+            "reflections": int(reflected.sum()),
+            "rated_reflections": int(ratings.notna().sum()),
+            "average_rating": None if ratings.notna().sum() == 0 else round(float(ratings.mean()), 2),
+            "reflection_rate": round(float(reflected.mean()), 3),
+            "with_helpful_moments": int(helpful.sum()),
+        },
+        "streaks": {
+            "current": _current_run(reflected.to_numpy()),
+            "longest": _longest_run(reflected.to_numpy()),
+        },
+        "coach_usage": [
+            {"coach_id": coach, "days": int(count), "share": round(float(count) / coach_total, 3)}
+            for coach, count in coach_counts.items()
+        ],
+        "trends": {
+            f"{window}d": {
+                "average_rating": None if ratings.iloc[-window:].notna().sum() == 0
+                else round(float(ratings.iloc[-window:].mean()), 2),
+                "slope_per_day": _slope(ratings.iloc[-window:]),
+            }
+            for window in windows
+        },
+        "series": [{"date": day, **values} for day, values in series.to_dict(orient="index").items()],
+    }
+
+
+def get_reflection_analytics(user_id: str, days: int = 90, windows: Sequence[int] = DEFAULT_WINDOWS) -> Dict:
+    """Analytics for a user, from cache when nothing has been saved since the last request"""
+    today = datetime.utcnow().date()
+    key = (today.isoformat(), days, tuple(windows))
+    cached = _analytics_cache.get(user_id) or {}
+    if key in cached:
+        return cached[key]
+
+    start = today - timedelta(days=days - 1)
+    response = supabase.table('daily_reflections') \
+        .select(ANALYTICS_COLUMNS) \
+        .eq('user_id', user_id) \
+        .gte('reflection_date', start.isoformat()) \
+        .order('reflection_date', desc=False) \
+        .execute()
+
+    result = compute_reflection_analytics(response.data or [], days=days, windows=windows, today=today)
+    # Entries from earlier days can't be hit again
+    entries = {k: v for k, v in cached.items() if k[0] == key[0]}
+    entries[key] = result
+    _analytics_cache.set(user_id, entries)
+    return result
+
+
+def invalidate_user(user_id: str):
+    """Drop a user's cached analytics (call after saving a reflection)"""
+    _analytics_cache.pop(user_id)
+
+
+def cache_stats() -> Dict:
+    return _analytics_cache.stats()
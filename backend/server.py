@@ -1,37 +1,41 @@
-from fastapi import FastAPI, APIRouter, HTTPException
+from fastapi import FastAPI, APIRouter, HTTPException, BackgroundTasks, Response, Request
+from fastapi.responses import StreamingResponse, FileResponse, RedirectResponse
+from fastapi.concurrency import run_in_threadpool
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 import os
+import hmac
+import base64
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field
 from typing import List, Optional, Dict
 import uuid
-from datetime import datetime, timedelta, date
-from ai_service import ai_service
-from supabase import create_client, Client
+from datetime import datetime, timedelta, date, timezone
 
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# Configure logging FIRST
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-)
+# Configure logging FIRST (LOG_FORMAT, LOG_LEVEL, LOG_LEVELS - see logging_config.py)
+import logging_config
+logging_config.configure_logging()
 logger = logging.getLogger(__name__)
 
-# Supabase connection
-SUPABASE_URL = os.environ.get('SUPABASE_URL', '')
-SUPABASE_SERVICE_KEY = os.environ.get('SUPABASE_SERVICE_KEY', '')
+import tracing
 
-if not SUPABASE_URL or not SUPABASE_SERVICE_KEY:
-    logger.error("❌ SUPABASE_URL and SUPABASE_SERVICE_KEY must be set in environment")
-    raise RuntimeError("Supabase credentials not configured")
-
-supabase: Client = create_client(SUPABASE_URL, SUPABASE_SERVICE_KEY)
-logger.info(f"✅ Supabase connected to: {SUPABASE_URL}")
+from ai_service import ai_service
+from database import supabase
+import feature_store
+import progress_scoring
+import reflection_analytics
+import pagination
+import bulk_io
+import media_store
+import image_derivatives
+import tts_cache
+import metrics
+from heart_vision_jobs import job_queue, QueueFullError
 
 # Create the main app without a prefix
 app = FastAPI()
@@ -85,20 +89,31 @@ class TextSuggestionsRequest(BaseModel):
 class QuizAnalysisRequest(BaseModel):
     questions_and_answers: List[Dict]
     user_id: Optional[str] = None
+    fast: bool = False  # Return local result instantly, fetch LLM narrative via analysisId
 
 # Heart Vision Models
 class HeartVisionRequest(BaseModel):
     prompt: str
     user_name: Optional[str] = None
+    include_base64: bool = True  # Older app builds read image_base64; new ones use image_url
+    user_id: Optional[str] = None
+    reuse: bool = True  # Allow a cached image for the same prompt
+    variation: Optional[int] = None  # Opt-in seed for a fresh image, cached per user
 
 # Insights Models
 class InsightsRequest(BaseModel):
     user_id: str
+    refresh: bool = False  # Skip the precomputed report and generate live
+    cached_only: bool = False  # Only serve a precomputed report (404 when there isn't a fresh one)
 
 # Text to Speech Models
 class TextToSpeechRequest(BaseModel):
     text: str
     voice: str = "shimmer"  # Default to shimmer (most soothing)
+    model: str = tts_cache.DEFAULT_MODEL
+    format: str = tts_cache.DEFAULT_FORMAT
+    # Older clients play the inlined base64; newer ones stream audio_url
+    include_base64: bool = True
 
 # Daily Reflection Models
 class DailyReflectionSave(BaseModel):
@@ -181,7 +196,7 @@ async def get_status_checks():
 # ============ AI ENDPOINTS ============
 
 @api_router.post("/ai/chat", response_model=ChatResponse)
-async def ai_chat(request: ChatRequest):
+async def ai_chat(request: ChatRequest, background_tasks: BackgroundTasks):
     """
     Chat with an AI coach
     """
@@ -195,63 +210,69 @@ async def ai_chat(request: ChatRequest):
         # Fetch user's recent reflections for personalization
         user_reflections = None
         if request.user_id:
-            try:
-                logger.info(f"Fetching reflections for user {request.user_id} to personalize chat")
+            with tracing.span("chat.fetch_reflections", table="daily_reflections") as stage:
+                try:
+                    logger.debug("Fetching reflections for user %s to personalize chat", request.user_id)
                 
-                # Fetch from Supabase daily_reflections table
-                response = supabase.table('daily_reflections') \
-                    .select('*') \
-                    .eq('user_id', request.user_id) \
-                    .order('reflection_date', desc=True) \
-                    .limit(3) \
-                    .execute()
+                    # Fetch from Supabase daily_reflections table
+                    response = supabase.table('daily_reflections') \
+                        .select('*') \
+                        .eq('user_id', request.user_id) \
+                        .order('reflection_date', desc=True) \
+                        .limit(3) \
+                        .execute()
                 
-                if response.data:
-                    user_reflections = response.data
-                    logger.info(f"Found {len(response.data)} reflections for context")
-            except Exception as e:
-                logger.warning(f"Could not fetch reflections: {e}")
-                # Continue without reflections if fetch fails
+                    if response.data:
+                        user_reflections = response.data
+                        logger.debug("Found %d reflections for context", len(response.data))
+                    stage.set_attribute("rows", len(response.data or []))
+                except Exception as e:
+                    logger.warning("Could not fetch reflections: %s", e)
+                    stage.record_error(e)
+                    # Continue without reflections if fetch fails
         
         # If this is the first message of today, fetch yesterday's conversation for context
         if request.user_id and not history_dicts:
-            try:
-                from datetime import timedelta
-                yesterday = datetime.now().date() - timedelta(days=1)
-                yesterday_start = datetime.combine(yesterday, datetime.min.time())
-                yesterday_end = datetime.combine(yesterday, datetime.max.time())
+            with tracing.span("chat.fetch_yesterday", table="conversation_history") as stage:
+                try:
+                    from datetime import timedelta
+                    yesterday = datetime.now().date() - timedelta(days=1)
+                    yesterday_start = datetime.combine(yesterday, datetime.min.time())
+                    yesterday_end = datetime.combine(yesterday, datetime.max.time())
                 
-                logger.info(f"Fetching yesterday's conversation ({yesterday}) for context")
+                    logger.debug("Fetching yesterday's conversation (%s) for context", yesterday)
                 
-                # Fetch yesterday's messages from this coach
-                yesterday_response = supabase.table('conversation_history') \
-                    .select('message_content, sender') \
-                    .eq('user_id', request.user_id) \
-                    .eq('coach_id', request.coach_id) \
-                    .gte('created_at', yesterday_start.isoformat()) \
-                    .lte('created_at', yesterday_end.isoformat()) \
-                    .order('created_at', desc=False) \
-                    .execute()
+                    # Fetch yesterday's messages from this coach
+                    yesterday_response = supabase.table('conversation_history') \
+                        .select('message_content, sender') \
+                        .eq('user_id', request.user_id) \
+                        .eq('coach_id', request.coach_id) \
+                        .gte('created_at', yesterday_start.isoformat()) \
+                        .lte('created_at', yesterday_end.isoformat()) \
+                        .order('created_at', desc=False) \
+                        .execute()
                 
-                if yesterday_response.data and len(yesterday_response.data) > 0:
-                    # Create a summary of yesterday's key points
-                    summary_text = "Key points from yesterday:\n"
-                    user_messages = [msg for msg in yesterday_response.data if msg.get('sender') == 'user']
+                    if yesterday_response.data and len(yesterday_response.data) > 0:
+                        # Create a summary of yesterday's key points
+                        summary_text = "Key points from yesterday:\n"
+                        user_messages = [msg for msg in yesterday_response.data if msg.get('sender') == 'user']
                     
-                    # Get the most significant user messages (first and last few)
-                    if len(user_messages) > 0:
-                        # Take first 2 and last 2 messages for context
-                        key_messages = user_messages[:2] + user_messages[-2:] if len(user_messages) > 4 else user_messages
-                        for msg in key_messages:
-                            content = msg.get('message_content', '')[:150]  # Limit length
-                            summary_text += f"- User mentioned: {content}\n"
+                        # Get the most significant user messages (first and last few)
+                        if len(user_messages) > 0:
+                            # Take first 2 and last 2 messages for context
+                            key_messages = user_messages[:2] + user_messages[-2:] if len(user_messages) > 4 else user_messages
+                            for msg in key_messages:
+                                content = msg.get('message_content', '')[:150]  # Limit length
+                                summary_text += f"- User mentioned: {content}\n"
                         
-                        ai_service.set_yesterday_summary(summary_text)
-                        logger.info(f"Set yesterday's summary with {len(key_messages)} key points")
-            except Exception as e:
-                logger.warning(f"Could not fetch yesterday's conversation: {e}")
-                # Continue without yesterday's context
-        
+                            ai_service.set_yesterday_summary(summary_text)
+                            logger.debug("Set yesterday's summary with %d key points", len(key_messages))
+                except Exception as e:
+                    logger.warning("Could not fetch yesterday's conversation: %s", e)
+                    stage.record_error(e)
+                    # Continue without yesterday's context
+        
+        # Traced as ai_service.chat_with_coach (prompt assembly + LLM call)
         response = await ai_service.chat_with_coach(
             coach_id=request.coach_id,
             user_message=request.message,
@@ -262,25 +283,31 @@ async def ai_chat(request: ChatRequest):
         )
         
         # Track usage for monitoring
-        try:
-            supabase.table('usage_tracking').insert({
-                "type": "coach_chat",
-                "coach_id": request.coach_id,
-                "user_id": request.user_id,
-                "session_id": session_id,
-                "timestamp": datetime.utcnow().isoformat(),
-                "message_length": len(request.message),
-                "response_length": len(response),
-                "success": True
-            }).execute()
-        except Exception as track_error:
-            logger.warning(f"Failed to track usage: {track_error}")
-            # Don't fail the request if tracking fails
+        with tracing.span("chat.track_usage", table="usage_tracking") as stage:
+            try:
+                supabase.table('usage_tracking').insert({
+                    "type": "coach_chat",
+                    "coach_id": request.coach_id,
+                    "user_id": request.user_id,
+                    "session_id": session_id,
+                    "timestamp": datetime.utcnow().isoformat(),
+                    "message_length": len(request.message),
+                    "response_length": len(response),
+                    "success": True
+                }).execute()
+            except Exception as track_error:
+                logger.warning("Failed to track usage: %s", track_error)
+                stage.record_error(track_error)
+                # Don't fail the request if tracking fails
+        
+        # Update the user's insight features after the response is sent
+        if request.user_id:
+            background_tasks.add_task(feature_store.record_message, request.user_id, request.message)
         
         return ChatResponse(response=response, session_id=session_id)
         
     except Exception as e:
-        logger.error(f"Error in ai_chat endpoint: {e}", exc_info=True)
+        logger.error("Error in ai_chat endpoint: %s", e, exc_info=True)
         
         # Track failed request
         try:
@@ -293,7 +320,7 @@ async def ai_chat(request: ChatRequest):
                 "error": str(e)
             }).execute()
         except Exception as track_error:
-            logger.warning(f"Failed to track error: {track_error}")
+            logger.warning("Failed to track error: %s", track_error)
         
         raise HTTPException(status_code=500, detail="Failed to get AI response")
 
@@ -322,7 +349,8 @@ async def analyze_quiz(request: QuizAnalysisRequest):
     try:
         result = await ai_service.analyze_attachment_quiz(
             questions_and_answers=request.questions_and_answers,
-            user_id=request.user_id
+            user_id=request.user_id,
+            fast=request.fast
         )
         
         return result
@@ -331,6 +359,19 @@ async def analyze_quiz(request: QuizAnalysisRequest):
         logger.error(f"Error analyzing quiz: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to analyze quiz")
 
+@api_router.get("/ai/quiz/analyze/{analysis_id}")
+async def get_quiz_analysis(analysis_id: str):
+    """
+    Get the LLM-enriched result of a fast quiz analysis
+    status is "pending" until the narrative is ready, then "complete" (or "failed",
+    in which case result is still the local analysis)
+    """
+    enrichment = ai_service.get_quiz_enrichment(analysis_id)
+    if not enrichment:
+        raise HTTPException(status_code=404, detail="Quiz analysis not found or expired")
+    
+    return enrichment
+
 @api_router.post("/ai/analyze-conversation")
 async def analyze_conversation(request: ConversationAnalysisRequest):
     """
@@ -367,97 +408,220 @@ async def generate_text_suggestions(request: TextSuggestionsRequest):
         raise HTTPException(status_code=500, detail="Failed to generate suggestions")
 
 @api_router.post("/ai/heart-vision")
-async def generate_heart_vision(request: HeartVisionRequest):
+async def generate_heart_vision(request: HeartVisionRequest, background_tasks: BackgroundTasks):
     """
     Generate a professional, photorealistic HeartVision image
     """
     try:
         result = await ai_service.generate_heart_vision(
             prompt=request.prompt,
-            user_name=request.user_name
+            user_name=request.user_name,
+            include_base64=request.include_base64,
+            user_id=request.user_id,
+            reuse=request.reuse,
+            variation=request.variation
         )
         
+        # Thumbnails for the gallery, rendered after the response is sent
+        background_tasks.add_task(image_derivatives.create_variants_in_background, result['image_key'])
+        result['variants'] = image_derivatives.variant_urls(result['image_key'])
+        
         return result
         
     except Exception as e:
         logger.error(f"Error generating heart vision: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
+@api_router.post("/ai/heart-vision/jobs", status_code=202)
+async def create_heart_vision_job(request: HeartVisionRequest):
+    """
+    Queue a HeartVision image and return straight away
+    
+    Poll /ai/heart-vision/jobs/{job_id} or subscribe to its /events stream for the result
+    """
+    try:
+        job = await job_queue.submit(
+            prompt=request.prompt,
+            user_name=request.user_name,
+            user_id=request.user_id,
+            reuse=request.reuse,
+            variation=request.variation
+        )
+    except QueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    return {
+        **job_queue.public_view(job),
+        "status_url": f"/api/ai/heart-vision/jobs/{job['id']}",
+        "events_url": f"/api/ai/heart-vision/jobs/{job['id']}/events"
+    }
+
+@api_router.get("/ai/heart-vision/jobs/{job_id}")
+async def get_heart_vision_job(job_id: str):
+    """
+    HeartVision job status - result holds image_url, variants and caption once succeeded
+    """
+    job = job_queue.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job_queue.public_view(job)
+
+@api_router.get("/ai/heart-vision/jobs/{job_id}/events")
+async def stream_heart_vision_job(job_id: str):
+    """
+    Server-sent events for a HeartVision job, closed once it succeeds or fails
+    """
+    if not job_queue.get(job_id):
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(
+        job_queue.events(job_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+MEDIA_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@api_router.get("/media/{key}")
+async def get_media(key: str, request: Request, size: Optional[str] = None, format: str = "webp"):
+    """
+    Serve stored media (HeartVision images) as raw bytes
+    
+    Keys are content hashes, so responses are cacheable forever and
+    revalidation is a plain ETag match
+    
+    Args:
+        size: Resized variant ("thumb" or "medium"), default the original
+        format: Variant format, "webp" or "avif"
+    """
+    path = media_store.get_path(key)
+    if not path:
+        raise HTTPException(status_code=404, detail="Media not found")
+    
+    if size:
+        if size not in image_derivatives.SIZES or format not in image_derivatives.FORMATS:
+            raise HTTPException(status_code=400, detail=f"size must be one of {list(image_derivatives.SIZES)}, "
+                                                        f"format one of {list(image_derivatives.FORMATS)}")
+        try:
+            variant = await image_derivatives.get_variant(key, size, format)
+        except Exception as e:
+            logger.error("Error creating %s %s variant of %s: %s", size, format, key, e, exc_info=True)
+            variant = None
+        if not variant:
+            raise HTTPException(status_code=404, detail=f"{format} variant unavailable")
+        key, path = variant, media_store.get_path(variant)
+    
+    etag = media_store.etag_for(key)
+    headers = {"ETag": etag, "Cache-Control": MEDIA_CACHE_CONTROL}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    
+    return FileResponse(path, media_type=media_store.content_type_for(key), headers=headers)
+
+INSIGHTS_LOOKBACK_DAYS = 30
+# Precomputed reports older than this are regenerated live
+PRECOMPUTED_INSIGHTS_MAX_AGE_HOURS = int(os.environ.get('PRECOMPUTED_INSIGHTS_MAX_AGE_HOURS', '36'))
+# Recent quiz results that vote on the report's attachment style
+QUIZ_RESULTS_FOR_STYLE = 10
+
+async def build_insights_report(user_id: str) -> Dict:
+    """
+    Gather a user's recent conversations and reflections and generate their insights report
+    Shared by /api/ai/insights and the nightly insights pipeline
+    """
+    logger.info("Generating insights for user %s", user_id)
+    
+    # One compact feature row instead of rescanning conversations and reflections
+    features = None
+    try:
+        # Blocking Supabase reads (a first backfill pages through 90 days) - keep them off the event loop
+        features = await run_in_threadpool(feature_store.load_user_features, user_id)
+    except Exception as e:
+        logger.warning("Could not load insight features: %s", e)
+    
+    summary = feature_store.summarize_features(features or {}, lookback_days=INSIGHTS_LOOKBACK_DAYS)
+    conversation_count = summary['conversation_count']
+    mood_entries_count = summary['mood_entries_count']
+    
+    if summary['topics_ranked']:
+        recent_conversations = [topic for topic, _ in summary['topics']]
+    else:
+        recent_conversations = [f"{topic.replace('_', ' ')} ({count} messages)" for topic, count in summary['topics']]
+    recent_moods = [f"Feeling {mood} ({count} times)" for mood, count in summary['moods']]
+    recent_moods += [f"Reflected on {theme.replace('_', ' ')}" for theme, _ in summary['reflection_themes']]
+    if summary['average_rating'] is not None:
+        recent_moods.append(f"Average coaching session rating {summary['average_rating']}/5")
+    
+    logger.debug("Using insight features: %d messages, %d reflections", conversation_count, mood_entries_count)
+    
+    # Score and attachment style are computed, not left to the LLM
+    quiz_results = []
+    try:
+        quiz_results = supabase.table('quiz_results') \
+            .select('attachment_style, completed_at') \
+            .eq('user_id', user_id) \
+            .order('completed_at', desc=True) \
+            .limit(QUIZ_RESULTS_FOR_STYLE) \
+            .execute().data or []
+    except Exception as e:
+        logger.warning("Could not load quiz results: %s", e)
+    progress = progress_scoring.compute_healing_progress(features or {}, quiz_results)
+    
+    # Generate insights with real data
+    insights = await ai_service.generate_personalized_insights(
+        user_id=user_id,
+        conversation_count=conversation_count,
+        mood_entries_count=mood_entries_count,
+        recent_conversations=recent_conversations if recent_conversations else ["Starting healing journey"],
+        recent_moods=recent_moods if recent_moods else ["Building self-awareness"],
+        progress=progress
+    )
+    
+    return insights
+
+def get_latest_precomputed_insights(user_id: str) -> Optional[Dict]:
+    """
+    Latest precomputed insights report for a user, if it's fresh enough to serve
+    """
+    cutoff = (datetime.utcnow() - timedelta(hours=PRECOMPUTED_INSIGHTS_MAX_AGE_HOURS)).isoformat()
+    response = supabase.table('insights_reports') \
+        .select('insights, created_at') \
+        .eq('user_id', user_id) \
+        .eq('report_type', 'precomputed') \
+        .gte('created_at', cutoff) \
+        .order('created_at', desc=True) \
+        .limit(1) \
+        .execute()
+    
+    return response.data[0] if response.data else None
+
 @api_router.post("/ai/insights")
 async def generate_insights(request: InsightsRequest):
     """
     Generate personalized insights report based on actual user data
+    Serves the nightly precomputed report when one is fresh, otherwise generates live
+    (cached_only requests - the insights screen opening - never generate)
     """
     try:
         user_id = request.user_id
-        logger.info(f"Generating insights for user {user_id}")
         
-        # Fetch actual conversation data from Supabase
-        recent_conversations = []
-        conversation_count = 0
-        
-        try:
-            # Get recent conversations from last 30 days
-            thirty_days_ago = (datetime.utcnow() - timedelta(days=30)).isoformat()
-            conv_response = supabase.table('conversation_history') \
-                .select('message, coach_name') \
-                .eq('user_id', user_id) \
-                .eq('sender', 'user') \
-                .gte('created_at', thirty_days_ago) \
-                .order('created_at', desc=True) \
-                .limit(50) \
-                .execute()
-            
-            if conv_response.data:
-                conversation_count = len(conv_response.data)
-                # Extract conversation topics/themes from user messages
-                recent_conversations = [msg['message'][:100] for msg in conv_response.data[:10]]
-                logger.info(f"Found {conversation_count} conversations for user")
-        except Exception as e:
-            logger.warning(f"Could not fetch conversations from Supabase: {e}")
-        
-        # Fetch daily reflections from Supabase
-        recent_moods = []
-        mood_entries_count = 0
+        if not request.refresh:
+            try:
+                precomputed = get_latest_precomputed_insights(user_id)
+                if precomputed:
+                    logger.info("Serving precomputed insights for user %s from %s", user_id, precomputed['created_at'])
+                    return {**precomputed['insights'], "generatedAt": precomputed['created_at'], "precomputed": True}
+            except Exception as e:
+                logger.warning("Could not fetch precomputed insights: %s", e)
+            if request.cached_only:
+                raise HTTPException(status_code=404, detail="No precomputed insights for this user")
         
-        try:
-            thirty_days_ago_date = (datetime.utcnow() - timedelta(days=30)).strftime('%Y-%m-%d')
-            reflections_response = supabase.table('daily_reflections') \
-                .select('*') \
-                .eq('user_id', user_id) \
-                .gte('reflection_date', thirty_days_ago_date) \
-                .order('reflection_date', desc=True) \
-                .limit(20) \
-                .execute()
-            
-            reflections = reflections_response.data if reflections_response.data else []
-            mood_entries_count = len(reflections)
-            
-            # Extract mood/emotional themes from reflections
-            for reflection in reflections[:10]:
-                if reflection.get('grateful_for'):
-                    recent_moods.append(f"Grateful for: {reflection['grateful_for'][:50]}")
-                if reflection.get('proud_of'):
-                    recent_moods.append(f"Proud of: {reflection['proud_of'][:50]}")
-                if reflection.get('helpful_moment'):
-                    recent_moods.append(f"Helpful: {reflection['helpful_moment'][:50]}")
-            
-            logger.info(f"Found {mood_entries_count} reflections for user")
-        except Exception as e:
-            logger.warning(f"Could not fetch reflections from Supabase: {e}")
-        
-        # Generate insights with real data
-        insights = await ai_service.generate_personalized_insights(
-            user_id=user_id,
-            conversation_count=conversation_count,
-            mood_entries_count=mood_entries_count,
-            recent_conversations=recent_conversations if recent_conversations else ["Starting healing journey"],
-            recent_moods=recent_moods if recent_moods else ["Building self-awareness"]
-        )
+        insights = await build_insights_report(user_id)
         
-        logger.info(f"Successfully generated insights for user {user_id}")
-        return insights
+        logger.info("Successfully generated insights for user %s", user_id)
+        return {**insights, "generatedAt": datetime.utcnow().isoformat(), "precomputed": False}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error generating insights: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to generate insights")
@@ -466,76 +630,166 @@ async def generate_insights(request: InsightsRequest):
 async def text_to_speech(request: TextToSpeechRequest):
     """
     Generate soothing text-to-speech audio for visualization practices
+    
+    Audio is cached on disk by (text, voice, model, format) - repeat plays of a
+    script make no OpenAI call - and served from audio_url
     """
     try:
-        audio_base64 = await ai_service.generate_text_to_speech(
+        result = await ai_service.get_speech_audio(
             text=request.text,
-            voice=request.voice
+            voice=request.voice,
+            model=request.model,
+            fmt=request.format
         )
-        
-        return {"audio": audio_base64}
-        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
-        logger.error(f"Error generating TTS: {e}", exc_info=True)
+        logger.error("Error generating TTS: %s", e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+    
+    if request.include_base64:
+        result["audio"] = base64.b64encode(tts_cache.get_path(result["audio_key"]).read_bytes()).decode('utf-8')
+    return result
+
+async def open_tts_stream(text: str, voice: str, model: str, fmt: str):
+    """Start a TTS stream, mapping failures to HTTP errors before any audio is sent"""
+    try:
+        return await ai_service.stream_speech(text=text, voice=voice, model=model, fmt=fmt)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error("Error streaming TTS: %s", e, exc_info=True)
+        raise HTTPException(status_code=502, detail=str(e))
+
+def tts_streaming_response(chunks, cached: bool, fmt: str) -> StreamingResponse:
+    return StreamingResponse(
+        chunks,
+        media_type=tts_cache.CONTENT_TYPES[fmt],
+        headers={"X-TTS-Cache": "hit" if cached else "miss", "Cache-Control": "no-store"}
+    )
+
+@api_router.post("/ai/text-to-speech/stream")
+async def text_to_speech_stream(request: TextToSpeechRequest):
+    """
+    Stream text-to-speech audio as it's synthesized (chunked audio/mpeg, or Opus)
+    
+    Playback can start on the first chunk instead of after the whole clip,
+    without the base64/JSON overhead of /ai/text-to-speech
+    """
+    chunks, cached = await open_tts_stream(request.text, request.voice, request.model, request.format)
+    return tts_streaming_response(chunks, cached, request.format)
+
+@api_router.post("/ai/text-to-speech/prepare")
+async def text_to_speech_prepare(request: TextToSpeechRequest):
+    """
+    Register a text for playback and get a short URL to use as an <audio> src
+    
+    Long scripts don't fit in a query string (proxy URL limits, access logs), so
+    the text is posted here and the URL carries only its cache key
+    
+    Returns:
+        {audio_key, stream_url, cached} - stream_url is /api/tts/{key} when the
+        audio is already cached, else the key's streaming URL
+    """
+    try:
+        key = tts_cache.register_text(request.text, request.voice, request.model, request.format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    cached = tts_cache.get_path(key) is not None
+    stream_url = tts_cache.url_for(key) if cached else f"/api/ai/text-to-speech/stream/{key}"
+    return {"audio_key": key, "stream_url": stream_url, "cached": cached}
+
+@api_router.get("/ai/text-to-speech/stream/{key}")
+async def text_to_speech_stream_key(key: str):
+    """
+    Stream the audio for a text registered with POST /ai/text-to-speech/prepare,
+    usable directly as an <audio> src
+    
+    Audio that's already cached redirects to /api/tts/{key}, which supports
+    seeking and browser caching
+    """
+    if tts_cache.get_path(key):
+        return RedirectResponse(tts_cache.url_for(key), status_code=307)
+    registered = tts_cache.registered_text(key) if tts_cache.is_valid_key(key) else None
+    if not registered:
+        raise HTTPException(status_code=404, detail="Unknown audio key - prepare the text first")
+    text, voice, model, fmt = registered
+    chunks, cached = await open_tts_stream(text, voice, model, fmt)
+    if cached:
+        await chunks.aclose()
+        return RedirectResponse(tts_cache.url_for(key), status_code=307)
+    return tts_streaming_response(chunks, cached, fmt)
+
+@api_router.get("/tts/{key}")
+async def get_tts_audio(key: str, request: Request):
+    """
+    Serve cached TTS audio as raw bytes
+    
+    Supports single byte ranges (206 Partial Content) so <audio> elements can
+    seek and resume without downloading the whole file again
+    """
+    path = tts_cache.get_path(key)
+    if not path:
+        raise HTTPException(status_code=404, detail="Audio not found")
+    
+    etag = tts_cache.etag_for(key)
+    headers = {"ETag": etag, "Cache-Control": MEDIA_CACHE_CONTROL, "Accept-Ranges": "bytes"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    
+    size = path.stat().st_size
+    byte_range = None
+    # If-Range: only honour the range if the client's copy is still this one
+    if request.headers.get("if-range", etag) == etag:
+        try:
+            byte_range = tts_cache.parse_range(request.headers.get("range"), size)
+        except ValueError:
+            return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+    
+    if byte_range is None:
+        return FileResponse(path, media_type=tts_cache.content_type_for(key), headers=headers)
+    
+    start, end = byte_range
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return Response(content=data, status_code=206, media_type=tts_cache.content_type_for(key), headers=headers)
 
 # ============ DAILY REFLECTION ENDPOINTS ============
 
 @api_router.post("/reflections/save")
-async def save_daily_reflection(request: DailyReflectionSave):
+async def save_daily_reflection(request: DailyReflectionSave, background_tasks: BackgroundTasks):
     """
     Save or update daily reflection
+    
+    One upsert on UNIQUE(user_id, reflection_date) - a single round trip, and
+    double-submits for the same day update one row instead of racing to insert two
     """
     try:
-        logger.info(f"Saving reflection for user {request.user_id} on {request.reflection_date}")
+        logger.info("Saving reflection for user %s on %s", request.user_id, request.reflection_date)
         
-        # Check if reflection already exists for this user and date
-        existing_response = supabase.table('daily_reflections') \
-            .select('*') \
-            .eq('user_id', request.user_id) \
-            .eq('reflection_date', request.reflection_date) \
+        reflection_data = {
+            "user_id": request.user_id,
+            "reflection_date": request.reflection_date,
+            "coaches_chatted_with": request.coaches_chatted_with,
+            "conversation_rating": request.conversation_rating,
+            "helpful_moments": request.helpful_moments,
+            "areas_for_improvement": request.areas_for_improvement,
+            "updated_at": datetime.utcnow().isoformat()
+        }
+        
+        upsert_response = supabase.table('daily_reflections') \
+            .upsert(reflection_data, on_conflict='user_id,reflection_date') \
             .execute()
+        reflection_analytics.invalidate_user(request.user_id)
         
-        now = datetime.utcnow().isoformat()
+        # Update the user's insight features once the save has gone through
+        background_tasks.add_task(feature_store.record_reflection, request.user_id, request.dict())
         
-        if existing_response.data and len(existing_response.data) > 0:
-            # Update existing reflection
-            existing = existing_response.data[0]
-            logger.info(f"Updating existing reflection: {existing['id']}")
-            
-            update_data = {
-                "coaches_chatted_with": request.coaches_chatted_with,
-                "conversation_rating": request.conversation_rating,
-                "helpful_moments": request.helpful_moments,
-                "areas_for_improvement": request.areas_for_improvement,
-                "updated_at": now
-            }
-            
-            updated_response = supabase.table('daily_reflections') \
-                .update(update_data) \
-                .eq('id', existing['id']) \
-                .execute()
-            
-            logger.info(f"Reflection updated successfully: {existing['id']}")
-            return updated_response.data[0] if updated_response.data else existing
-        else:
-            # Insert new reflection
-            logger.info("Inserting new reflection")
-            reflection_data = {
-                "user_id": request.user_id,
-                "reflection_date": request.reflection_date,
-                "coaches_chatted_with": request.coaches_chatted_with,
-                "conversation_rating": request.conversation_rating,
-                "helpful_moments": request.helpful_moments,
-                "areas_for_improvement": request.areas_for_improvement,
-            }
-            
-            insert_response = supabase.table('daily_reflections') \
-                .insert(reflection_data) \
-                .execute()
-            
-            logger.info(f"Reflection inserted successfully")
-            return insert_response.data[0] if insert_response.data else reflection_data
+        saved = upsert_response.data[0] if upsert_response.data else reflection_data
+        logger.info("Reflection saved successfully: %s", saved.get('id', 'N/A'))
+        return saved
             
     except Exception as e:
         logger.error(f"Error saving reflection: {e}", exc_info=True)
@@ -548,7 +802,7 @@ async def get_today_reflection(user_id: str):
     """
     try:
         today = datetime.utcnow().date().isoformat()
-        logger.info(f"Fetching today's reflection for user {user_id} on {today}")
+        logger.debug("Fetching today's reflection for user %s on %s", user_id, today)
         
         response = supabase.table('daily_reflections') \
             .select('*') \
@@ -557,7 +811,7 @@ async def get_today_reflection(user_id: str):
             .execute()
         
         if response.data and len(response.data) > 0:
-            logger.info(f"Found reflection: {response.data[0]['id']}")
+            logger.debug("Found reflection: %s", response.data[0]['id'])
             return response.data[0]
         else:
             logger.info("No reflection found for today")
@@ -567,59 +821,144 @@ async def get_today_reflection(user_id: str):
         logger.error(f"Error fetching today's reflection: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch reflection")
 
+MAX_REFLECTIONS_PAGE = 100
+MAX_REPORTS_PAGE = 50
+
 @api_router.get("/reflections/past/{user_id}")
-async def get_past_reflections(user_id: str, limit: int = 30):
+async def get_past_reflections(
+    user_id: str,
+    response: Response,
+    limit: int = 30,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None
+):
     """
-    Get ALL reflections for a user (including today)
+    Get a user's reflections, newest first (including today)
+    
+    Args:
+        limit: Page size (capped at MAX_REFLECTIONS_PAGE)
+        cursor: X-Next-Cursor header value from the previous page
+        fields: Comma-separated columns to return, e.g. "reflection_date,conversation_rating"
     """
+    columns = pagination.parse_fields(fields, pagination.REFLECTION_FIELDS, required=('reflection_date',))
     try:
-        logger.info(f"Fetching ALL reflections for user {user_id}")
-        
-        response = supabase.table('daily_reflections') \
-            .select('*') \
-            .eq('user_id', user_id) \
-            .order('reflection_date', desc=True) \
-            .limit(limit) \
-            .execute()
-        
-        reflections = response.data if response.data else []
+        logger.debug("Fetching reflections for user %s", user_id)
+        
+        query = supabase.table('daily_reflections') \
+            .select(', '.join(columns)) \
+            .eq('user_id', user_id)
+        # One reflection per user per day, so the date alone is a unique cursor
+        query = pagination.apply_cursor(query, cursor, 'reflection_date', unique_sort_key=True)
+        reflections, next_cursor = pagination.fetch_page(
+            query, pagination.clamp_limit(limit, MAX_REFLECTIONS_PAGE), 'reflection_date', unique_sort_key=True
+        )
+        if next_cursor:
+            response.headers[pagination.NEXT_CURSOR_HEADER] = next_cursor
         
-        logger.info(f"Found {len(reflections)} reflections")
+        logger.debug("Found %d reflections", len(reflections))
         return reflections
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching reflections: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch reflections")
 
+@api_router.get("/reflections/analytics/{user_id}")
+async def get_reflection_analytics(user_id: str, days: int = 90, windows: str = "7,30"):
+    """
+    Rolling averages, streaks, coach usage and rating trends over a user's reflections
+    
+    Args:
+        days: Period to analyse, ending today (max 365)
+        windows: Comma-separated rolling window sizes in days, e.g. "7,30"
+    """
+    try:
+        window_sizes = sorted({int(w) for w in windows.split(',') if w.strip()})
+    except ValueError:
+        raise HTTPException(status_code=400, detail="windows must be comma-separated day counts")
+    if not 1 <= days <= reflection_analytics.MAX_ANALYTICS_DAYS:
+        raise HTTPException(status_code=400, detail=f"days must be between 1 and {reflection_analytics.MAX_ANALYTICS_DAYS}")
+    if not window_sizes or len(window_sizes) > reflection_analytics.MAX_WINDOWS \
+            or not all(1 <= w <= days for w in window_sizes):
+        raise HTTPException(status_code=400, detail=f"windows must be 1-{reflection_analytics.MAX_WINDOWS} sizes between 1 and days")
+    
+    try:
+        return reflection_analytics.get_reflection_analytics(user_id, days=days, windows=window_sizes)
+    except Exception as e:
+        logger.error(f"Error computing reflection analytics: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to compute reflection analytics")
+
+@api_router.post("/reflections/import/{user_id}")
+async def import_reflections(user_id: str, request: Request, background_tasks: BackgroundTasks):
+    """
+    Bulk import reflections from an NDJSON body (one reflection per line)
+    
+    Upserted by day in chunks, so re-importing the same file is safe
+    """
+    try:
+        logger.info("Importing reflections for user %s", user_id)
+        result = await bulk_io.import_rows(
+            request.stream(), user_id, bulk_io.ReflectionImportRow, bulk_io.upsert_reflections
+        )
+        reflection_analytics.invalidate_user(user_id)
+        if result['imported']:
+            # Rebuild insight features from the imported history
+            background_tasks.add_task(feature_store.backfill_user_features, user_id)
+        logger.info("Reflections import for user %s: %d imported, %d failed", user_id, result['imported'], result['failed'])
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error importing reflections: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to import reflections")
+
+@api_router.get("/reflections/export/{user_id}")
+async def export_reflections(user_id: str):
+    """
+    Stream all of a user's reflections as NDJSON, newest first
+    """
+    return StreamingResponse(
+        bulk_io.export_rows('daily_reflections', user_id, ('*',), 'reflection_date', True),
+        media_type=bulk_io.NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="reflections-{user_id}.ndjson"'}
+    )
+
 # ============ INSIGHTS ENDPOINTS ============
 
+def build_insights_report_row(request: InsightsSaveRequest, report_type: str = "comprehensive") -> Dict:
+    """insights_reports row for a saved report - also used for precomputed reports"""
+    return {
+        "user_id": request.user_id,
+        "report_type": report_type,
+        "insights": request.insights,
+        "conversation_count": request.conversation_count,
+        "mood_entries_analyzed": request.mood_entries_analyzed,
+        "attachment_style": request.attachment_style,
+        "healing_progress_score": request.healing_progress_score,
+        "period_start": request.analysis_period_start,
+        "period_end": request.analysis_period_end,
+    }
+
 @api_router.post("/insights/save")
 async def save_insights_report(request: InsightsSaveRequest):
     """
     Save a generated insights report
+    
+    Precomputed reports are already stored by the pipeline, so they're not saved again
     """
+    if request.insights.get('precomputed'):
+        raise HTTPException(status_code=400, detail="Precomputed insights are already stored")
     try:
-        logger.info(f"Saving insights report for user {request.user_id}")
+        logger.info("Saving insights report for user %s", request.user_id)
         
-        now = datetime.utcnow().isoformat()
-        
-        report_data = {
-            "user_id": request.user_id,
-            "report_type": "comprehensive",
-            "insights": request.insights,
-            "conversation_count": request.conversation_count,
-            "mood_entries_analyzed": request.mood_entries_analyzed,
-            "attachment_style": request.attachment_style,
-            "healing_progress_score": request.healing_progress_score,
-            "period_start": request.analysis_period_start,
-            "period_end": request.analysis_period_end,
-        }
+        report_data = build_insights_report_row(request)
         
         response = supabase.table('insights_reports') \
             .insert(report_data) \
             .execute()
         
-        logger.info(f"Insights report saved successfully")
+        logger.info("Insights report saved successfully")
         return response.data[0] if response.data else report_data
         
     except Exception as e:
@@ -627,29 +966,91 @@ async def save_insights_report(request: InsightsSaveRequest):
         raise HTTPException(status_code=500, detail="Failed to save insights report")
 
 @api_router.get("/insights/reports/{user_id}")
-async def get_user_insights_reports(user_id: str, limit: int = 10):
+async def get_user_insights_reports(
+    user_id: str,
+    response: Response,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    view: str = "full"
+):
     """
-    Get all insights reports for a user
+    Get a user's insights reports, newest first
+    
+    Args:
+        limit: Page size (capped at MAX_REPORTS_PAGE)
+        cursor: X-Next-Cursor header value from the previous page
+        fields: Comma-separated columns to return
+        view: "full", or "summary" for report metadata without the insights JSON
     """
+    if view not in ("full", "summary"):
+        raise HTTPException(status_code=400, detail="view must be 'full' or 'summary'")
+    if view == "summary":
+        columns = pagination.parse_fields(
+            fields, pagination.REPORT_SUMMARY_FIELDS, required=('id', 'created_at'),
+            default=pagination.REPORT_SUMMARY_FIELDS
+        )
+    else:
+        columns = pagination.parse_fields(fields, pagination.REPORT_FIELDS, required=('id', 'created_at'))
     try:
-        logger.info(f"Fetching insights reports for user {user_id}")
+        logger.debug("Fetching insights reports for user %s", user_id)
         
-        response = supabase.table('insights_reports') \
-            .select('*') \
+        # Nightly precomputed reports are a cache for /api/ai/insights, not report history
+        query = supabase.table('insights_reports') \
+            .select(', '.join(columns)) \
             .eq('user_id', user_id) \
-            .order('created_at', desc=True) \
-            .limit(limit) \
-            .execute()
-        
-        reports = response.data if response.data else []
+            .neq('report_type', 'precomputed')
+        query = pagination.apply_cursor(query, cursor, 'created_at')
+        reports, next_cursor = pagination.fetch_page(
+            query, pagination.clamp_limit(limit, MAX_REPORTS_PAGE), 'created_at'
+        )
+        if next_cursor:
+            response.headers[pagination.NEXT_CURSOR_HEADER] = next_cursor
         
-        logger.info(f"Found {len(reports)} insights reports")
+        logger.debug("Found %d insights reports", len(reports))
         return reports
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching insights reports: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch insights reports")
 
+@api_router.post("/insights/reports/import/{user_id}")
+async def import_insights_reports(user_id: str, request: Request):
+    """
+    Bulk import insights reports from an NDJSON body (one report per line)
+    
+    Reports already stored with the same created_at are skipped, so re-importing is safe
+    """
+    try:
+        logger.info("Importing insights reports for user %s", user_id)
+        result = await bulk_io.import_rows(
+            request.stream(), user_id, bulk_io.ReportImportRow, bulk_io.insert_reports
+        )
+        logger.info("Insights reports import for user %s: %d imported, %d failed", user_id, result['imported'], result['failed'])
+        return result
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error importing insights reports: {e}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Failed to import insights reports")
+
+@api_router.get("/insights/reports/export/{user_id}")
+async def export_insights_reports(user_id: str):
+    """
+    Stream all of a user's insights reports as NDJSON, newest first
+    (precomputed reports are a server-side cache and aren't exported)
+    """
+    return StreamingResponse(
+        bulk_io.export_rows(
+            'insights_reports', user_id, ('*',), 'created_at', False,
+            exclude={'report_type': 'precomputed'}
+        ),
+        media_type=bulk_io.NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="insights-reports-{user_id}.ndjson"'}
+    )
+
 # ============ USAGE TRACKING ENDPOINTS ============
 
 @api_router.post("/usage/track")
@@ -659,14 +1060,14 @@ async def track_message_usage(request: UsageTrackRequest):
     Premium users from Supabase have unlimited messages
     """
     try:
-        logger.info(f"Tracking usage for user {request.user_id}")
+        logger.debug("Tracking usage for user %s", request.user_id)
         
         # For now, give unlimited to ALL users (will be controlled by frontend Supabase check)
         # Frontend AuthContext checks Supabase for premium status
         # Premium users won't hit this endpoint anyway
         
         today = datetime.utcnow().date().isoformat()
-        logger.info(f"Tracking message usage for FREE user {request.user_id} with coach {request.coach_id}")
+        logger.debug("Tracking message usage for FREE user %s with coach %s", request.user_id, request.coach_id)
         
         # Check if usage record exists for today
         existing_response = supabase.table('daily_usage') \
@@ -688,7 +1089,7 @@ async def track_message_usage(request: UsageTrackRequest):
                 .eq('id', existing['id']) \
                 .execute()
             
-            logger.info(f"Updated usage count to {new_count}")
+            logger.debug("Updated usage count to %d", new_count)
         else:
             # Create new usage record
             supabase.table('daily_usage').insert({
@@ -748,7 +1149,7 @@ async def check_message_usage(user_id: str):
     Premium users have unlimited messages
     """
     try:
-        logger.info(f"Checking usage for user {user_id}")
+        logger.debug("Checking usage for user %s", user_id)
         
         # 🚨 CHECK PREMIUM STATUS FIRST - Premium users have unlimited messages
         # Check subscribers table for premium status
@@ -762,7 +1163,7 @@ async def check_message_usage(user_id: str):
             has_premium = subscriber.get("subscribed", False) or subscriber.get("status") == "active"
             
             if has_premium:
-                logger.info(f"✅ User {user_id} is PREMIUM - unlimited messages")
+                logger.debug("User %s is premium - unlimited messages", user_id)
                 return {
                     "message_count": 0,  # Don't track for premium users
                     "can_send_message": True,
@@ -774,7 +1175,7 @@ async def check_message_usage(user_id: str):
         
         # Free user - check usage and enforce limits
         today = datetime.utcnow().date().isoformat()
-        logger.info(f"Checking usage for FREE user {user_id}")
+        logger.debug("Checking usage for FREE user %s", user_id)
         
         usage_response = supabase.table('daily_usage') \
             .select('*') \
@@ -857,18 +1258,129 @@ async def get_usage_stats(days: int = 7):
         logger.error(f"Error fetching usage stats: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail="Failed to fetch stats")
 
+def parse_utc_timestamp(value: str) -> datetime:
+    """
+    ISO timestamp as naive UTC, like the datetime.utcnow() values we store
+    
+    Offsets ("+02:00", "Z") are converted to UTC; timestamps without one are taken as UTC
+    
+    Raises:
+        ValueError if the value isn't an ISO timestamp
+    """
+    parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+# Shared secret for admin endpoints that return per-user data (X-Admin-Key header)
+ADMIN_API_KEY = os.environ.get('ADMIN_API_KEY', '')
+
+def require_admin_key(request: Request):
+    """
+    Raises:
+        HTTPException 503 when ADMIN_API_KEY isn't configured, 401 when the
+        X-Admin-Key header doesn't match it
+    """
+    if not ADMIN_API_KEY:
+        raise HTTPException(status_code=503, detail="Admin API is not configured")
+    if not hmac.compare_digest(request.headers.get("x-admin-key", ""), ADMIN_API_KEY):
+        raise HTTPException(status_code=401, detail="Invalid admin key")
+
+@api_router.get("/admin/usage-export")
+async def export_usage(
+    request: Request,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    format: str = "ndjson",
+    type: Optional[str] = None,
+    identifying: bool = False
+):
+    """
+    Stream raw usage_tracking rows for a time range as NDJSON or CSV
+    Requires the X-Admin-Key header - these are per-user rows, not aggregates
+    
+    Args:
+        start: ISO timestamp (inclusive), default 24 hours before end
+        end: ISO timestamp (exclusive), default now
+        (both in UTC unless they carry an offset)
+        format: "ndjson" or "csv"
+        type: Only rows of this usage type, e.g. "coach_chat"
+        identifying: Also export user_id, session_id and error text
+    """
+    require_admin_key(request)
+    if format not in ("ndjson", "csv"):
+        raise HTTPException(status_code=400, detail="format must be 'ndjson' or 'csv'")
+    try:
+        end_at = parse_utc_timestamp(end) if end else datetime.utcnow()
+        start_at = parse_utc_timestamp(start) if start else end_at - timedelta(days=1)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be ISO timestamps")
+    if start_at >= end_at:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    
+    logger.info("Exporting usage_tracking from %s to %s as %s", start_at.isoformat(), end_at.isoformat(), format)
+    filename = f"usage-{start_at.date().isoformat()}-{end_at.date().isoformat()}.{format}"
+    return StreamingResponse(
+        bulk_io.export_usage_rows(start_at.isoformat(), end_at.isoformat(), format, type, identifying=identifying),
+        media_type=bulk_io.CSV_MEDIA_TYPE if format == "csv" else bulk_io.NDJSON_MEDIA_TYPE,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+@api_router.get("/admin/heart-vision-cache-stats")
+async def get_heart_vision_cache_stats():
+    """
+    HeartVision prompt cache effectiveness - hit rate and DALL-E seconds saved
+    """
+    return ai_service.get_heart_vision_cache_stats()
+
+@api_router.get("/admin/tts-cache-stats")
+async def get_tts_cache_stats():
+    """
+    TTS audio cache effectiveness - how many plays were served without an OpenAI call
+    """
+    return ai_service.get_tts_cache_stats()
+
+@api_router.get("/admin/quiz-cache-stats")
+async def get_quiz_cache_stats():
+    """
+    Quiz analysis cache effectiveness - how often identical answer sets reuse a result
+    """
+    return ai_service.get_quiz_cache_stats()
+
 # Include the router in the main app
 app.include_router(api_router)
 
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus scrape endpoint - request, Supabase, LLM, image and TTS latency
+    and AI fallback counters (served outside /api, for the scraper rather than clients)
+    """
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+app.add_middleware(metrics.MetricsMiddleware)
+app.add_middleware(tracing.TracingMiddleware)
+app.add_middleware(logging_config.RequestIdMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[pagination.NEXT_CURSOR_HEADER, tracing.TRACE_ID_HEADER, logging_config.REQUEST_ID_HEADER],
 )
 
+@app.on_event("startup")
+async def startup():
+    """Start background workers"""
+    await job_queue.start()
+
 @app.on_event("shutdown")
 async def shutdown():
     """Cleanup on shutdown"""
+    await job_queue.stop()
+    await ai_service.close()
+    image_derivatives.shutdown()
+    tracing.flush()
     logger.info("Application shutting down")
@@ -0,0 +1,194 @@
+"""
+Local topic extraction for HeartLift insights
+CPU-only TF-IDF over users' recent coach messages, built on NumPy sparse (CSR-style)
+arrays - no LLM tokens spent on raw message snippets.
+
+Batch mode scores every active user in one vectorized pass: each message is a row,
+IDF is shared across the whole batch, and rows are summed per user.
+"""
+import re
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+_TOKEN_RE = re.compile(r"[a-z][a-z']+")
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are aren't as at be because been before being
+below between both but by can can't cannot could couldn't did didn't do does doesn't doing don't down
+during each few for from further get got had hadn't has hasn't have haven't having he he'd he'll he's
+her here here's hers herself him himself his how how's i i'd i'll i'm i've if in into is isn't it it's
+its itself just know let's like me more most much mustn't my myself no nor not now of off on once only
+or other ought our ours ourselves out over own really same shan't she she'd she'll she's should
+shouldn't so some such than that that's the their theirs them themselves then there there's these they
+they'd they'll they're they've think this those through to too under until up us very want was wasn't
+we we'd we'll we're we've were weren't what what's when when's where where's which while who who's
+whom why why's will with won't would wouldn't yeah yes you you'd you'll you're you've your yours
+yourself yourselves feel feeling felt going gonna lot thing things today said say still also even
+something anything everything always never sometimes maybe okay ok hi hey thanks thank
+""".split())
+
+MIN_TOKEN_LENGTH = 2
+# Bigrams must show up in at least this many messages in the batch to count as a topic
+MIN_BIGRAM_MESSAGES = 2
+BIGRAM_BOOST = 1.25
+# A phrase absorbs its words when it scores at least this share of the word alone
+PHRASE_MIN_SHARE = 0.5
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased content words plus adjacent-word bigrams"""
+    words = [
+        w.strip("'") for w in _TOKEN_RE.findall((text or "").lower())
+    ]
+    words = [w for w in words if len(w) >= MIN_TOKEN_LENGTH and w not in STOPWORDS]
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def _build_csr(documents: List[str]) -> Tuple[np.ndarray, np.ndarray, np.ndarray, List[str]]:
+    """
+    Term counts for each document in CSR form
+
+    Returns:
+        (indptr, indices, counts, vocabulary) - row i's terms are indices[indptr[i]:indptr[i+1]]
+    """
+    vocabulary: Dict[str, int] = {}
+    indptr = [0]
+    indices: List[int] = []
+    counts: List[int] = []
+
+    for document in documents:
+        row: Dict[int, int] = {}
+        for token in tokenize(document):
+            term = vocabulary.setdefault(token, len(vocabulary))
+            row[term] = row.get(term, 0) + 1
+        indices.extend(row.keys())
+        counts.extend(row.values())
+        indptr.append(len(indices))
+
+    terms = [None] * len(vocabulary)
+    for token, term in vocabulary.items():
+        terms[term] = token
+
+    return (
+        np.asarray(indptr, dtype=np.int64),
+        np.asarray(indices, dtype=np.int64),
+        np.asarray(counts, dtype=np.float64),
+        terms,
+    )
+
+
+def _cluster_terms(ranked: List[Tuple[str, float]], top_k: int) -> List[Tuple[str, float]]:
+    """
+    Merge words into the phrases they belong to, then drop overlapping terms
+
+    A phrase absorbs each of its words when it scores at least PHRASE_MIN_SHARE of
+    the word on its own, and takes the word's rank if that's higher - "miss ex"
+    absorbs "miss" and "ex" - so a word mostly used in one phrase isn't listed
+    alone. Otherwise the higher-ranked of two overlapping terms is kept.
+    """
+    scores = dict(ranked)
+    phrase_for: Dict[str, str] = {}
+    for term, score in ranked:
+        if " " not in term:
+            continue
+        for word in term.split():
+            if word in scores and word not in phrase_for and score >= PHRASE_MIN_SHARE * scores[word]:
+                phrase_for[word] = term
+
+    merged: Dict[str, float] = {}
+    for term, score in ranked:
+        term = phrase_for.get(term, term)
+        merged[term] = max(merged.get(term, 0.0), score)
+
+    topics: List[Tuple[str, float]] = []
+    for term, score in sorted(merged.items(), key=lambda item: -item[1]):
+        words = set(term.split())
+        if any(words <= set(kept.split()) or set(kept.split()) <= words for kept, _ in topics):
+            continue
+        topics.append((term, score))
+        if len(topics) == top_k:
+            break
+    return topics
+
+
+def extract_topics_batch(
+    messages_by_user: Dict[str, List[str]],
+    top_k: int = 8
+) -> Dict[str, List[Tuple[str, float]]]:
+    """
+    Ranked topics for many users in one pass
+
+    Args:
+        messages_by_user: user_id -> that user's recent messages
+        top_k: Topics to keep per user
+
+    Returns:
+        user_id -> [(topic, score), ...] best first, scores normalised so each user's top topic is 1.0
+    """
+    user_ids = [user_id for user_id, messages in messages_by_user.items() if messages]
+    documents = [message for user_id in user_ids for message in messages_by_user[user_id]]
+    results: Dict[str, List[Tuple[str, float]]] = {user_id: [] for user_id in messages_by_user}
+    if not documents:
+        return results
+
+    indptr, indices, counts, terms = _build_csr(documents)
+    if not terms:
+        return results
+
+    # Which row (message) and user each stored value belongs to
+    rows = np.repeat(np.arange(len(documents)), np.diff(indptr))
+    message_user = np.repeat(
+        np.arange(len(user_ids)),
+        [len(messages_by_user[user_id]) for user_id in user_ids]
+    )
+
+    # Sublinear TF, smoothed IDF (messages containing the term, across the whole batch)
+    document_frequency = np.bincount(indices, minlength=len(terms))
+    idf = np.log((1 + len(documents)) / (1 + document_frequency)) + 1.0
+    weights = (1.0 + np.log(counts)) * idf[indices]
+
+    # One-off bigrams are just noise ("moved fast") - drop them before normalising
+    is_bigram = np.fromiter((" " in term for term in terms), dtype=bool, count=len(terms))
+    rare_bigram = is_bigram & (document_frequency < MIN_BIGRAM_MESSAGES)
+    weights[rare_bigram[indices]] = 0.0
+    # A repeated phrase says more than its words on their own
+    weights[is_bigram[indices]] *= BIGRAM_BOOST
+
+    # L2-normalise each message so long messages don't dominate
+    row_norms = np.sqrt(np.bincount(rows, weights=weights ** 2, minlength=len(documents)))
+    weights = np.divide(weights, row_norms[rows], out=np.zeros_like(weights), where=row_norms[rows] > 0)
+
+    # Sum message vectors per user: (user, term) -> score
+    keys = message_user[rows] * len(terms) + indices
+    unique_keys, inverse = np.unique(keys, return_inverse=True)
+    scores = np.bincount(inverse, weights=weights)
+    key_users = unique_keys // len(terms)
+    key_terms = unique_keys % len(terms)
+
+    # unique_keys is sorted, so each user's terms are one contiguous slice
+    boundaries = np.searchsorted(key_users, np.arange(len(user_ids) + 1))
+    for position, user_id in enumerate(user_ids):
+        start, end = boundaries[position], boundaries[position + 1]
+        if start == end:
+            continue
+        user_scores = scores[start:end]
+        if not user_scores.max() > 0:
+            continue
+        # Over-fetch so clustering still leaves top_k topics
+        take = min(len(user_scores), top_k * 3)
+        best = np.argpartition(-user_scores, take - 1)[:take]
+        best = best[np.argsort(-user_scores[best], kind="stable")]
+        top_score = user_scores[best[0]]
+        ranked = [
+            (terms[key_terms[start + i]], round(float(user_scores[i] / top_score), 3))
+            for i in best if user_scores[i] > 0
+        ]
+        results[user_id] = _cluster_terms(ranked, top_k)
+
+    return results
+
+
+def extract_topics(messages: List[str], top_k: int = 8) -> List[Tuple[str, float]]:
+    """Ranked topics for one user's messages"""
+    return extract_topics_batch({"user": messages}, top_k=top_k)["user"]
@@ -0,0 +1,420 @@
+"""
+Request tracing for HeartLift backend
+OpenTelemetry-style spans (trace id, span id, parent, attributes, status) kept in a
+contextvar, so a slow /api/ai/chat can be broken down into its Supabase reads,
+prompt assembly, LLM call and usage insert.
+
+- Sampling is decided once per trace (TRACE_SAMPLE_RATE, or the caller's W3C
+  traceparent flag). Unsampled traces still get a trace id for log correlation, but
+  their child spans are no-ops, so the cost under load is one contextvar lookup
+- Finished spans go to a bounded queue drained by a background thread that writes
+  JSON lines (TRACE_EXPORTER=file) or posts OTLP/HTTP JSON to a local collector
+  (TRACE_EXPORTER=otlp); spans are dropped, not blocked on, if the queue is full
+- TraceContextFilter stamps trace_id/span_id on log records (installed by logging_config)
+"""
+import os
+import json
+import time
+import queue
+import random
+import logging
+import threading
+import functools
+import inspect
+import urllib.request
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+SERVICE_NAME = "heartlift-backend"
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "0.01"))
+TRACE_EXPORTER = os.getenv("TRACE_EXPORTER", "file")  # file | otlp | none
+TRACE_EXPORT_PATH = Path(os.getenv("TRACE_EXPORT_PATH", str(ROOT_DIR / "data" / "traces" / "spans.jsonl")))
+TRACE_OTLP_ENDPOINT = os.getenv("TRACE_OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+EXPORT_QUEUE_SIZE = 10000
+EXPORT_BATCH_SIZE = 512
+TRACE_ID_HEADER = "X-Trace-Id"
+
+STATUS_OK, STATUS_ERROR = "ok", "error"
+
+_current: ContextVar[Optional["Span"]] = ContextVar("heartlift_current_span", default=None)
+# Ids only need to be unique, not unpredictable - SystemRandom would cost a syscall per span
+_random = random.Random()
+
+
+def _new_trace_id() -> str:
+    return f"{_random.getrandbits(128):032x}"
+
+
+def _new_span_id() -> str:
+    return f"{_random.getrandbits(64):016x}"
+
+
+class Span:
+    """One timed operation. Unsampled spans carry ids for logs but record nothing"""
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "sampled", "attributes",
+                 "start_ns", "end_ns", "status", "error")
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], sampled: bool,
+                 attributes: Optional[Dict] = None):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = _new_span_id()
+        self.parent_id = parent_id
+        self.sampled = sampled
+        self.attributes = attributes or {}
+        self.start_ns = time.time_ns()
+        self.end_ns = 0
+        self.status = STATUS_OK
+        self.error = None
+
+    def set_attribute(self, key: str, value):
+        if self.sampled:
+            self.attributes[key] = value
+
+    def record_error(self, error: BaseException):
+        self.status = STATUS_ERROR
+        self.error = f"{type(error).__name__}: {error}"
+
+    def end(self):
+        if self.end_ns:
+            return
+        self.end_ns = time.time_ns()
+        if self.sampled:
+            _exporter.export(self)
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict:
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": self.end_ns,
+            "durationMs": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "status": self.status,
+            "error": self.error,
+            "service": SERVICE_NAME,
+        }
+
+
+class _NoopSpan:
+    """Stand-in for every span inside an unsampled trace"""
+
+    __slots__ = ()
+    sampled = False
+
+    def set_attribute(self, key: str, value):
+        pass
+
+    def record_error(self, error: BaseException):
+        pass
+
+    def end(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class _ActiveSpan:
+    """Context manager that makes a span current for its block, then ends it"""
+
+    __slots__ = ("span", "token")
+
+    def __init__(self, span: Span):
+        self.span = span
+
+    def __enter__(self) -> Span:
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc is not None:
+            self.span.record_error(exc)
+        self.span.end()
+        _current.reset(self.token)
+        return False
+
+
+def current_span() -> Optional[Span]:
+    return _current.get()
+
+
+def current_trace_id() -> Optional[str]:
+    span = _current.get()
+    return span.trace_id if span else None
+
+
+def _should_sample() -> bool:
+    return TRACE_SAMPLE_RATE > 0 and (TRACE_SAMPLE_RATE >= 1 or _random.random() < TRACE_SAMPLE_RATE)
+
+
+def parse_traceparent(header: Optional[str]):
+    """(trace_id, parent_span_id, sampled) from a W3C traceparent header, or None"""
+    parts = (header or "").strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16 or parts[1] == "0" * 32:
+        return None
+    try:
+        flags = int(parts[3], 16)
+        int(parts[1], 16), int(parts[2], 16)
+    except ValueError:
+        return None
+    return parts[1], parts[2], bool(flags & 1)
+
+
+def root_span(name: str, traceparent: Optional[str] = None, **attributes) -> _ActiveSpan:
+    """
+    Start a trace (a request, a job), continuing the caller's if a traceparent is given
+    Always records a trace id, even when the trace isn't sampled
+    """
+    parent = parse_traceparent(traceparent)
+    if parent:
+        trace_id, parent_id, sampled = parent
+    else:
+        trace_id, parent_id, sampled = _new_trace_id(), None, _should_sample()
+    return _ActiveSpan(Span(name, trace_id, parent_id, sampled, attributes))
+
+
+def span(name: str, **attributes):
+    """
+    Context manager for a child span of the current one (a new trace if there is none)
+
+        with tracing.span("chat.fetch_reflections", table="daily_reflections"):
+            ...
+
+    Works across awaits - the current span lives in a contextvar
+    """
+    parent = _current.get()
+    if parent is None:
+        return root_span(name, **attributes)
+    if not parent.sampled:
+        return _NOOP_SPAN
+    return _ActiveSpan(Span(name, parent.trace_id, parent.span_id, True, attributes))
+
+
+def start_span(name: str, **attributes):
+    """
+    A child span that doesn't become current - for timing a stretch of code
+    without re-indenting it. Call .end() when done
+    """
+    parent = _current.get()
+    if parent is None or not parent.sampled:
+        return _NOOP_SPAN
+    return Span(name, parent.trace_id, parent.span_id, True, attributes)
+
+
+def traced(name: Optional[str] = None):
+    """Decorator running a function (sync or async) inside a span"""
+    def decorator(fn):
+        span_name = name or fn.__qualname__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(span_name):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(span_name):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def trace_methods(prefix: str):
+    """
+    Class decorator tracing every coroutine method as "<prefix>.<method>"
+
+    Async generators and sync methods are left alone
+    """
+    def decorator(cls):
+        for attr, value in list(vars(cls).items()):
+            if inspect.iscoroutinefunction(value) and not attr.startswith("__"):
+                setattr(cls, attr, traced(f"{prefix}.{attr.lstrip('_')}")(value))
+        return cls
+    return decorator
+
+
+# ---- export ----
+
+def _otlp_value(value) -> Dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def to_otlp(spans: List[Span]) -> Dict:
+    """OTLP/HTTP JSON body for a batch of spans"""
+    return {"resourceSpans": [{
+        "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": SERVICE_NAME}}]},
+        "scopeSpans": [{
+            "scope": {"name": "heartlift.tracing"},
+            "spans": [{
+                "traceId": s.trace_id,
+                "spanId": s.span_id,
+                "parentSpanId": s.parent_id or "",
+                "name": s.name,
+                "kind": 1,
+                "startTimeUnixNano": str(s.start_ns),
+                "endTimeUnixNano": str(s.end_ns),
+                "attributes": [{"key": k, "value": _otlp_value(v)} for k, v in s.attributes.items()],
+                "status": {"code": 2, "message": s.error} if s.status == STATUS_ERROR else {"code": 1},
+            } for s in spans],
+        }],
+    }]}
+
+
+class SpanExporter:
+    """Background thread writing finished spans in batches"""
+
+    def __init__(self, exporter: str = TRACE_EXPORTER):
+        self.exporter = exporter
+        self._queue: "queue.Queue[Optional[Span]]" = queue.Queue(maxsize=EXPORT_QUEUE_SIZE)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self.exported = 0
+        self.dropped = 0
+
+    def export(self, span: Span):
+        if self.exporter == "none":
+            return
+        if self._thread is None:
+            self._start()
+        try:
+            self._queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="span-exporter", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < EXPORT_BATCH_SIZE:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            spans = [s for s in batch if s is not None]
+            if spans:
+                try:
+                    self._write(spans)
+                    self.exported += len(spans)
+                except Exception as e:
+                    self.dropped += len(spans)
+                    logger.warning(f"Could not export {len(spans)} spans: {e}")
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write(self, spans: List[Span]):
+        if self.exporter == "otlp":
+            request = urllib.request.Request(
+                TRACE_OTLP_ENDPOINT, data=json.dumps(to_otlp(spans)).encode(),
+                headers={"Content-Type": "application/json"}, method="POST"
+            )
+            urllib.request.urlopen(request, timeout=5).close()
+            return
+        TRACE_EXPORT_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(TRACE_EXPORT_PATH, "a") as f:
+            f.write("".join(json.dumps(s.to_dict(), default=str) + "\n" for s in spans))
+
+    def flush(self):
+        """Block until every queued span has been written"""
+        if self._thread is not None:
+            self._queue.join()
+
+
+_exporter = SpanExporter()
+
+
+def flush():
+    _exporter.flush()
+
+
+def exporter_stats() -> Dict:
+    return {"exporter": _exporter.exporter, "sample_rate": TRACE_SAMPLE_RATE,
+            "exported": _exporter.exported, "dropped": _exporter.dropped}
+
+
+# ---- logs ----
+
+class TraceContextFilter(logging.Filter):
+    """Adds trace_id and span_id ("-" outside a trace) to every log record"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        span = _current.get()
+        record.trace_id = span.trace_id if span else "-"
+        record.span_id = span.span_id if span else "-"
+        return True
+
+
+# ---- HTTP ----
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening a root span per request, named by route template
+
+    Continues an incoming W3C traceparent and returns the trace id in X-Trace-Id
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        traceparent = None
+        for key, value in scope.get("headers", ()):
+            if key == b"traceparent":
+                traceparent = value.decode("latin-1")
+                break
+
+        method = scope.get("method", "")
+        with root_span(f"{method} {scope.get('path', '')}", traceparent=traceparent) as request_span:
+            async def send_with_trace_id(message):
+                if message["type"] == "http.response.start":
+                    request_span.set_attribute("http.status_code", message["status"])
+                    if message["status"] >= 500:
+                        request_span.status = STATUS_ERROR
+                    headers = list(message.get("headers", []))
+                    headers.append((TRACE_ID_HEADER.lower().encode(), request_span.trace_id.encode()))
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace_id)
+            finally:
+                # Name by template, not raw path, so per-user URLs group together
+                route = getattr(scope.get("route"), "path", None)
+                if route:
+                    request_span.name = f"{method} {route}"
+                request_span.set_attribute("http.method", method)
+                request_span.set_attribute("http.route", route or "unmatched")
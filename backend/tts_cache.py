@@ -0,0 +1,309 @@
+"""
+Disk cache of text-to-speech audio for HeartLift
+Visualization practices read a fixed set of scripts in a handful of voices, so the
+same audio was being re-rendered by OpenAI on every play. Each rendering is stored
+once, keyed by what determines the audio:
+    <sha256 of text>-<voice>-<model>.<format>
+and served as raw bytes from /api/tts/{key} (with Range support for <audio> seeking).
+
+The TTS endpoints take any text, so the cache is bounded: once files exceed
+MAX_BYTES the least recently played are deleted. Recency is the file's mtime
+(touched on every hit), so it survives restarts.
+
+Run tts_warmup.py after deploys or script changes to pre-render the known scripts.
+"""
+import os
+import re
+import hashlib
+import asyncio
+import logging
+import tempfile
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+ROOT_DIR = Path(__file__).parent
+TTS_CACHE_DIR = Path(os.getenv("TTS_CACHE_DIR", str(ROOT_DIR / "data" / "tts_cache")))
+TTS_URL_PREFIX = "/api/tts"
+MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_MB", "1024")) * 1024 * 1024
+
+DEFAULT_MODEL = "tts-1"
+DEFAULT_FORMAT = "mp3"
+VOICES = ("shimmer", "alloy", "echo", "fable", "onyx", "nova")
+MODELS = ("tts-1", "tts-1-hd")
+CONTENT_TYPES = {
+    "mp3": "audio/mpeg",
+    "opus": "audio/ogg",
+    "aac": "audio/aac",
+    "flac": "audio/flac",
+    "wav": "audio/wav",
+}
+
+_KEY_RE = re.compile(
+    r"^[0-9a-f]{64}-(" + "|".join(VOICES) + r")-(" + "|".join(MODELS) + r")\.(" + "|".join(CONTENT_TYPES) + r")$"
+)
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_hits = 0
+_misses = 0
+_evictions = 0
+# key -> size of cached files, least recently used first (loaded from disk on first use)
+_entries: Optional["OrderedDict[str, int]"] = None
+_total_bytes = 0
+# Texts registered for streaming, so GET stream URLs (<audio src>) carry a key rather than the script
+MAX_PENDING_TEXTS = 256
+_pending_texts: "OrderedDict[str, Tuple[str, str, str, str]]" = OrderedDict()
+# Upstream time-to-first-audio-byte of recent streamed renders, in seconds
+_first_byte_seconds: deque = deque(maxlen=500)
+# Renders in progress, so concurrent requests for the same audio share one upstream call
+_in_flight: Dict[str, asyncio.Future] = {}
+
+
+def cache_key(text: str, voice: str, model: str = DEFAULT_MODEL, fmt: str = DEFAULT_FORMAT) -> str:
+    """
+    Key for one rendering of a text
+
+    Raises:
+        ValueError for a voice, model or format we don't render
+    """
+    if voice not in VOICES:
+        raise ValueError(f"voice must be one of {list(VOICES)}")
+    if model not in MODELS:
+        raise ValueError(f"model must be one of {list(MODELS)}")
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"format must be one of {list(CONTENT_TYPES)}")
+    text_hash = hashlib.sha256(text.encode("utf-8")).hexdigest()
+    return f"{text_hash}-{voice}-{model}.{fmt}"
+
+
+def register_text(text: str, voice: str, model: str = DEFAULT_MODEL, fmt: str = DEFAULT_FORMAT) -> str:
+    """
+    Remember a text so its audio can be streamed by key (the MAX_PENDING_TEXTS most recent are kept)
+
+    Raises:
+        ValueError as cache_key
+    """
+    key = cache_key(text, voice, model, fmt)
+    _pending_texts[key] = (text, voice, model, fmt)
+    _pending_texts.move_to_end(key)
+    while len(_pending_texts) > MAX_PENDING_TEXTS:
+        _pending_texts.popitem(last=False)
+    return key
+
+
+def registered_text(key: str) -> Optional[Tuple[str, str, str, str]]:
+    """(text, voice, model, format) registered under a key, or None"""
+    return _pending_texts.get(key)
+
+
+def is_valid_key(key: str) -> bool:
+    return bool(_KEY_RE.match(key or ""))
+
+
+def path_for(key: str) -> Path:
+    """Sharded location (ab/<key>)"""
+    return TTS_CACHE_DIR / key[:2] / key
+
+
+def _index() -> "OrderedDict[str, int]":
+    """Cached files by recency, scanned from disk once per process"""
+    global _entries, _total_bytes
+    if _entries is None:
+        files = []
+        if TTS_CACHE_DIR.exists():
+            for path in TTS_CACHE_DIR.glob("*/*"):
+                if is_valid_key(path.name):
+                    stat = path.stat()
+                    files.append((stat.st_mtime, path.name, stat.st_size))
+        _entries = OrderedDict((key, size) for _, key, size in sorted(files))
+        _total_bytes = sum(_entries.values())
+    return _entries
+
+
+def _touch(key: str, path: Path):
+    entries = _index()
+    if key in entries:
+        entries.move_to_end(key)
+    try:
+        os.utime(path)
+    except OSError:
+        pass
+
+
+def _evict():
+    """Delete least recently used files until the cache fits in MAX_BYTES (always keeping the newest)"""
+    global _total_bytes, _evictions
+    entries = _index()
+    while _total_bytes > MAX_BYTES and len(entries) > 1:
+        key, size = entries.popitem(last=False)
+        _total_bytes -= size
+        _evictions += 1
+        # Streams already reading the file keep their open handle
+        path_for(key).unlink(missing_ok=True)
+        logger.info("Evicted TTS audio %s (%s bytes)", key, size)
+
+
+def demote(keys: Iterable[str]):
+    """
+    Make cached audio the next to be evicted
+
+    A stitched script is played from its own file, so its sentence chunks are only
+    needed again if the script is edited - under pressure they go before any
+    whole recording instead of keeping the script on disk twice
+    """
+    entries = _index()
+    for key in keys:
+        if key in entries:
+            entries.move_to_end(key, last=False)
+            try:
+                os.utime(path_for(key), (0, 0))
+            except OSError:
+                pass
+
+
+def get_path(key: str) -> Optional[Path]:
+    """Path of cached audio, or None for unknown/invalid keys"""
+    if not is_valid_key(key):
+        return None
+    path = path_for(key)
+    if not path.is_file():
+        return None
+    _touch(key, path)
+    return path
+
+
+def put(key: str, data: bytes) -> Path:
+    global _total_bytes
+    path = path_for(key)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Write then rename, so readers never see a partial file
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=".tmp-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.unlink(tmp)
+        raise
+    logger.info("Cached TTS audio %s (%s bytes)", key, len(data))
+    entries = _index()
+    _total_bytes += len(data) - entries.pop(key, 0)
+    entries[key] = len(data)
+    _evict()
+    return path
+
+
+def content_type_for(key: str) -> str:
+    return CONTENT_TYPES[key.rsplit(".", 1)[-1]]
+
+
+def etag_for(key: str) -> str:
+    return f'"{key}"'
+
+
+def url_for(key: str) -> str:
+    return f"{TTS_URL_PREFIX}/{key}"
+
+
+def lookup(key: str) -> Optional[Path]:
+    """get_path, counted as a cache hit or miss"""
+    global _hits, _misses
+    path = get_path(key)
+    if path:
+        _hits += 1
+    else:
+        _misses += 1
+    return path
+
+
+async def get_or_synthesize(key: str, synthesize: Callable[[], Awaitable[bytes]]) -> Tuple[Path, bool]:
+    """
+    Cached audio for a key, rendering and storing it on a miss
+
+    Args:
+        synthesize: Coroutine factory returning the audio bytes
+
+    Returns:
+        (path, cache_hit)
+    """
+    path = lookup(key)
+    if path:
+        return path, True
+
+    future = _in_flight.get(key)
+    if future is None:
+        async def run():
+            return put(key, await synthesize())
+
+        future = asyncio.ensure_future(run())
+        _in_flight[key] = future
+        future.add_done_callback(lambda _: _in_flight.pop(key, None))
+    return await asyncio.shield(future), False
+
+
+async def iter_file(path: Path, chunk_size: int = STREAM_CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Cached audio in chunks, for streaming responses"""
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            yield chunk
+
+
+def record_first_byte(seconds: float):
+    _first_byte_seconds.append(seconds)
+
+
+def parse_range(header: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Single byte range from a Range header, as inclusive (start, end)
+
+    Returns None when the whole file should be sent (no header, a syntax we
+    don't handle, multiple ranges)
+
+    Raises:
+        ValueError when the range can't be satisfied (-> 416)
+    """
+    match = _RANGE_RE.match((header or "").strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first:
+        start = int(first)
+        if last and int(last) < start:
+            return None
+        end = min(int(last), size - 1) if last else size - 1
+        if start >= size:
+            raise ValueError(f"Range {header} not satisfiable for {size} bytes")
+    else:
+        # Suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            raise ValueError(f"Range {header} not satisfiable for {size} bytes")
+        start, end = max(size - length, 0), size - 1
+    return start, end
+
+
+def stats() -> Dict:
+    entries = _index()
+    lookups = _hits + _misses
+    first_byte_ms = sorted(seconds * 1000 for seconds in _first_byte_seconds)
+
+    def percentile(p: float) -> Optional[float]:
+        return round(first_byte_ms[min(int(len(first_byte_ms) * p), len(first_byte_ms) - 1)], 1) if first_byte_ms else None
+
+    return {
+        "name": "tts",
+        "entries": len(entries),
+        "bytes": _total_bytes,
+        "max_bytes": MAX_BYTES,
+        "hits": _hits,
+        "misses": _misses,
+        "evictions": _evictions,
+        "hit_rate": round(_hits / lookups * 100, 2) if lookups else 0.0,
+        "streamed_renders": len(first_byte_ms),
+        "first_byte_ms_p50": percentile(0.5),
+        "first_byte_ms_p95": percentile(0.95),
+    }
@@ -0,0 +1,90 @@
+"""
+Sentence chunking for text-to-speech
+tts-1 latency grows with input length, so long visualization scripts are split into
+sentences, rendered concurrently, and stitched back together in order.
+
+Each chunk is cached on its own (tts_cache, keyed by the chunk's text), and chunk
+boundaries depend only on nearby text - editing one sentence of a script
+re-renders that sentence, not the whole script.
+"""
+import re
+from typing import List
+
+# MP3 and ADTS AAC are sequences of self-contained frames, so renders concatenate cleanly
+CHUNKABLE_FORMATS = ("mp3", "aac")
+# Scripts shorter than this are rendered in one request
+MIN_SCRIPT_CHARS = 200
+# Fragments shorter than this ("Breathe.") join the following sentence
+MIN_CHUNK_CHARS = 40
+MAX_CHUNK_CHARS = 1000
+
+_PARAGRAPH_RE = re.compile(r"\n\s*\n")
+_SENTENCE_RE = re.compile(r"(?<=[.!?])\s+")
+# A full stop after these (or an initial) doesn't end the sentence: "Dr. Smith", "J. Smith"
+_ABBREVIATION_RE = re.compile(r"\b(?:Mr|Mrs|Ms|Dr|Prof|Sr|Jr|St|Mt|vs|e\.g|i\.e|[A-Z])\.$")
+
+
+def _split_long(sentence: str) -> List[str]:
+    """Split a sentence over MAX_CHUNK_CHARS at the last comma, else space, before the limit"""
+    parts = []
+    while len(sentence) > MAX_CHUNK_CHARS:
+        window = sentence[:MAX_CHUNK_CHARS]
+        cut = window.rfind(", ") + 1
+        if cut <= 0:
+            cut = window.rfind(" ")
+        if cut <= 0:
+            cut = MAX_CHUNK_CHARS
+        parts.append(sentence[:cut].strip())
+        sentence = sentence[cut:].strip()
+    return parts + [sentence]
+
+
+def _sentences(paragraph: str) -> List[str]:
+    sentences: List[str] = []
+    for part in _SENTENCE_RE.split(paragraph):
+        if sentences and _ABBREVIATION_RE.search(sentences[-1]):
+            sentences[-1] = f"{sentences[-1]} {part}"
+        else:
+            sentences.append(part)
+    return sentences
+
+
+def split_script(text: str) -> List[str]:
+    """
+    Chunks of a script in reading order, one sentence each (short fragments merged forward)
+
+    Joining the chunks with spaces reproduces the script up to whitespace
+    """
+    chunks: List[str] = []
+    pending = ""
+    for paragraph in _PARAGRAPH_RE.split(text.strip()):
+        for sentence in _sentences(paragraph.strip()):
+            sentence = " ".join(sentence.split())
+            if not sentence:
+                continue
+            sentence = f"{pending} {sentence}" if pending else sentence
+            if len(sentence) < MIN_CHUNK_CHARS:
+                pending = sentence
+                continue
+            pending = ""
+            chunks.extend(_split_long(sentence))
+    if pending:
+        if chunks and len(chunks[-1]) + len(pending) < MAX_CHUNK_CHARS:
+            chunks[-1] = f"{chunks[-1]} {pending}"
+        else:
+            chunks.append(pending)
+    return chunks
+
+
+def should_chunk(text: str, fmt: str) -> bool:
+    return fmt in CHUNKABLE_FORMATS and len(text) >= MIN_SCRIPT_CHARS
+
+
+def strip_id3(data: bytes) -> bytes:
+    """Drop a leading ID3v2 tag, so stitched MP3s only carry the first chunk's"""
+    if len(data) < 10 or data[:3] != b"ID3":
+        return data
+    # Tag size is a 28-bit "syncsafe" integer (7 bits per byte) after the 10-byte header
+    size = (data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9]
+    footer = 10 if data[5] & 0x10 else 0
+    return data[10 + size + footer:]
@@ -0,0 +1,69 @@
+"""
+Pre-render visualization practice audio into the TTS cache
+Run after deploys or after visualisation_exercises changes, so the first play of
+every practice is served from disk instead of waiting on OpenAI:
+    python tts_warmup.py --voices shimmer --concurrency 2
+
+Scripts already in the cache are skipped, so re-running is cheap.
+"""
+import json
+import asyncio
+import logging
+import argparse
+from typing import Dict, List
+
+from database import supabase
+from ai_service import ai_service
+import tts_cache
+
+logger = logging.getLogger(__name__)
+
+
+def practice_script(steps: List[str]) -> str:
+    """The text VisualisationPractices.tsx sends for a full practice - must match it exactly"""
+    return '. '.join(steps)
+
+
+def get_practice_scripts() -> List[str]:
+    response = supabase.table('visualisation_exercises') \
+        .select('steps') \
+        .execute()
+    scripts = {practice_script(row['steps']) for row in response.data or [] if row.get('steps')}
+    return sorted(scripts)
+
+
+async def warm_up(voices: List[str], model: str = tts_cache.DEFAULT_MODEL, concurrency: int = 2) -> Dict:
+    """
+    Render every practice script in every voice that isn't cached yet
+
+    Returns:
+        Counts of rendered, already cached and failed renderings
+    """
+    scripts = get_practice_scripts()
+    semaphore = asyncio.Semaphore(concurrency)
+    summary = {"scripts": len(scripts), "voices": voices, "rendered": 0, "cached": 0, "failed": 0}
+
+    async def render(text: str, voice: str):
+        async with semaphore:
+            try:
+                audio = await ai_service.get_speech_audio(text, voice=voice, model=model)
+                summary["cached" if audio["cached"] else "rendered"] += 1
+            except Exception as e:
+                summary["failed"] += 1
+                logger.error(f"Failed to pre-render TTS in {voice}: {e}")
+
+    await asyncio.gather(*(render(text, voice) for text in scripts for voice in voices))
+
+    logger.info(f"TTS warm-up finished: {summary}")
+    return summary
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-render visualization practice audio into the TTS cache")
+    parser.add_argument("--voices", nargs="+", default=["shimmer"], choices=tts_cache.VOICES)
+    parser.add_argument("--model", default=tts_cache.DEFAULT_MODEL, choices=tts_cache.MODELS)
+    parser.add_argument("--concurrency", type=int, default=2, help="OpenAI renders in parallel")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    print(json.dumps(asyncio.run(warm_up(args.voices, args.model, args.concurrency)), indent=2))
@@ -1,4 +1,4 @@
-import { useState, useEffect } from "react";
+import { useState, useEffect, useRef } from "react";
 import { Card, CardContent, CardHeader, CardTitle } from "@/components/ui/card";
 import { Button } from "@/components/ui/button";
 import { RadioGroup, RadioGroupItem } from "@/components/ui/radio-group";
@@ -403,6 +403,10 @@ const getDailyQuestions = (): { questions: QuizQuestion[], setNumber: number, ne
   };
 };
 
+// The AI narrative for a fast analysis usually lands within a few seconds
+const QUIZ_ENRICHMENT_POLL_MS = 1500;
+const QUIZ_ENRICHMENT_POLLS = 20;
+
 export const AttachmentStyleQuiz = () => {
   const { user } = useAuth();
   const { toast } = useToast();
@@ -420,6 +424,10 @@ export const AttachmentStyleQuiz = () => {
   const [quizQuestions, setQuizQuestions] = useState<QuizQuestion[]>([]);
   const [isLoadingQuestions, setIsLoadingQuestions] = useState(true);
   const [questionsError, setQuestionsError] = useState<string | null>(null);
+  // Id of the fast analysis whose AI narrative is being polled for (cleared to stop polling)
+  const enrichmentIdRef = useRef<string | null>(null);
+
+  useEffect(() => () => { enrichmentIdRef.current = null; }, []);
   
   // Remove the old daily questions logic since we're now using AI-generated questions
   const formatTimeUntilNextChange = () => {
@@ -678,7 +686,9 @@ export const AttachmentStyleQuiz = () => {
         },
         body: JSON.stringify({
           questions_and_answers: questionsAndAnswers,
-          user_id: user?.id
+          user_id: user?.id,
+          // Scored locally and returned at once - the AI narrative follows via analysisId
+          fast: true
         })
       });
 
@@ -694,9 +704,10 @@ export const AttachmentStyleQuiz = () => {
       setHasCompletedToday(true);
       
       // Save result to database
+      let savedResultId: string | null = null;
       if (user?.id) {
         try {
-          const { error: saveError } = await supabase
+          const { data: saved, error: saveError } = await supabase
             .from('quiz_results')
             .insert({
               user_id: user.id,
@@ -704,11 +715,14 @@ export const AttachmentStyleQuiz = () => {
               analysis: data.analysis,
               questions_and_answers: questionsAndAnswers,
               completed_at: new Date().toISOString()
-            });
+            })
+            .select('id')
+            .single();
           
           if (saveError) {
             console.error('Error saving quiz result:', saveError);
           } else {
+            savedResultId = saved?.id ?? null;
             fetchPastResults(); // Refresh past results
           }
         } catch (saveError) {
@@ -716,6 +730,10 @@ export const AttachmentStyleQuiz = () => {
         }
       }
 
+      if (data.enrichmentStatus === 'pending' && data.analysisId) {
+        pollQuizEnrichment(backendUrl, data.analysisId, savedResultId);
+      }
+
       toast({
         title: "Analysis Complete!",
         description: "Your personalised attachment style report is ready.",
@@ -813,7 +831,42 @@ export const AttachmentStyleQuiz = () => {
     }
   };
 
+  const pollQuizEnrichment = async (backendUrl: string, analysisId: string, savedResultId: string | null) => {
+    enrichmentIdRef.current = analysisId;
+    for (let attempt = 0; attempt < QUIZ_ENRICHMENT_POLLS; attempt++) {
+      await new Promise(resolve => setTimeout(resolve, QUIZ_ENRICHMENT_POLL_MS));
+      // Quiz reset, retaken or closed
+      if (enrichmentIdRef.current !== analysisId) return;
+      try {
+        const response = await fetch(`${backendUrl}/api/ai/quiz/analyze/${analysisId}`);
+        if (!response.ok) return;
+        const { status, result } = await response.json();
+        if (status === 'pending') continue;
+        if (status !== 'complete' || enrichmentIdRef.current !== analysisId) return;
+
+        setAttachmentStyle(result.attachmentStyle);
+        setAnalysis(result.analysis);
+        if (savedResultId) {
+          const { error } = await supabase
+            .from('quiz_results')
+            .update({ attachment_style: result.attachmentStyle, analysis: result.analysis })
+            .eq('id', savedResultId);
+          if (error) {
+            console.error('Error saving enriched quiz result:', error);
+          } else {
+            fetchPastResults();
+          }
+        }
+        return;
+      } catch (error) {
+        console.error('Error fetching quiz enrichment:', error);
+        return;
+      }
+    }
+  };
+
   const resetQuiz = () => {
+    enrichmentIdRef.current = null;
     setCurrentQuestion(0);
     setAnswers([]);
     setShowResults(false);
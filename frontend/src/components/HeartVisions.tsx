@@ -15,6 +15,13 @@ interface SavedVision {
   timestamp: number;
 }
 
+const JOB_POLL_INTERVAL_MS = 2000;
+const JOB_TIMEOUT_MS = 120000;
+
+// Gallery cards show the backend's resized WebP variant; downloads keep the original
+const galleryImageUrl = (url: string) =>
+  url.includes("/api/media/") && !url.includes("?") ? `${url}?size=medium&format=webp` : url;
+
 export function HeartVisions() {
   const { user } = useAuth();
   const [prompt, setPrompt] = useState("");
@@ -121,7 +128,8 @@ export function HeartVisions() {
     try {
       // Call new AI backend endpoint for image generation
       const backendUrl = import.meta.env.VITE_BACKEND_URL || '';
-      const response = await fetch(`${backendUrl}/api/ai/heart-vision`, {
+      // Queue the image, then poll the job instead of holding a request open while it renders
+      const response = await fetch(`${backendUrl}/api/ai/heart-vision/jobs`, {
         method: 'POST',
         headers: {
           'Content-Type': 'application/json',
@@ -137,14 +145,34 @@ export function HeartVisions() {
         throw new Error(errorData.detail || `Failed to generate image: ${response.statusText}`);
       }
 
-      const data = await response.json();
+      let job = await response.json();
+      const deadline = Date.now() + JOB_TIMEOUT_MS;
+      while (job.status !== 'succeeded' && job.status !== 'failed') {
+        if (Date.now() > deadline) {
+          throw new Error("Image generation took too long. Please try again.");
+        }
+        await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+        const statusResponse = await fetch(`${backendUrl}${job.status_url || `/api/ai/heart-vision/jobs/${job.job_id}`}`);
+        if (!statusResponse.ok) {
+          throw new Error(`Failed to generate image: ${statusResponse.statusText}`);
+        }
+        job = { ...job, ...(await statusResponse.json()) };
+      }
+
+      if (job.status === 'failed') {
+        throw new Error(job.error || "Unable to generate your vision. Please try again.");
+      }
+
+      const data = job.result;
 
-      if (!data?.image_base64) {
+      if (!data?.image_url && !data?.image_base64) {
         throw new Error("No image data in response");
       }
 
-      // Convert base64 to data URL for display
-      const imageUrl = `data:image/png;base64,${data.image_base64}`;
+      // Images are served by URL from the backend's media store (cached by the browser)
+      const imageUrl = data.image_url
+        ? `${backendUrl}${data.image_url}`
+        : `data:image/png;base64,${data.image_base64}`;
 
       setGeneratedImage({
         url: imageUrl,
@@ -295,7 +323,7 @@ export function HeartVisions() {
                     </div>
                     <div className="rounded-lg overflow-hidden border shadow-lg">
                       <img
-                        src={vision.url}
+                        src={galleryImageUrl(vision.url)}
                         alt={vision.prompt}
                         className="w-full h-auto"
                       />
@@ -69,14 +69,21 @@ export const PersonalisedInsights = () => {
       const backendUrl = import.meta.env.VITE_BACKEND_URL || '';
       const response = await fetch(`${backendUrl}/api/insights/reports/${user.id}`);
       
+      let reports: InsightReport[] = [];
       if (response.ok) {
-        const reports = await response.json();
+        reports = (await response.json()) || [];
         
-        if (reports && reports.length > 0) {
-          setCurrentReport(reports[0] as InsightReport);
-          setPastReports(reports as InsightReport[]);
+        if (reports.length > 0) {
+          setCurrentReport(reports[0]);
+          setPastReports(reports);
         }
       }
+
+      // Last night's precomputed report, if it's newer than anything saved (never generates)
+      const precomputed = await loadPrecomputedReport(backendUrl);
+      if (precomputed && (reports.length === 0 || new Date(precomputed.created_at) > new Date(reports[0].created_at))) {
+        setCurrentReport(precomputed);
+      }
     } catch (error) {
       console.error('Error loading reports:', error);
     } finally {
@@ -84,6 +91,38 @@ export const PersonalisedInsights = () => {
     }
   };
 
+  const loadPrecomputedReport = async (backendUrl: string): Promise<InsightReport | null> => {
+    if (!user) return null;
+    try {
+      const response = await fetch(`${backendUrl}/api/ai/insights`, {
+        method: 'POST',
+        headers: {
+          'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ user_id: user.id, cached_only: true })
+      });
+      if (!response.ok) return null;
+
+      const insights = await response.json();
+      if (!insights.precomputed) return null;
+      return {
+        id: `precomputed-${insights.generatedAt}`,
+        report_type: 'precomputed',
+        insights: insights,
+        conversation_count: insights.conversationCount || 0,
+        mood_entries_analyzed: insights.moodEntriesAnalyzed || 0,
+        attachment_style: insights.attachmentStyle || 'exploring',
+        healing_progress_score: insights.healingProgressScore || 65,
+        analysis_period_start: new Date(new Date(insights.generatedAt).getTime() - 30 * 24 * 60 * 60 * 1000).toISOString(),
+        analysis_period_end: insights.generatedAt,
+        created_at: insights.generatedAt
+      };
+    } catch (error) {
+      console.error('Error loading precomputed insights:', error);
+      return null;
+    }
+  };
+
   const generateNewInsights = async () => {
     if (!user) return;
     
@@ -99,7 +138,9 @@ export const PersonalisedInsights = () => {
           'Content-Type': 'application/json',
         },
         body: JSON.stringify({
-          user_id: user.id
+          user_id: user.id,
+          // The button always generates fresh - opening the screen shows the precomputed report
+          refresh: true
         })
       });
 
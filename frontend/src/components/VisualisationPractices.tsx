@@ -175,50 +175,47 @@ export const VisualisationPractices = () => {
     setIsLoadingAudio(true);
     
     try {
-      // Call backend with OpenAI TTS - shimmer voice (most soothing)
+      // Stream from the backend (OpenAI TTS, shimmer voice - most soothing) so playback
+      // starts on the first chunk; already-rendered practices play the cached file.
+      // The script is posted once - the <audio> URL only carries its key
       const backendUrl = import.meta.env.VITE_BACKEND_URL || '';
-      const response = await fetch(`${backendUrl}/api/ai/text-to-speech`, {
+      const prepareResponse = await fetch(`${backendUrl}/api/ai/text-to-speech/prepare`, {
         method: 'POST',
-        headers: {
-          'Content-Type': 'application/json',
-        },
+        headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({
           text: fullText,
           voice: 'shimmer'  // Warm, soothing, professional voice
         })
       });
-
-      if (!response.ok) {
-        throw new Error(`Failed to generate audio: ${response.statusText}`);
+      if (!prepareResponse.ok) {
+        throw new Error(`Failed to prepare audio: ${prepareResponse.statusText}`);
       }
+      const { stream_url } = await prepareResponse.json();
+      const audioSrc = `${backendUrl}${stream_url}`;
 
-      const data = await response.json();
-
-      if (data.audio) {
-        const audio = new Audio(`data:audio/mp3;base64,${data.audio}`);
-        audioRef.current = audio;
-        
-        audio.onplay = () => {
-          setIsPlayingAudio(true);
-          setIsLoadingAudio(false);
-        };
-        audio.onended = () => {
-          setIsPlayingAudio(false);
-          audioRef.current = null;
-        };
-        audio.onerror = () => {
-          setIsPlayingAudio(false);
-          audioRef.current = null;
-          setIsLoadingAudio(false);
-          toast({
-            title: "Audio Error",
-            description: "Failed to play audio",
-            variant: "destructive"
-          });
-        };
-        
-        await audio.play();
-      }
+      const audio = new Audio(audioSrc);
+      audioRef.current = audio;
+      
+      audio.onplay = () => {
+        setIsPlayingAudio(true);
+        setIsLoadingAudio(false);
+      };
+      audio.onended = () => {
+        setIsPlayingAudio(false);
+        audioRef.current = null;
+      };
+      audio.onerror = () => {
+        setIsPlayingAudio(false);
+        audioRef.current = null;
+        setIsLoadingAudio(false);
+        toast({
+          title: "Audio Error",
+          description: "Failed to play audio",
+          variant: "destructive"
+        });
+      };
+      
+      await audio.play();
     } catch (error) {
       console.error('Error playing audio:', error);
       setIsLoadingAudio(false);
@@ -0,0 +1,65 @@
+"""
+Offline test setup: backend modules on the path, the fake AI provider, the
+in-memory PostgREST from benchmarks/ standing in for Supabase, and scratch
+directories for everything the modules write at import time
+"""
+import os
+import sys
+import socket
+import tempfile
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+# Appended, so backend modules win over benchmark scripts of the same name
+sys.path.append(str(BACKEND_DIR / "benchmarks"))
+
+import fake_openai_server  # noqa: E402
+import fake_postgrest  # noqa: E402
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+_scratch = Path(tempfile.mkdtemp(prefix="heartlift-tests-"))
+_postgrest = fake_postgrest.create_app(query_ms=0)
+_postgrest_port = _free_port()
+fake_openai_server.serve_in_thread(_postgrest, _postgrest_port)
+
+os.environ.setdefault("AI_PROVIDER", "fake")
+os.environ.setdefault("EMERGENT_LLM_KEY", "sk-test")
+os.environ.setdefault("TRACE_EXPORTER", "none")
+os.environ.setdefault("MEDIA_ROOT", str(_scratch / "media"))
+os.environ.setdefault("TTS_CACHE_DIR", str(_scratch / "tts_cache"))
+os.environ.setdefault("HEART_VISION_CACHE_INDEX", str(_scratch / "heart_vision_cache.json"))
+os.environ.setdefault("HEART_VISION_JOBS_DIR", str(_scratch / "heart_vision_jobs"))
+os.environ.setdefault("QUIZ_BANK_PATH", str(_scratch / "question_bank.json.gz"))
+os.environ["SUPABASE_URL"] = f"http://127.0.0.1:{_postgrest_port}"
+os.environ["SUPABASE_SERVICE_KEY"] = fake_postgrest.FAKE_SERVICE_KEY
+
+
+@pytest.fixture
+def tables():
+    """The fake database's tables (table name -> rows), emptied for each test"""
+    _postgrest.state.tables.clear()
+    return _postgrest.state.tables
+
+
+@pytest.fixture
+def api():
+    """Send one request to the backend app in-process: api(method, path, **httpx_kwargs)"""
+    import asyncio
+    import httpx
+    import server
+
+    def send(method: str, path: str, **kwargs) -> httpx.Response:
+        async def run():
+            async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+                return await client.request(method, path, **kwargs)
+        return asyncio.run(run())
+    return send
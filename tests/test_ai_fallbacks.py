@@ -0,0 +1,64 @@
+"""Quiz and insights fall back to canned content when the LLM reply is unusable"""
+import asyncio
+
+import pytest
+
+import ai_service as ai_module
+import providers
+import question_bank
+from ai_service import ai_service
+
+
+def use_provider(monkeypatch, **faults):
+    provider = providers.FakeProvider(llm_latency="fixed:0", token_ms=0, hang_seconds=5, **faults)
+    monkeypatch.setattr(providers, "provider", provider)
+    monkeypatch.setattr(ai_module, "QUIZ_TIMEOUT_SECONDS", 0.05)
+    monkeypatch.setattr(ai_module, "INSIGHTS_TIMEOUT_SECONDS", 0.05)
+
+
+@pytest.fixture(autouse=True)
+def live_quiz(monkeypatch):
+    """Skip the question bank and today's cache, so every quiz asks the LLM"""
+    monkeypatch.setattr(question_bank, "sample_daily_questions", lambda today, count: [])
+    monkeypatch.setattr(ai_module, "_quiz_cache", {})
+    monkeypatch.setattr(ai_module, "_quiz_cache_date", None)
+
+
+def generate_quiz():
+    return asyncio.run(ai_service.generate_daily_quiz_questions(num_questions=4))
+
+
+def generate_insights():
+    return asyncio.run(ai_service.generate_personalized_insights("user-1", conversation_count=3))
+
+
+def test_quiz_from_llm(monkeypatch):
+    use_provider(monkeypatch)
+    questions = generate_quiz()
+    assert questions != ai_service._get_fallback_questions()
+    assert all(len(question["options"]) == 4 for question in questions)
+
+
+@pytest.mark.parametrize("faults", [{"malformed_rate": 1.0}, {"timeout_rate": 1.0}])
+def test_quiz_falls_back(monkeypatch, faults):
+    use_provider(monkeypatch, **faults)
+    questions = generate_quiz()
+    assert questions == ai_service._get_fallback_questions()
+    # Style weights are only used to score answers, never sent to clients
+    assert all(set(question) == {"id", "question", "options"} for question in questions)
+
+
+def test_insights_from_llm(monkeypatch):
+    use_provider(monkeypatch)
+    insights = generate_insights()
+    assert "isFallback" not in insights
+    assert insights["conversationCount"] == 3
+
+
+@pytest.mark.parametrize("faults", [{"malformed_rate": 1.0}, {"timeout_rate": 1.0}])
+def test_insights_fall_back(monkeypatch, faults):
+    use_provider(monkeypatch, **faults)
+    insights = generate_insights()
+    assert insights["isFallback"] is True
+    # Scores still come from progress_scoring, not the canned text
+    assert "healingProgressScore" in insights and "progressMetrics" in insights
@@ -0,0 +1,93 @@
+import asyncio
+import json
+
+import bulk_io
+
+USER = "user-1"
+
+
+async def body(lines):
+    # Split mid-line, as a streamed request body would be
+    data = "\n".join(json.dumps(line) if isinstance(line, dict) else line for line in lines).encode()
+    for start in range(0, len(data), 7):
+        yield data[start:start + 7]
+
+
+def run_import(lines, model, write_chunk):
+    return asyncio.run(bulk_io.import_rows(body(lines), USER, model, write_chunk))
+
+
+def test_bad_lines_are_reported_and_skipped():
+    written = []
+
+    def write_chunk(rows):
+        written.extend(rows)
+        return len(rows), 0
+
+    result = run_import(
+        ['{"reflection_date": "2026-01-01"}', "not json", "[1]", '{"reflection_date": "someday"}'],
+        bulk_io.ReflectionImportRow, write_chunk
+    )
+    assert result["imported"] == 1 and result["failed"] == 3
+    assert [error["line"] for error in result["errors"]] == [2, 3, 4]
+    assert written == [{"reflection_date": "2026-01-01", "user_id": USER}]
+
+
+def test_failing_chunk_is_reported_and_import_continues(monkeypatch):
+    monkeypatch.setattr(bulk_io, "IMPORT_CHUNK_SIZE", 2)
+    calls = 0
+
+    def write_chunk(rows):
+        nonlocal calls
+        calls += 1
+        if calls == 2:
+            raise RuntimeError("connection reset")
+        return len(rows), 0
+
+    lines = [{"reflection_date": f"2026-01-0{day}"} for day in range(1, 6)]
+    result = run_import(lines, bulk_io.ReflectionImportRow, write_chunk)
+    assert calls == 3
+    assert result["imported"] == 3 and result["failed"] == 2
+    assert result["errors"] == [{"line": 3, "error": "Lines 3-4 were not written: connection reset"}]
+
+
+def test_reimport_only_writes_columns_in_the_file(tables):
+    tables["daily_reflections"] = [{
+        "id": "r1", "user_id": USER, "reflection_date": "2026-01-01", "notes": "kept",
+        "coaches_chatted_with": ["luna"], "conversation_rating": 2, "created_at": "2026-01-01T20:00:00",
+    }]
+    result = run_import([
+        {"reflection_date": "2026-01-01", "conversation_rating": 4},
+        {"reflection_date": "2026-01-02", "notes": "new day"},
+    ], bulk_io.ReflectionImportRow, bulk_io.upsert_reflections)
+
+    assert result["imported"] == 2
+    rows = {row["reflection_date"]: row for row in tables["daily_reflections"]}
+    assert rows["2026-01-01"]["conversation_rating"] == 4
+    assert rows["2026-01-01"]["notes"] == "kept"
+    assert rows["2026-01-01"]["coaches_chatted_with"] == ["luna"]
+    assert rows["2026-01-01"]["created_at"] == "2026-01-01T20:00:00"
+    assert rows["2026-01-02"]["notes"] == "new day"
+
+
+def test_later_lines_for_a_day_win(tables):
+    result = run_import([
+        {"reflection_date": "2026-01-01", "notes": "first", "conversation_rating": 1},
+        {"reflection_date": "2026-01-01", "notes": "second"},
+    ], bulk_io.ReflectionImportRow, bulk_io.upsert_reflections)
+    assert result == {"imported": 1, "skipped": 1, "failed": 0, "errors": []}
+    [row] = tables["daily_reflections"]
+    assert row["notes"] == "second" and row["conversation_rating"] == 1
+
+
+def test_report_import_skips_stored_reports_and_internal_types(tables):
+    tables["insights_reports"] = [{"id": "a", "user_id": USER, "report_type": "comprehensive",
+                                   "insights": {}, "created_at": "2026-01-01T10:00:00"}]
+    result = run_import([
+        {"insights": {}, "created_at": "2026-01-01T10:00:00"},
+        {"insights": {}, "created_at": "2026-01-02T10:00:00+00:00"},
+        {"insights": {}, "created_at": "2026-01-03T10:00:00", "report_type": "precomputed"},
+    ], bulk_io.ReportImportRow, bulk_io.insert_reports)
+    assert (result["imported"], result["skipped"], result["failed"]) == (1, 1, 1)
+    assert "report_type must be one of" in result["errors"][0]["error"]
+    assert len(tables["insights_reports"]) == 2
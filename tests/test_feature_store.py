@@ -0,0 +1,69 @@
+from datetime import datetime, timedelta
+
+import feature_store
+
+USER = "user-1"
+
+
+def days_ago(days: int) -> str:
+    return (datetime.utcnow() - timedelta(days=days)).date().isoformat()
+
+
+def hours_ago(hours: float) -> str:
+    return (datetime.utcnow() - timedelta(hours=hours)).isoformat()
+
+
+def test_extract_topics_and_moods():
+    assert set(feature_store.extract_topics("My ex and my mum keep texting me")) == {"breakup", "family", "communication"}
+    assert set(feature_store.extract_moods("I'm so anxious, I can't stop crying")) == {"anxious", "sad"}
+
+
+def test_summary_only_counts_the_window():
+    features = {
+        "activity_by_day": {days_ago(1): 3, days_ago(40): 9},
+        "topics_by_day": {days_ago(1): {"family": 2}, days_ago(40): {"breakup": 9}},
+        "moods_by_day": {days_ago(1): {"hopeful": 1}, days_ago(40): {"sad": 9}},
+        "reflections": {days_ago(2): {"rating": 4, "themes": {"self_care": 1}, "moods": {"calm": 1}}},
+    }
+    summary = feature_store.summarize_features(features, lookback_days=30)
+    assert summary["conversation_count"] == 3
+    assert summary["topics"] == [("family", 2)] and not summary["topics_ranked"]
+    assert dict(summary["moods"]) == {"hopeful": 1, "calm": 1}
+    assert summary["average_rating"] == 4.0
+    assert summary["active_days"] == 1
+
+
+def test_summary_of_empty_row():
+    summary = feature_store.summarize_features({})
+    assert summary["conversation_count"] == 0 and summary["topics"] == [] and summary["average_rating"] is None
+
+
+def test_ranked_topics_are_used_while_fresh():
+    features = {"ranked_topics": [["miss ex", 1.0]], "ranked_topics_at": hours_ago(2),
+                "topics_by_day": {days_ago(1): {"family": 2}}}
+    summary = feature_store.summarize_features(features)
+    assert summary["topics"] == [("miss ex", 1.0)] and summary["topics_ranked"]
+
+
+def test_stale_ranked_topics_fall_back_to_keyword_counts():
+    features = {"ranked_topics": [["miss ex", 1.0]],
+                "ranked_topics_at": hours_ago(feature_store.RANKED_TOPICS_MAX_AGE_HOURS + 1) + "+00:00",
+                "topics_by_day": {days_ago(1): {"family": 2}}}
+    summary = feature_store.summarize_features(features)
+    assert summary["topics"] == [("family", 2)] and not summary["topics_ranked"]
+
+
+def test_load_backfills_rows_that_predate_the_feature_store(tables):
+    tables["conversation_history"] = [
+        {"id": "m1", "user_id": USER, "sender": "user", "message_content": "I miss my ex", "created_at": hours_ago(30)},
+        {"id": "m2", "user_id": USER, "sender": "coach", "message_content": "Tell me more", "created_at": hours_ago(30)},
+    ]
+    # Created by an incremental update, never backfilled
+    tables["user_insight_features"] = [{"user_id": USER, "message_count": 1, "backfilled_at": None}]
+
+    features = feature_store.load_user_features(USER)
+    assert features["backfilled_at"] and features["message_count"] == 1
+    assert feature_store.summarize_features(features)["topics"] == [("breakup", 1)]
+    assert tables["user_insight_features"][0]["backfilled_at"] == features["backfilled_at"]
+
+    assert feature_store.load_user_features(USER)["backfilled_at"] == features["backfilled_at"]
@@ -0,0 +1,59 @@
+import asyncio
+
+import pytest
+
+import media_store
+from heart_vision_cache import HeartVisionCache, cache_key
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return HeartVisionCache(index_path=tmp_path / "index.json", max_bytes=25)
+
+
+def stored_image(size: int = 10) -> str:
+    return media_store.put(b"x" * size)
+
+
+def test_cache_key_ignores_case_and_punctuation():
+    assert cache_key("Feeling CALM, after a breakup!") == cache_key("feeling calm after   a breakup")
+    assert cache_key("calm", "user-1", 1) != cache_key("calm", "user-1", 2)
+
+
+def test_evicts_least_recently_used(cache):
+    cache.put("a", stored_image(), 10, 1.0)
+    cache.put("b", stored_image(), 10, 1.0)
+    assert cache.get("a")
+    cache.put("c", stored_image(), 10, 1.0)
+
+    assert cache.get("b") is None
+    assert cache.get("a") and cache.get("c")
+    assert cache.total_bytes == 20
+    assert cache.evictions == 1
+
+
+def test_index_survives_restart(cache, tmp_path):
+    cache.put("a", stored_image(), 10, 2.0)
+    cache.put("b", stored_image(), 10, 2.0)
+    reloaded = HeartVisionCache(index_path=tmp_path / "index.json", max_bytes=25)
+    assert list(reloaded.entries) == ["a", "b"]
+    assert reloaded.total_bytes == 20
+
+
+def test_concurrent_misses_share_one_generation(cache):
+    calls = 0
+
+    async def generate():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return stored_image(), 10
+
+    async def main():
+        return await asyncio.gather(*(cache.get_or_generate("shared", generate) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert len({image_key for image_key, _ in results}) == 1
+    assert not cache._in_flight
+    assert asyncio.run(cache.get_or_generate("shared", generate))[1] is True
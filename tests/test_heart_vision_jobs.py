@@ -0,0 +1,48 @@
+import asyncio
+import json
+from datetime import datetime, timedelta
+
+import heart_vision_jobs as jobs
+
+
+def write_job(jobs_dir, job_id, status, attempts=0, age_hours=0):
+    stamp = (datetime.utcnow() - timedelta(hours=age_hours)).isoformat()
+    job = {"id": job_id, "status": status, "prompt": "p", "attempts": attempts, "created_at": stamp, "updated_at": stamp}
+    (jobs_dir / f"{job_id}.json").write_text(json.dumps(job))
+
+
+def saved(jobs_dir, job_id):
+    return json.loads((jobs_dir / f"{job_id}.json").read_text())
+
+
+def test_restart_requeues_unfinished_jobs(tmp_path):
+    write_job(tmp_path, "interrupted", jobs.RUNNING, attempts=1)
+    write_job(tmp_path, "waiting", jobs.QUEUED)
+    write_job(tmp_path, "gave-up", jobs.RUNNING, attempts=jobs.MAX_ATTEMPTS)
+    write_job(tmp_path, "done", jobs.SUCCEEDED)
+    write_job(tmp_path, "expired", jobs.FAILED, age_hours=jobs.JOB_RETENTION_HOURS + 1)
+    (tmp_path / "broken.json").write_text("{")
+
+    # No workers, so re-queued jobs stay queued
+    queue = jobs.HeartVisionJobQueue(jobs_dir=tmp_path, workers=0)
+    asyncio.run(queue.start())
+
+    assert queue._queue.qsize() == 2
+    assert saved(tmp_path, "interrupted")["status"] == jobs.QUEUED
+    assert saved(tmp_path, "interrupted")["attempts"] == 1
+    assert saved(tmp_path, "waiting")["status"] == jobs.QUEUED
+    assert saved(tmp_path, "gave-up")["status"] == jobs.FAILED
+    assert saved(tmp_path, "gave-up")["error"]
+    assert queue.get("done")["status"] == jobs.SUCCEEDED
+    assert queue.get("expired") is None and not (tmp_path / "expired.json").exists()
+
+
+def test_prune_forgets_old_finished_jobs(tmp_path):
+    write_job(tmp_path, "done", jobs.SUCCEEDED)
+    queue = jobs.HeartVisionJobQueue(jobs_dir=tmp_path, workers=0)
+    asyncio.run(queue.start())
+
+    assert queue.prune() == 0
+    queue.get("done")["updated_at"] = (datetime.utcnow() - timedelta(hours=jobs.JOB_RETENTION_HOURS + 1)).isoformat()
+    assert queue.prune() == 1
+    assert queue.get("done") is None and not (tmp_path / "done.json").exists()
@@ -0,0 +1,46 @@
+from datetime import datetime, timedelta
+
+import server
+
+USER = "user-1"
+
+
+def report(report_type: str, hours_ago: float = 1) -> dict:
+    created_at = (datetime.utcnow() - timedelta(hours=hours_ago)).isoformat()
+    return {
+        "id": f"{report_type}-{hours_ago}", "user_id": USER, "report_type": report_type,
+        "insights": {"communicationStyle": report_type}, "created_at": created_at,
+    }
+
+
+def test_cached_only_serves_precomputed_report(tables, api):
+    tables["insights_reports"] = [report("precomputed")]
+    response = api("POST", "/api/ai/insights", json={"user_id": USER, "cached_only": True})
+    assert response.status_code == 200
+    assert response.json()["precomputed"] is True
+    assert response.json()["communicationStyle"] == "precomputed"
+
+
+def test_cached_only_never_generates(tables, api):
+    stale = server.PRECOMPUTED_INSIGHTS_MAX_AGE_HOURS + 1
+    tables["insights_reports"] = [report("precomputed", hours_ago=stale)]
+    response = api("POST", "/api/ai/insights", json={"user_id": USER, "cached_only": True})
+    assert response.status_code == 404
+
+
+def test_precomputed_report_is_not_saved_again(tables, api):
+    tables["insights_reports"] = [report("precomputed")]
+    insights = api("POST", "/api/ai/insights", json={"user_id": USER, "cached_only": True}).json()
+    response = api("POST", "/api/insights/save", json={
+        "user_id": USER, "insights": insights, "conversation_count": 1, "mood_entries_analyzed": 1,
+        "attachment_style": "secure", "healing_progress_score": 50,
+        "analysis_period_start": "2026-01-01", "analysis_period_end": "2026-01-31",
+    })
+    assert response.status_code == 400
+    assert len(tables["insights_reports"]) == 1
+
+
+def test_report_history_leaves_out_precomputed(tables, api):
+    tables["insights_reports"] = [report("precomputed"), report("comprehensive", hours_ago=2)]
+    response = api("GET", f"/api/insights/reports/{USER}")
+    assert [row["report_type"] for row in response.json()] == ["comprehensive"]
@@ -0,0 +1,27 @@
+import pytest
+
+import media_store
+
+DIGEST = "ab" * 32
+
+
+def test_key_validation():
+    assert media_store.is_valid_key(f"{DIGEST}.png")
+    assert media_store.is_valid_key(f"{DIGEST}_thumb.webp")
+    for key in ["", None, f"{DIGEST}.exe", f"{DIGEST.upper()}.png", f"../{DIGEST}.png", f"{DIGEST[:-1]}.png", f"{DIGEST}_Thumb.png", f"{DIGEST}.png/x"]:
+        assert not media_store.is_valid_key(key)
+        assert media_store.get_path(key) is None
+        assert media_store.delete(key) == 0
+    with pytest.raises(ValueError):
+        media_store.put_as("../../etc/passwd", b"x")
+
+
+def test_put_get_delete():
+    key = media_store.put(b"original bytes")
+    assert media_store.put(b"original bytes") == key
+    assert media_store.get_path(key).read_bytes() == b"original bytes"
+
+    digest = key.split(".")[0]
+    variant = media_store.put_as(f"{digest}_thumb.webp", b"thumbnail")
+    assert media_store.delete(key) == 2
+    assert media_store.get_path(key) is None and media_store.get_path(variant) is None
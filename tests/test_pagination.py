@@ -0,0 +1,70 @@
+import pytest
+from fastapi import HTTPException
+
+import pagination
+
+
+class RecordingQuery:
+    """Stands in for a PostgREST query builder - records filters, returns canned rows"""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.calls = []
+
+    def __getattr__(self, name):
+        def call(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+        return call
+
+    def execute(self):
+        limit = next(args[0] for name, args, _ in reversed(self.calls) if name == 'limit')
+        return type("Response", (), {"data": self.rows[:limit]})()
+
+
+def test_cursor_round_trip():
+    row = {'id': 'a1b2', 'created_at': '2026-01-02T03:04:05.678+00:00'}
+    cursor = pagination.encode_cursor(row, 'created_at')
+    assert '=' not in cursor
+    assert pagination.decode_cursor(cursor) == {'k': row['created_at'], 'id': 'a1b2'}
+
+
+@pytest.mark.parametrize("cursor", ["not-a-cursor", "e30", "bnVsbA", "!!!"])
+def test_decode_cursor_rejects_foreign_cursors(cursor):
+    with pytest.raises(HTTPException) as error:
+        pagination.decode_cursor(cursor)
+    assert error.value.status_code == 400
+
+
+def test_apply_cursor_tie_breaks_on_id():
+    cursor = pagination.encode_cursor({'id': 'r9', 'created_at': '2026-01-02T03:04:05'}, 'created_at')
+    query = pagination.apply_cursor(RecordingQuery(), cursor, 'created_at')
+    assert query.calls == [(
+        'or_',
+        ('created_at.lt."2026-01-02T03:04:05",and(created_at.eq."2026-01-02T03:04:05",id.lt."r9")',),
+        {},
+    )]
+
+
+def test_apply_cursor_unique_sort_key():
+    cursor = pagination.encode_cursor({'id': 'r9', 'reflection_date': '2026-01-02'}, 'reflection_date')
+    query = pagination.apply_cursor(RecordingQuery(), cursor, 'reflection_date', unique_sort_key=True, descending=False)
+    assert query.calls == [('gt', ('reflection_date', '2026-01-02'), {})]
+
+
+def test_fetch_page_cursor_points_at_last_row():
+    rows = [{'id': str(i), 'created_at': f'2026-01-{31 - i:02d}'} for i in range(5)]
+    page, cursor = pagination.fetch_page(RecordingQuery(rows), 3, 'created_at')
+    assert page == rows[:3]
+    assert pagination.decode_cursor(cursor) == {'k': rows[2]['created_at'], 'id': rows[2]['id']}
+
+    page, cursor = pagination.fetch_page(RecordingQuery(rows[3:]), 3, 'created_at')
+    assert page == rows[3:] and cursor is None
+
+
+def test_parse_fields():
+    assert pagination.parse_fields(None, pagination.REFLECTION_FIELDS, ('id',)) == ['*']
+    assert pagination.parse_fields('notes,id', pagination.REFLECTION_FIELDS, ('id', 'reflection_date')) == \
+        ['id', 'reflection_date', 'notes']
+    with pytest.raises(HTTPException):
+        pagination.parse_fields('password', pagination.REFLECTION_FIELDS, ('id',))
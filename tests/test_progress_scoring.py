@@ -0,0 +1,44 @@
+from datetime import date, timedelta
+
+import progress_scoring
+
+TODAY = date(2025, 3, 31)
+
+
+def day(offset: int) -> str:
+    return (TODAY - timedelta(days=offset)).isoformat()
+
+
+def test_no_signal_yet():
+    progress = progress_scoring.compute_healing_progress({}, today=TODAY)
+    assert progress["components"] == {"reflection_rating": 0.5, "engagement": 0.0, "rating_trend": 0.5, "self_reflection": 0.0}
+    assert progress["healingProgressScore"] == 28
+    assert progress["attachmentStyle"] == "exploring"
+    assert progress["ratingTrend"] is None
+    assert progress["windows"]["90"]["messages"] == 0
+
+
+def test_windows_and_trend():
+    features = {
+        "reflections": {day(offset): {"rating": 5 - offset} for offset in range(4)},
+        "activity_by_day": {day(0): 2, day(10): 3, day(100): 50},
+    }
+    windows = progress_scoring.compute_window_metrics(features, TODAY)
+    assert windows[7]["active_days"] == 1 and windows[30]["messages"] == 5
+    assert windows[7]["reflection_days"] == 4 and windows[7]["average_rating"] == 3.5
+    assert progress_scoring.rating_trend(features, TODAY) == 1.0
+
+    progress = progress_scoring.compute_healing_progress(features, today=TODAY)
+    assert progress["components"]["rating_trend"] == 1.0
+    assert progress["components"]["engagement"] == 0.134  # 2 of 30 days, against a target of half
+
+
+def test_recent_quiz_results_outweigh_old_ones():
+    results = [
+        {"attachment_style": "anxious", "completed_at": day(120)},
+        {"attachment_style": "anxious", "completed_at": day(90)},
+        {"attachment_style": "secure", "completed_at": day(1)},
+        {"attachment_style": None, "completed_at": day(0)},
+    ]
+    assert progress_scoring.dominant_quiz_style(results, TODAY) == "secure"
+    assert progress_scoring.dominant_quiz_style([], TODAY) is None
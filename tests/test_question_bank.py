@@ -0,0 +1,55 @@
+from datetime import date
+
+import pytest
+
+import question_bank
+
+STYLES = list(question_bank.VALID_STYLES)
+
+
+def entry(theme: int, n: int):
+    return {"q": f"Theme {theme} question number {n} about how you feel?", "o": [f"Option {i}" for i in range(4)], "s": STYLES}
+
+
+@pytest.fixture
+def bank_path(tmp_path, monkeypatch):
+    monkeypatch.setattr(question_bank, "BANK_PATH", tmp_path / "bank.json.gz")
+    monkeypatch.setattr(question_bank, "_bank", None)
+    monkeypatch.setattr(question_bank, "_bank_mtime", None)
+    return question_bank.BANK_PATH
+
+
+def test_no_bank(bank_path):
+    assert question_bank.sample_daily_questions(date(2025, 3, 31)) is None
+
+
+def test_same_day_same_quiz(bank_path):
+    themes = {str(t): [entry(t, n) for n in range(8)] for t in range(len(question_bank.THEME_FOCUSES))}
+    question_bank.save_bank({"themes": themes})
+
+    day = date(2025, 3, 31)
+    questions = question_bank.sample_daily_questions(day)
+    assert questions == question_bank.sample_daily_questions(day)
+    assert len(questions) == 10 and len({q["question"] for q in questions}) == 10
+    theme = str(day.timetuple().tm_yday % len(question_bank.THEME_FOCUSES))
+    assert sum(q["question"].startswith(f"Theme {theme} ") for q in questions) == 6
+    assert questions != question_bank.sample_daily_questions(date(2025, 4, 1))
+
+
+def test_too_few_questions(bank_path):
+    question_bank.save_bank({"themes": {"0": [entry(0, n) for n in range(3)]}})
+    assert question_bank.sample_daily_questions(date(2025, 3, 31)) is None
+    assert len(question_bank.sample_daily_questions(date(2025, 3, 31), num_questions=3)) == 3
+
+
+def test_add_questions_validates_and_deduplicates():
+    bank = {}
+    question = {"question": "When a friend cancels plans, what do you do?", "options": ["A", "B", "C", "D"], "styles": ["secure", "anxious", "avoidant", "fearful"]}
+    added = question_bank.add_questions(bank, 2, [
+        question,
+        dict(question, question="When a friend cancels plans, what do you do next?"),
+        dict(question, question="Who would you go on a date with?"),
+        dict(question, options=["A", "A", "C", "D"]),
+    ])
+    assert added == 1
+    assert bank["themes"]["2"][0]["s"] == STYLES
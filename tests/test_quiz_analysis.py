@@ -0,0 +1,43 @@
+import asyncio
+import time
+
+import httpx
+
+import ai_service as ai_module
+import providers
+import server
+
+ANSWERS = [
+    {"question": "A friend seems distant lately. You:", "answer": "Worry you did something wrong and ask for reassurance"},
+    {"question": "After an argument you usually:", "answer": "Need space and some distance before talking"},
+    {"question": "When plans change last minute:", "answer": "Feel comfortable and express how you feel"},
+]
+
+
+def test_fast_analysis_returns_local_result_then_enrichment(monkeypatch):
+    monkeypatch.setattr(providers, "provider", providers.FakeProvider(llm_latency="fixed:300", token_ms=0))
+    monkeypatch.setattr(ai_module._quiz_analysis_cache, "get", lambda key: None)
+
+    async def main():
+        # One event loop throughout, so the background enrichment keeps running between requests
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://test") as client:
+            started = time.perf_counter()
+            local = (await client.post("/api/ai/quiz/analyze", json={"questions_and_answers": ANSWERS, "fast": True})).json()
+            elapsed = time.perf_counter() - started
+            for _ in range(50):
+                enrichment = (await client.get(f"/api/ai/quiz/analyze/{local['analysisId']}")).json()
+                if enrichment["status"] != "pending":
+                    break
+                await asyncio.sleep(0.05)
+            return local, elapsed, enrichment
+
+    local, elapsed, enrichment = asyncio.run(main())
+    assert elapsed < 0.3, "the fast path must not wait for the LLM"
+    assert local["enrichmentStatus"] == "pending"
+    assert local["attachmentStyle"] and local["analysis"]["detailedBreakdown"]["strengths"]
+    assert enrichment["status"] == "complete"
+    assert enrichment["result"]["attachmentStyle"] and enrichment["result"]["analysis"]
+
+
+def test_unknown_analysis_id(api):
+    assert api("GET", "/api/ai/quiz/analyze/nope").status_code == 404
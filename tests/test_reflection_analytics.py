@@ -0,0 +1,45 @@
+from datetime import date
+
+import reflection_analytics
+
+TODAY = date(2025, 3, 31)
+
+
+def test_empty_history():
+    result = reflection_analytics.compute_reflection_analytics([], days=30, today=TODAY)
+    assert result["period"] == {"start": "2025-03-02", "end": "2025-03-31", "days": 30}
+    assert result["summary"] == {
+        "reflections": 0, "rated_reflections": 0, "average_rating": None,
+        "reflection_rate": 0.0, "with_helpful_moments": 0,
+    }
+    assert result["streaks"] == {"current": 0, "longest": 0}
+    assert result["coach_usage"] == []
+    assert result["trends"]["7d"] == {"average_rating": None, "slope_per_day": None}
+    assert len(result["series"]) == 30
+    assert result["series"][-1] == {"date": "2025-03-31", "rating": None, "reflected": False, "rolling_7d": None, "rolling_30d": None}
+
+
+def test_sparse_history():
+    reflections = [
+        {"reflection_date": "2025-03-29", "conversation_rating": 4, "coaches_chatted_with": ["luna", "max"], "helpful_moments": "Breathing"},
+        {"reflection_date": "2025-03-30T08:00:00", "conversation_rating": None, "coaches_chatted_with": None, "helpful_moments": " "},
+        {"reflection_date": "2025-03-30", "conversation_rating": 2, "coaches_chatted_with": ["luna"], "helpful_moments": None},
+        # Outside the period, and unparseable
+        {"reflection_date": "2024-01-01", "conversation_rating": 5, "coaches_chatted_with": ["max"], "helpful_moments": "x"},
+        {"reflection_date": "not a date", "conversation_rating": 5, "coaches_chatted_with": [], "helpful_moments": "x"},
+    ]
+    result = reflection_analytics.compute_reflection_analytics(reflections, days=30, today=TODAY)
+
+    # The later duplicate for 03-30 wins
+    assert result["summary"]["reflections"] == 2
+    assert result["summary"]["average_rating"] == 3.0
+    assert result["summary"]["with_helpful_moments"] == 1
+    # Today hasn't been reflected on yet, so the streak still counts
+    assert result["streaks"] == {"current": 2, "longest": 2}
+    assert result["coach_usage"] == [
+        {"coach_id": "luna", "days": 2, "share": 0.667},
+        {"coach_id": "max", "days": 1, "share": 0.333},
+    ]
+    # Two ratings aren't enough for a trend
+    assert result["trends"]["7d"] == {"average_rating": 3.0, "slope_per_day": None}
+    assert result["series"][-2]["rolling_7d"] == 3.0
@@ -0,0 +1,31 @@
+import topic_extractor
+
+
+def test_phrase_absorbs_its_words():
+    messages = [
+        "I miss my ex so much",
+        "I still miss my ex every night",
+        "do I miss my ex or just the routine",
+        "work is stressful",
+        "my ex texted me",
+    ]
+    topics = dict(topic_extractor.extract_topics(messages))
+    assert topics["miss ex"] == 1.0
+    assert "miss" not in topics and "ex" not in topics
+    assert max(topics, key=topics.get) == "miss ex"
+
+
+def test_one_off_bigrams_are_dropped():
+    topics = dict(topic_extractor.extract_topics(["moved fast", "work again", "work stress"]))
+    assert "moved fast" not in topics
+
+
+def test_nothing_to_extract():
+    assert topic_extractor.extract_topics([]) == []
+    assert topic_extractor.extract_topics(["the and a"]) == []
+
+
+def test_batch_keeps_users_apart():
+    results = topic_extractor.extract_topics_batch({"a": ["my sister again", "sister drama"], "b": ["exams exams"], "c": []})
+    assert results["c"] == []
+    assert "sister" in dict(results["a"]) and "sister" not in dict(results["b"])
@@ -0,0 +1,128 @@
+import asyncio
+
+import pytest
+
+import tts_cache
+import tts_chunking
+
+
+# ---- parse_range ----
+
+@pytest.mark.parametrize("header, expected", [
+    ("bytes=0-99", (0, 99)),
+    ("bytes=100-", (100, 999)),
+    ("bytes=-100", (900, 999)),
+    ("bytes=-5000", (0, 999)),
+    ("bytes=900-5000", (900, 999)),
+    (" bytes=0-0 ", (0, 0)),
+])
+def test_parse_range(header, expected):
+    assert tts_cache.parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", [None, "", "bytes=-", "bytes=5-2", "bytes=0-1,5-9", "items=0-9"])
+def test_parse_range_whole_file(header):
+    assert tts_cache.parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=2000-2100", "bytes=-0"])
+def test_parse_range_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        tts_cache.parse_range(header, 1000)
+
+
+# ---- split_script ----
+
+SCRIPT = (
+    "Close your eyes and take a slow breath in through your nose. "
+    "Breathe. Hold it for a moment. "
+    "Picture Dr. Smith, Mrs. Jones and J. R. Tolkien in a warm, quiet room full of light.\n\n"
+    "Now let the breath go, and notice how your shoulders soften and drop."
+)
+
+
+def test_split_script_reproduces_text():
+    chunks = tts_chunking.split_script(SCRIPT)
+    assert " ".join(chunks) == " ".join(SCRIPT.split())
+
+
+def test_split_script_keeps_abbreviations_in_their_sentence():
+    chunks = tts_chunking.split_script(SCRIPT)
+    assert any("Dr. Smith, Mrs. Jones and J. R. Tolkien" in chunk for chunk in chunks)
+    assert not any(chunk.endswith(("Dr.", "Mrs.", "J.", "R.")) for chunk in chunks)
+
+
+def test_split_script_merges_short_fragments_forward():
+    chunks = tts_chunking.split_script(SCRIPT)
+    assert chunks[1].startswith("Breathe. Hold it for a moment. Picture")
+    assert all(len(chunk) >= tts_chunking.MIN_CHUNK_CHARS for chunk in chunks)
+
+
+def test_split_script_splits_long_sentences():
+    sentence = ", ".join(["let the warmth spread through your chest"] * 60) + "."
+    chunks = tts_chunking.split_script(sentence)
+    assert len(chunks) > 1
+    assert all(len(chunk) <= tts_chunking.MAX_CHUNK_CHARS for chunk in chunks)
+    assert " ".join(chunks) == sentence
+
+
+# ---- disk cache ----
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts_cache, "TTS_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(tts_cache, "_entries", None)
+    monkeypatch.setattr(tts_cache, "_total_bytes", 0)
+    return tmp_path
+
+
+def test_cache_evicts_least_recently_used(cache_dir, monkeypatch):
+    monkeypatch.setattr(tts_cache, "MAX_BYTES", 25)
+    first, second, third = (tts_cache.cache_key(text, "shimmer") for text in ("one", "two", "three"))
+    tts_cache.put(first, b"x" * 10)
+    tts_cache.put(second, b"x" * 10)
+    assert tts_cache.get_path(first)
+    tts_cache.put(third, b"x" * 10)
+
+    assert tts_cache.get_path(second) is None
+    assert tts_cache.get_path(first) and tts_cache.get_path(third)
+    assert tts_cache.stats()["bytes"] == 20
+
+
+def test_cache_demoted_entries_go_first(cache_dir, monkeypatch):
+    monkeypatch.setattr(tts_cache, "MAX_BYTES", 25)
+    chunk, script, other = (tts_cache.cache_key(text, "shimmer") for text in ("chunk", "script", "other"))
+    tts_cache.put(script, b"x" * 10)
+    tts_cache.put(chunk, b"x" * 10)
+    tts_cache.demote([chunk])
+    tts_cache.put(other, b"x" * 10)
+
+    assert tts_cache.get_path(chunk) is None
+    assert tts_cache.get_path(script)
+
+
+def test_cache_recency_survives_restart(cache_dir, monkeypatch):
+    older, newer = tts_cache.cache_key("older", "shimmer"), tts_cache.cache_key("newer", "shimmer")
+    tts_cache.put(older, b"x")
+    tts_cache.put(newer, b"x")
+    tts_cache.demote([older])
+    monkeypatch.setattr(tts_cache, "_entries", None)
+    assert list(tts_cache._index()) == [older, newer]
+
+
+def test_concurrent_misses_share_one_render(cache_dir):
+    calls = 0
+
+    async def synthesize():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return b"audio"
+
+    async def main():
+        key = tts_cache.cache_key("shared", "shimmer")
+        return await asyncio.gather(*(tts_cache.get_or_synthesize(key, synthesize) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert calls == 1
+    assert {path.read_bytes() for path, _ in results} == {b"audio"}
@@ -0,0 +1,40 @@
+import pytest
+
+import tts_cache
+
+SCRIPT = "Close your eyes. Breathe in slowly, and let your shoulders drop."
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(tts_cache, "TTS_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(tts_cache, "_entries", None)
+    monkeypatch.setattr(tts_cache, "_total_bytes", 0)
+    monkeypatch.setattr(tts_cache, "_pending_texts", type(tts_cache._pending_texts)())
+
+
+def test_stream_url_carries_only_the_key(api):
+    prepared = api("POST", "/api/ai/text-to-speech/prepare", json={"text": SCRIPT}).json()
+    assert prepared["cached"] is False
+    assert prepared["stream_url"] == f"/api/ai/text-to-speech/stream/{prepared['audio_key']}"
+
+    response = api("GET", prepared["stream_url"])
+    assert response.status_code == 200 and response.content
+    assert response.headers["x-tts-cache"] == "miss"
+
+    # Rendered audio is now served from the cache, with Range support
+    prepared = api("POST", "/api/ai/text-to-speech/prepare", json={"text": SCRIPT}).json()
+    assert prepared["cached"] is True and prepared["stream_url"] == tts_cache.url_for(prepared["audio_key"])
+    redirect = api("GET", f"/api/ai/text-to-speech/stream/{prepared['audio_key']}")
+    assert redirect.status_code == 307 and redirect.headers["location"] == prepared["stream_url"]
+
+
+def test_unknown_key_is_not_found(api):
+    key = tts_cache.cache_key("never prepared", "shimmer")
+    assert api("GET", f"/api/ai/text-to-speech/stream/{key}").status_code == 404
+    assert api("GET", "/api/ai/text-to-speech/stream/not-a-key").status_code == 404
+
+
+def test_prepare_rejects_unknown_voice(api):
+    response = api("POST", "/api/ai/text-to-speech/prepare", json={"text": SCRIPT, "voice": "robot"})
+    assert response.status_code == 400
@@ -0,0 +1,51 @@
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+import server
+
+KEY = "admin-secret"
+
+
+@pytest.fixture
+def usage(tables, monkeypatch):
+    monkeypatch.setattr(server, "ADMIN_API_KEY", KEY)
+    now = datetime.utcnow()
+    tables["usage_tracking"] = [
+        {"id": f"u{i}", "type": "coach_chat", "coach_id": "luna", "user_id": "user-1", "session_id": "s1",
+         "timestamp": (now - timedelta(hours=i + 1)).isoformat(), "message_length": 10, "response_length": 20,
+         "success": True, "error": None}
+        for i in range(3)
+    ]
+
+
+@pytest.fixture
+def export(api):
+    def run(**params) -> list:
+        response = api("GET", "/api/admin/usage-export", headers={"X-Admin-Key": KEY}, params=params)
+        assert response.status_code == 200
+        return [json.loads(line) for line in response.text.splitlines()]
+    return run
+
+
+def test_requires_admin_key(usage, api):
+    assert api("GET", "/api/admin/usage-export").status_code == 401
+    assert api("GET", "/api/admin/usage-export", headers={"X-Admin-Key": "guess"}).status_code == 401
+
+
+def test_disabled_without_configured_key(usage, api, monkeypatch):
+    monkeypatch.setattr(server, "ADMIN_API_KEY", "")
+    assert api("GET", "/api/admin/usage-export", headers={"X-Admin-Key": ""}).status_code == 503
+
+
+def test_leaves_out_identifying_columns_by_default(usage, export):
+    rows = export()
+    assert [row["id"] for row in rows] == ["u2", "u1", "u0"]
+    assert not set(rows[0]) & {"user_id", "session_id", "error"}
+    assert export(identifying="true")[0]["user_id"] == "user-1"
+
+
+@pytest.mark.parametrize("start", ["2000-01-01T00:00:00Z", "2000-01-01T00:00:00+00:00", "2000-01-01"])
+def test_accepts_offset_and_naive_starts(usage, export, start):
+    assert len(export(start=start)) == 3